@@ -0,0 +1,51 @@
+""" Benchmark building Resources while decoding against decoding first.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_json
+"""
+import json
+import time
+import tracemalloc
+import warnings
+
+import habu
+from benchmarks.bench_resource import make_payload
+
+
+def two_pass(raw):
+    return habu.Resource(json.loads(raw), lazy=False)
+
+
+def fused(raw):
+    return habu.loads(raw)
+
+
+def measure(func, raw):
+    """ Return the best seconds and the peak bytes used to build a Resource. """
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        func(raw)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    func(raw)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (best, peak)
+
+
+def main():
+    raw = json.dumps(make_payload(10000)).encode("utf-8")
+    print("document: %.1f KiB" % (len(raw) / 1024.0))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for label, func in [("json.loads + Resource", two_pass), ("habu.loads", fused)]:
+            (elapsed, peak) = measure(func, raw)
+            print("%-22s %8.2f ms %10.1f KiB peak" % (label, elapsed * 1e3, peak / 1024.0))
+
+
+if __name__ == "__main__":
+    main()
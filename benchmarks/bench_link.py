@@ -0,0 +1,50 @@
+""" Benchmark the memory used per Link instance.
+
+Compares the slotted Link against an equivalent class which stores its
+attributes in a per-instance `__dict__`, as Link did previously.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_link
+"""
+import tracemalloc
+
+import habu
+
+
+class DictLink(object):
+    """ A Link look-alike storing its attributes in a `__dict__`. """
+
+    def __init__(self):
+        self._documentation = None
+        self._rel = ""
+        self.deprecation = None
+        self.href = ""
+        self.hreflang = "en-US"
+        self.name = ""
+        self.profile = ""
+        self.templated = False
+        self.title = ""
+        self.type = "application/hal+json"
+
+
+def bytes_per_link(factory, count=100000):
+    """ Return the average number of bytes allocated per created instance. """
+    tracemalloc.start()
+    links = [factory() for _ in range(count)]
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del links
+    return used / float(count)
+
+
+def main():
+    before = bytes_per_link(DictLink)
+    after = bytes_per_link(habu.Link)
+    print("__dict__ link: %6.1f bytes/link" % before)
+    print("slotted link:  %6.1f bytes/link" % after)
+    print("saved: %.0f%%" % ((1 - after / before) * 100))
+
+
+if __name__ == "__main__":
+    main()
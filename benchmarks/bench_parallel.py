@@ -0,0 +1,74 @@
+""" Benchmark serial against process-pool parsing of large collections.
+
+Parses collections of increasing size with `habu.Resource` and with
+`habu.parse_parallel`, using an already started executor, and reports the
+smallest size at which parallel parsing is faster. Use it to choose
+`habu.parallel_threshold` for a host. It needs at least two workers, and
+only means something with at least as many idle CPUs.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_parallel [--workers N]
+"""
+import argparse
+import concurrent.futures
+import os
+import time
+import warnings
+
+import habu
+from benchmarks.bench_resource import make_payload
+
+
+SIZES = (500, 1000, 2000, 5000, 10000, 20000)
+
+
+def best_of(func, repeat=3):
+    """ Return the fastest of `repeat` timings of `func()`, in seconds. """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    options = parser.parse_args(argv)
+    if options.workers < 2:
+        print("skipped: parallel parsing needs at least 2 workers, got %i" % options.workers)
+        return
+    warnings.simplefilter("ignore")
+
+    print("%i workers, %i CPUs" % (options.workers, os.cpu_count() or 1))
+    if options.workers > (os.cpu_count() or 1):
+        print("warning: more workers than CPUs, timings do not show a real crossover")
+    print("%8s %12s %12s %8s" % ("items", "serial ms", "parallel ms", "speedup"))
+
+    crossover = None
+    with concurrent.futures.ProcessPoolExecutor(options.workers) as executor:
+        # Start the worker processes before timing anything.
+        list(executor.map(abs, range(options.workers)))
+
+        for size in SIZES:
+            payload = make_payload(size)
+            serial = best_of(lambda: habu.Resource(payload, lazy=False))
+            parallel = best_of(lambda: habu.parse_parallel(
+                payload, workers=options.workers, threshold=0, executor=executor
+            ))
+            print("%8i %12.1f %12.1f %7.2fx" % (
+                size, serial * 1e3, parallel * 1e3, serial / parallel
+            ))
+            if crossover is None and parallel < serial:
+                crossover = size
+
+    if crossover is None:
+        print("no crossover: parallel parsing was never faster")
+    else:
+        print("crossover at about %i embedded resources" % crossover)
+
+
+if __name__ == "__main__":
+    main()
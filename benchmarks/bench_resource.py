@@ -0,0 +1,107 @@
+""" Benchmark eager and lazy Resource construction on a large collection.
+
+Parsing alone and parsing followed by reading every nested value are
+reported separately, since lazy parsing defers work to the first access.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_resource
+"""
+import time
+import tracemalloc
+import warnings
+
+import habu
+
+
+def make_payload(items=10000):
+    """ Return a synthetic collection page with `items` embedded resources. """
+    return {
+        "_links": {
+            "self": {"href": "/products?page=1"},
+            "next": {"href": "/products?page=2"},
+            "curies": [{"name": "doc", "href": "/docs/{rel}", "templated": True}],
+        },
+        "_embedded": {
+            "products": [
+                {
+                    "_links": {
+                        "self": {"href": "/products/%i" % i},
+                        "doc:vendor": {"href": "/vendors/%i" % (i % 50)},
+                    },
+                    "id": i,
+                    "name": "product %i" % i,
+                    "price": {"amount": i * 3, "currency": "USD"},
+                    "tags": ["a", "b", "c"],
+                }
+                for i in range(items)
+            ]
+        },
+        "total": items,
+    }
+
+
+def make_deep_payload(items=2000, depth=6):
+    """ Return a resource whose state holds many deeply nested dictionaries. """
+    def nest(level):
+        if level == 0:
+            return {"value": level, "tags": ["x", "y"]}
+        return {"level": level, "child": nest(level - 1), "sibling": {"n": level}}
+    return {"rows": [nest(depth) for _ in range(items)], "total": items}
+
+
+def read_collection(resource):
+    """ Read a leaf attribute and a link of every embedded product. """
+    for product in resource.embedded.products:
+        product.price.amount
+        product.links.self.href
+
+
+def read_rows(resource):
+    """ Walk every nested row of a deep payload down to its leaf value. """
+    for row in resource.rows:
+        node = row
+        while "child" in node:
+            node.sibling.n
+            node = node.child
+        node.value
+
+
+def measure(payload, lazy, read):
+    """ Return the seconds to parse a page, to then fully `read` it, and the
+    peak bytes used by both. Memory is traced in a separate run, so tracing
+    does not skew the timings.
+    """
+    start = time.perf_counter()
+    resource = habu.Resource(payload, lazy=lazy)
+    resource.total
+    parsed = time.perf_counter()
+    read(resource)
+    elapsed = time.perf_counter()
+    del resource
+
+    tracemalloc.start()
+    read(habu.Resource(payload, lazy=lazy))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (parsed - start, elapsed - start, peak)
+
+
+def main():
+    print("%-5s %12s %16s %14s" % ("", "parse ms", "parse+read ms", "peak KiB"))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for (label, payload, read) in (
+            ("collection:", make_payload(), read_collection),
+            ("deep state:", make_deep_payload(), read_rows),
+        ):
+            print(label)
+            for lazy in (False, True):
+                (parse, total, peak) = measure(payload, lazy, read)
+                print("%-5s %12.2f %16.2f %14.1f" % (
+                    "lazy" if lazy else "eager", parse * 1e3, total * 1e3, peak / 1024.0
+                ))
+
+
+if __name__ == "__main__":
+    main()
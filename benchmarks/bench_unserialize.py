@@ -0,0 +1,69 @@
+""" Benchmark links parsed per second with strict and trusted parsing.
+
+Trusted parsing skips validation and warnings, so it is compared both on a
+clean payload and on one which triggers those checks.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_unserialize
+"""
+import time
+import warnings
+
+import habu
+
+
+def make_payload(links=5000, validated=False):
+    """ Return a resource document with `links` link relations.
+
+    With `validated`, the document also holds what strict parsing checks and
+    warns about: a CURIE without a `{rel}` placeholder, an unknown attribute
+    on every link and a deprecation on every tenth link.
+    """
+    curies = [{"name": "doc", "href": "/docs/{rel}", "templated": True}]
+    if validated:
+        curies.append({"name": "static", "href": "/docs/static"})
+    document = {"curies": curies}
+    for i in range(links):
+        link = {
+            "href": "/things/%i" % i,
+            "title": "thing %i" % i,
+            "type": "application/hal+json",
+        }
+        if validated:
+            link["x-unknown"] = i
+            if i % 10 == 0:
+                link["deprecation"] = "/deprecations/%i" % i
+        document["doc:rel%i" % i] = link
+    return {"_links": document, "name": "many links"}
+
+
+def links_per_second(payload, strict, repeat=5):
+    """ Return the best rate at which the payload's links are parsed. """
+    count = len(payload["_links"])
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        habu.Resource(payload, lazy=False, strict=strict)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count / best
+
+
+def main():
+    for (label, payload) in (
+        ("clean payload", make_payload()),
+        ("payload with warnings", make_payload(validated=True)),
+    ):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            strict = links_per_second(payload, strict=True)
+            trusted = links_per_second(payload, strict=False)
+        print(label)
+        print("  strict:  %10.0f links/s" % strict)
+        print("  trusted: %10.0f links/s" % trusted)
+        print("  speedup: %.1fx" % (trusted / strict))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+""" Benchmark cold and warm expansion of URI templates.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_uri_parsing
+"""
+import timeit
+import warnings
+
+from habu import uri_parsing
+
+
+HREFS = [
+    "/people/{id}",
+    "/people/{id}{?fields,embed}",
+    "/orgs/{org}/teams/{team}/members{/member}{?page,per_page}",
+    "/search{?q,sort,order,page,per_page}{#section}",
+]
+KWARGS = {
+    "id": 42, "fields": "name", "embed": "pets", "org": "habu", "team": "core",
+    "member": "clagraff", "page": 2, "per_page": 50, "q": "hal", "sort": "name",
+    "order": "asc", "section": "top",
+}
+
+
+def expand_cold():
+    uri_parsing.clear_template_cache()
+    for href in HREFS:
+        uri_parsing.parse_uri(href, **KWARGS)
+
+
+def expand_warm():
+    for href in HREFS:
+        uri_parsing.parse_uri(href, **KWARGS)
+
+
+def expand_batch_rows(rows):
+    return list(uri_parsing.expand_batch(HREFS[1], rows))
+
+
+def expand_batch_columns(columns):
+    return list(uri_parsing.expand_batch(HREFS[1], columns))
+
+
+def expand_one_by_one(rows):
+    return [uri_parsing.parse_uri(HREFS[1], **row) for row in rows]
+
+
+def main(number=20000):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        cold = min(timeit.repeat(expand_cold, number=number, repeat=3))
+        expand_warm()
+        warm = min(timeit.repeat(expand_warm, number=number, repeat=3))
+
+    per_call = number * len(HREFS)
+    print("cold: %.2f us/expansion" % (cold / per_call * 1e6))
+    print("warm: %.2f us/expansion" % (warm / per_call * 1e6))
+    print("speedup: %.1fx" % (cold / warm))
+
+    size = 10000
+    rows = [{"id": i, "fields": "name", "embed": "pets"} for i in range(size)]
+    columns = {
+        "id": list(range(size)),
+        "fields": ["name"] * size,
+        "embed": ["pets"] * size,
+    }
+    for label, func, arg in [
+            ("one by one", expand_one_by_one, rows),
+            ("batch rows", expand_batch_rows, rows),
+            ("batch columns", expand_batch_columns, columns)]:
+        elapsed = min(timeit.repeat(lambda: func(arg), number=1, repeat=3))
+        print("%s: %.2f us/expansion" % (label, elapsed / size * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+""" Benchmark suite for habu, emitting its results as JSON.
+
+Covers template expansion for every operator, Resource construction for
+small and large payloads, DictionaryWrapper access and a simulated
+traversal through in-memory routes. Run from the repository root with:
+
+    python -m benchmarks.suite [--output results.json] [--filter uri.]
+
+Each result records the best and mean seconds per operation over several
+repeats, so runs can be compared to track regressions over time.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import timeit
+import warnings
+
+import habu
+from habu import uri_parsing
+from benchmarks.bench_resource import make_payload as make_collection_payload
+from benchmarks.bench_unserialize import make_payload as make_links_payload
+
+
+BENCHMARKS = []
+
+
+def benchmark(name):
+    """ Register a function returning the callable to benchmark as `name`. """
+    def register(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+
+def _register_operators():
+    """ Register a warm expansion benchmark for every template operator. """
+    operators = [""] + sorted(uri_parsing.prefix_types)
+    for operator in operators:
+        href = "/things{%sid,name,tags*}" % operator
+        kwargs = {"id": 42, "name": "habu", "tags": ["a", "b"]}
+
+        def setup(href=href, kwargs=kwargs):
+            uri_parsing.parse_uri(href, **kwargs)
+            return lambda: uri_parsing.parse_uri(href, **kwargs)
+
+        benchmark("uri.expand[%s]" % (operator or "simple"))(setup)
+
+
+_register_operators()
+
+
+@benchmark("uri.expand_cold")
+def uri_expand_cold():
+    href = "/orgs/{org}/teams/{team}{/member}{?page,per_page}"
+
+    def run():
+        uri_parsing.clear_template_cache()
+        uri_parsing.parse_uri(href, org="a", team="b", member="c", page=1, per_page=2)
+    return run
+
+
+@benchmark("uri.expand_batch[1000]")
+def uri_expand_batch():
+    columns = {"id": list(range(1000)), "fields": ["name"] * 1000}
+    return lambda: list(uri_parsing.expand_batch("/people/{id}{?fields}", columns))
+
+
+ROUTES = {
+    "/": {
+        "_links": {
+            "people": {"href": "/people"},
+            "person": {"href": "/people/{id}", "templated": True},
+        }
+    },
+    "/people": {
+        "_links": {"self": {"href": "/people"}},
+        "_embedded": {
+            "people": [
+                {"_links": {"self": {"href": "/people/%i" % i}}, "name": "person %i" % i, "age": i}
+                for i in range(20)
+            ]
+        },
+        "total": 20,
+    },
+}
+for _i in range(20):
+    ROUTES["/people/%i" % _i] = {
+        "_links": {"self": {"href": "/people/%i" % _i}},
+        "name": "person %i" % _i,
+        "age": _i,
+    }
+
+
+def make_deep_embedded(depth=4, width=5):
+    """ Return a resource embedding `width` resources on `depth` levels. """
+    def level(n):
+        document = {"_links": {"self": {"href": "/level/%i" % n}}, "level": n}
+        if n < depth:
+            document["_embedded"] = {"children": [level(n + 1) for _ in range(width)]}
+        return document
+    return level(0)
+
+
+@benchmark("resource.small")
+def resource_small():
+    payload = ROUTES["/people/1"]
+    return lambda: habu.Resource(payload, lazy=False)
+
+
+@benchmark("resource.collection[20]")
+def resource_collection():
+    payload = ROUTES["/people"]
+    return lambda: habu.Resource(payload, lazy=False)
+
+
+@benchmark("resource.many_links[1000]")
+def resource_many_links():
+    payload = make_links_payload(1000)
+    return lambda: habu.Resource(payload, lazy=False)
+
+
+@benchmark("resource.many_links_trusted[1000]")
+def resource_many_links_trusted():
+    payload = make_links_payload(1000)
+    return lambda: habu.Resource(payload, lazy=False, strict=False)
+
+
+@benchmark("resource.deep_embedded[781]")
+def resource_deep_embedded():
+    payload = make_deep_embedded()
+    return lambda: habu.Resource(payload, lazy=False)
+
+
+@benchmark("resource.huge[10000]")
+def resource_huge():
+    payload = make_collection_payload(10000)
+    return lambda: habu.Resource(payload, lazy=False)
+
+
+@benchmark("resource.huge_lazy[10000]")
+def resource_huge_lazy():
+    payload = make_collection_payload(10000)
+    return lambda: habu.Resource(payload, lazy=True).total
+
+
+@benchmark("resource.loads[10000]")
+def resource_loads():
+    raw = json.dumps(make_collection_payload(10000)).encode("utf-8")
+    return lambda: habu.loads(raw)
+
+
+@benchmark("dictionary_wrapper.getattr")
+def dictionary_wrapper_getattr():
+    wrapper = habu.DictionaryWrapper({"a": {"b": {"c": 1}}})
+    return lambda: wrapper.a.b.c
+
+
+@benchmark("dictionary_wrapper.update")
+def dictionary_wrapper_update():
+    wrapper = habu.DictionaryWrapper({"a": 1})
+    update = {"name": "habu", "nested": {"x": [1, {"y": 2}]}, "n": 3}
+    return lambda: wrapper.update(update)
+
+
+@benchmark("traversal.example")
+def traversal_example():
+    habu.set_request_func(lambda uri, *args, **kwargs: ROUTES[uri])
+
+    def run():
+        api = habu.enter("/")
+        people = api.people()
+        for person in people.embedded.people:
+            person.links.self()
+        api.person(id=3)
+    return run
+
+
+def measure(func, repeat=5, min_time=0.2):
+    """ Return the loop count and the seconds per operation of every repeat. """
+    timer = timeit.Timer(func)
+    (number, elapsed) = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return (number, [t / number for t in timer.repeat(repeat=repeat, number=number)])
+
+
+def run(pattern="", repeat=5):
+    """ Run every benchmark whose name contains `pattern`, returning results. """
+    results = []
+    for name, setup in BENCHMARKS:
+        if pattern not in name:
+            continue
+        func = setup()
+        (number, timings) = measure(func, repeat=repeat)
+        results.append({
+            "name": name,
+            "number": number,
+            "best": min(timings),
+            "mean": statistics.mean(timings),
+            "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        })
+        print("%-40s %12.2f us" % (name, min(timings) * 1e6), file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--filter", default="", help="only run benchmarks containing this")
+    parser.add_argument("--repeat", type=int, default=5)
+    options = parser.parse_args(argv)
+
+    original_request_func = habu._request_func
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            results = run(options.filter, options.repeat)
+        finally:
+            habu._request_func = original_request_func
+
+    document = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "results": results,
+    }
+    output = json.dumps(document, indent=2)
+    if options.output:
+        with open(options.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
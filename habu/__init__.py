@@ -1,7 +1,27 @@
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import json
+import os
 import pprint
+import threading
+import time
 import warnings
 
+from habu import cache
+from habu import client
+from habu import decoding
+from habu import identity
+from habu import metrics
+from habu import policy
+from habu import singleflight
+from habu import streaming
 from habu import uri_parsing
+from habu.identity import IdentityMap
+from habu.metrics import add_listener, remove_listener
+from habu.policy import DeadlineExceeded, Policy
+from habu.response import Response, response_body
 
 
 def debug_request_func(uri, *args, **kwargs):
@@ -17,16 +37,80 @@ def debug_request_func(uri, *args, **kwargs):
 
 
 _embedded_empty_list_fallback = True
+_lazy_resources = False
+_strict_parsing = True
 _request_func = None
+_async_request_func = None
+_cache = None
+_single_flight = None
+_policy = None
+_identity_map = None
+_rel_policies = {}
+_entry_cache_ttl = None
+_entry_cache = {}
+_entry_cache_lock = threading.Lock()
+_curie_registry = None
+
+# Below this many embedded resources, `parse_parallel` parses serially. No
+# crossover has been measured: in benchmarks/bench_parallel.py, unpickling
+# the results alone costs more than parsing serially. The value is only a
+# floor below which parallel parsing is not even attempted; measure on the
+# target host before relying on parallel parsing above it.
+parallel_threshold = 2000
 
 
 def use_missing_embedded_fallback(bool_=True):
     """ Enable returning a list if accessing a missing embedded resource. """
     if not isinstance(bool_, bool):
         raise TypeError("'%s' must be a bool" % bool_.__class__.__name__)
+    global _embedded_empty_list_fallback
     _embedded_empty_list_fallback = bool_
 
 
+def use_lazy_resources(bool_=True):
+    """ Enable deferring the parsing of links and embedded resources.
+
+    When enabled, new Resource instances only unserialize their state up
+    front. Their `_links` and `_embedded` objects are kept as-is until the
+    `links` or `embedded` containers are first accessed, and each type of
+    embedded resource is only turned into Resource instances when accessed.
+    Nested dictionaries in the state are only wrapped when accessed, see
+    `LazyDictionaryWrapper`.
+    """
+    if not isinstance(bool_, bool):
+        raise TypeError("'%s' must be a bool" % bool_.__class__.__name__)
+    global _lazy_resources
+    _lazy_resources = bool_
+
+
+def use_strict_parsing(bool_=True):
+    """ Choose between validating and trusted parsing of HAL+JSON documents.
+
+    Strict parsing, the default, validates documents as they are parsed and
+    warns about anything unexpected, such as unknown Link attributes. For
+    trusted payloads, disabling it selects a fast path which skips these
+    checks and warnings. It may also be chosen per Resource, see `Resource`.
+    """
+    if not isinstance(bool_, bool):
+        raise TypeError("'%s' must be a bool" % bool_.__class__.__name__)
+    global _strict_parsing
+    _strict_parsing = bool_
+
+
+def set_curie_registry(registry):
+    """ Set the CurieRegistry sharing CURIEs between parsed resources.
+
+    With a registry, identical CURIE declarations are unserialized once and
+    their documentation Links are shared by every parsed resource. Use a
+    new `CurieRegistry` per traversal to scope sharing. By default, and
+    after passing `None`, every resource has its own CURIEs.
+    """
+    if registry is not None and not isinstance(registry, CurieRegistry):
+        raise TypeError("'%s' must be a CurieRegistry" % registry.__class__.__name__)
+    global _curie_registry
+    _curie_registry = registry
+
+
 def set_request_func(callable_):
     """ Set the function to use when executing Link HTTP requests.
 
@@ -43,6 +127,225 @@ def set_request_func(callable_):
     _request_func  = callable_
 
 
+def set_json_decoder(callable_):
+    """ Set the function used to decode raw JSON returned by request functions.
+
+    Request functions may return the raw response body as bytes or str
+    instead of a decoded dictionary, which habu then decodes itself. By
+    default `orjson` or `ujson` is used when installed, otherwise the
+    standard library `json` module. Pass `None` to restore the default.
+    """
+    if callable_ is None:
+        callable_ = decoding.default_decoder()
+    if not callable(callable_):
+        raise TypeError("'%s' must be callable" % callable_.__class__.__name__)
+    decoding.decoder = callable_
+
+
+def set_async_request_func(callable_):
+    """ Set the coroutine function to use when awaiting Link HTTP requests.
+
+    This is the asynchronous counterpart to `set_request_func`, used by
+    `Link.acall` and `aenter`. The function is called with the same arguments
+    as the synchronous request function, and must return an awaitable which
+    resolves to the decoded response dictionary.
+    """
+    if not callable(callable_):
+        raise TypeError("'%s' must be callable" % callable_.__class__.__name__)
+    global _async_request_func
+    _async_request_func = callable_
+
+
+def set_cache(cache_):
+    """ Set the response cache used beneath Link calls and `enter`.
+
+    The cache must be a `habu.cache.BaseCache` instance, such as a
+    `MemoryCache` or `SqliteCache`. Pass `None` to disable caching.
+    """
+    if cache_ is not None and not isinstance(cache_, cache.BaseCache):
+        raise TypeError("'%s' must be a BaseCache" % cache_.__class__.__name__)
+    global _cache
+    _cache = cache_
+
+
+def use_entry_cache(ttl=300):
+    """ Enable memoizing the LinkContainer returned by `enter` for each URI.
+
+    While enabled, `enter` and `aenter` return the same LinkContainer for a
+    URI for `ttl` seconds, without performing a request or parsing the
+    response again. Pass `None` to disable and empty the entry cache; the
+    response cache and identity map are left as they are.
+    See `invalidate` for discarding entries early.
+    """
+    if ttl is not None and (not isinstance(ttl, (int, float)) or ttl < 0):
+        raise ValueError("ttl must be a non-negative number or None")
+    global _entry_cache_ttl
+    _entry_cache_ttl = ttl
+    if ttl is None:
+        with _entry_cache_lock:
+            _entry_cache.clear()
+
+
+def invalidate(uri=None):
+    """ Discard the memoized entry point for a URI, or for every URI.
+
+    Any response cached for the URI by the cache set with `set_cache` is
+    discarded as well, so the next `enter` performs a fresh request.
+    """
+    with _entry_cache_lock:
+        if uri is None:
+            _entry_cache.clear()
+        else:
+            _entry_cache.pop(uri, None)
+
+    if isinstance(_identity_map, IdentityMap):
+        if uri is None:
+            _identity_map.clear()
+        else:
+            _identity_map.discard(uri)
+
+    if _cache is not None:
+        if uri is None:
+            _cache.clear()
+        else:
+            _cache.delete(cache.make_key(uri, (), {}))
+
+
+def use_single_flight(bool_=True):
+    """ Enable collapsing concurrent identical Link calls into one request.
+
+    While enabled, concurrent GET or HEAD Link calls for the same URI and
+    arguments, from threads or from coroutines on one event loop, perform a
+    single request. Every caller receives the same Resource instance, or
+    the same exception.
+    """
+    if not isinstance(bool_, bool):
+        raise TypeError("'%s' must be a bool" % bool_.__class__.__name__)
+    global _single_flight
+    _single_flight = singleflight.SingleFlight() if bool_ else None
+
+
+def use_identity_map(scope="response"):
+    """ Enable sharing one Resource between embedded copies of a resource.
+
+    With the "response" scope, each parsed response has its own IdentityMap:
+    resources embedded several times in it, identified by their
+    `_links.self.href`, are only built once and shared. An `IdentityMap`
+    instance may be given instead to share resources for a whole traversal;
+    Link calls to an href already in that map then return the mapped
+    Resource without a request. Pass `None` to disable.
+    """
+    if scope is not None and scope != "response" and not isinstance(scope, IdentityMap):
+        raise ValueError("scope must be 'response', an IdentityMap or None")
+    global _identity_map
+    _identity_map = scope
+
+
+def set_policy(policy_, rel=None):
+    """ Set the retry, timeout and hedging Policy applied to requests.
+
+    Without a `rel`, the policy applies to every request, including those
+    of `enter`. With a `rel`, it only applies to calls of Links with that
+    relation and takes precedence over the global policy. Pass `None` to
+    remove a policy. See `habu.policy.Policy` for the available rules.
+    """
+    if policy_ is not None and not isinstance(policy_, policy.Policy):
+        raise TypeError("'%s' must be a Policy" % policy_.__class__.__name__)
+    global _policy
+    if rel is None:
+        _policy = policy_
+    elif policy_ is None:
+        _rel_policies.pop(rel, None)
+    else:
+        _rel_policies[rel] = policy_
+
+
+def _policy_for(rel):
+    """ Internal function returning the Policy applying to a rel, if any. """
+    if _rel_policies and rel in _rel_policies:
+        return _rel_policies[rel]
+    return _policy
+
+
+def _request(uri, args, kwargs, rel=None, session=None):
+    """ Internal function performing a request through any configured cache. """
+    if session is None:
+        (request_func, cache_, policy_) = (_request_func, _cache, _policy_for(rel))
+    else:
+        (request_func, cache_, policy_) = (
+            session.request_func, session.cache, session.policy_for(rel)
+        )
+    if policy_ is not None:
+        request_func = policy_.wrap(request_func)
+
+    if not metrics.enabled:
+        if cache_ is None:
+            return response_body(request_func(uri, *args, **kwargs))
+        return cache_.fetch(request_func, uri, args, kwargs)
+
+    start = metrics.clock()
+    if cache_ is not None:
+        document = cache_.fetch(request_func, uri, args, kwargs)
+        metrics.emit("request", start, rel, uri)
+        return document
+
+    result = request_func(uri, *args, **kwargs)
+    metrics.emit("request", start, rel, uri)
+    start = metrics.clock()
+    document = response_body(result)
+    metrics.emit("decode", start, rel, uri)
+    return document
+
+
+async def _arequest(uri, args, kwargs, rel=None, session=None):
+    """ Internal function awaiting a request through any configured cache. """
+    if session is None:
+        (request_func, cache_, policy_) = (_async_request_func, _cache, _policy_for(rel))
+    else:
+        (request_func, cache_, policy_) = (
+            session.async_request_func, session.cache, session.policy_for(rel)
+        )
+    if policy_ is not None:
+        request_func = policy_.awrap(request_func)
+
+    if not metrics.enabled:
+        if cache_ is None:
+            return response_body(await request_func(uri, *args, **kwargs))
+        return await cache_.afetch(request_func, uri, args, kwargs)
+
+    start = metrics.clock()
+    if cache_ is not None:
+        document = await cache_.afetch(request_func, uri, args, kwargs)
+        metrics.emit("request", start, rel, uri)
+        return document
+
+    result = await request_func(uri, *args, **kwargs)
+    metrics.emit("request", start, rel, uri)
+    start = metrics.clock()
+    document = response_body(result)
+    metrics.emit("decode", start, rel, uri)
+    return document
+
+
+def _mapped_resource(uri, kwargs, session=None):
+    """ Internal function returning the Resource mapped to a URI, if any. """
+    identity_map = _identity_map if session is None else session.identity_map
+    if not isinstance(identity_map, IdentityMap) or not cache.is_cacheable(kwargs):
+        return None
+    return identity_map.get(uri)
+
+
+def _unserialize(func, document, rel, uri):
+    """ Internal function building a Resource or LinkContainer, timing it. """
+    if not metrics.enabled:
+        return func(document)
+
+    start = metrics.clock()
+    result = func(document)
+    metrics.emit("unserialize", start, rel, uri)
+    return result
+
+
 class Link(object):
     """ Represents a hyperlink to an accessible HAL resource.
 
@@ -62,11 +365,13 @@ class Link(object):
     reach a specific resource.
 
     * `_documentation` - A Link instance generated from a CURIE template, if
-    available.
+    available. It is only generated when first accessed.
+
+    * `_rel` - The relation type this link was unserialized under, without
+    any CURIE prefix.
 
-    * `_rel` - Text which is either the `name` attribute of the
-    current instance if the instance was unserialized from a list, or otherwise
-    the key attribute which was the parent to this link during unserialization.
+    * `_session` - The Session the Link was parsed by, whose request function
+    and options are used when calling it. `None` uses the module-level ones.
 
     * `deprecation` - An optional attribute. Any value other than `None`
     indicates that link is considered decrepet by the origniating source.
@@ -96,9 +401,23 @@ class Link(object):
     the media type expected when dereferencing the target resource.
 
     """
+    # The attributes which are unserialized and returned by `as_dict`.
+    _fields = (
+        "_documentation", "_rel", "deprecation", "href", "hreflang", "name",
+        "profile", "templated", "title", "type",
+    )
+    # Links are plentiful, so they use slots rather than a per-instance dict.
+    # `_curie` and `_resolved` back the lazily generated `_documentation`.
+    __slots__ = ("_curie", "_resolved", "_session") + _fields[1:]
+
     def __init__(self):
         """ Initialize a new instance using sane defaults. """
-        self._documentation = None
+        if metrics.enabled:
+            metrics.count("links")
+
+        self._curie = None
+        self._resolved = None
+        self._session = None
         self._rel = ""
 
         self.deprecation = None
@@ -110,6 +429,18 @@ class Link(object):
         self.title = ""
         self.type = "application/hal+json"
 
+    @property
+    def _documentation(self):
+        """ The documentation Link generated from the Link's CURIE, if any. """
+        if self._resolved is None and self._curie is not None:
+            self._resolved = self._curie.documentation(self)
+        return self._resolved
+
+    @_documentation.setter
+    def _documentation(self, link):
+        self._curie = None
+        self._resolved = link
+
     def __call__(self, *args, **kwargs):
         """ Call the Link to attempt to retrieve its hyperlinked resource.
 
@@ -121,20 +452,135 @@ class Link(object):
         callable `_request_func` module variable. See `set_request_func` for
         further information.
         """
-        if not _request_func:
+        session = self._session
+        if not (_request_func if session is None else session.request_func):
             raise RuntimeError(
                 "Must set a request function using 'set_request_func'"
             )
 
-        uri = self.href
-        if self.templated:
-            (uri, args, kwargs) = uri_parsing.parse_uri(self.href, *args, **kwargs)
+        (uri, args, kwargs) = self._expand(args, kwargs)
+        flight = _single_flight if session is None else session.single_flight
+        if flight is None or not cache.is_cacheable(kwargs):
+            return self._fetch(uri, args, kwargs)
 
-        result = _request_func(uri, *args, **kwargs)
-        return Resource(result)
+        return flight.do(
+            cache.make_key(uri, args, kwargs),
+            lambda: self._fetch(uri, args, kwargs)
+        )
 
-    def unserialize(self, dict_):
-        """ Unserialize a dictionary object into the current Link's attributes. """
+    async def acall(self, *args, **kwargs):
+        """ Await the Link to retrieve its hyperlinked resource.
+
+        Behaves exactly like calling the Link, except that the request is
+        performed by awaiting the `_async_request_func` module variable.
+        See `set_async_request_func` for further information.
+        """
+        session = self._session
+        if not (_async_request_func if session is None else session.async_request_func):
+            raise RuntimeError(
+                "Must set an async request function using 'set_async_request_func'"
+            )
+
+        (uri, args, kwargs) = self._expand(args, kwargs)
+        flight = _single_flight if session is None else session.single_flight
+        if flight is None or not cache.is_cacheable(kwargs):
+            return await self._afetch(uri, args, kwargs)
+
+        return await flight.ado(
+            cache.make_key(uri, args, kwargs),
+            lambda: self._afetch(uri, args, kwargs)
+        )
+
+    def _fetch(self, uri, args, kwargs):
+        """ Internal method requesting an expanded URI, returning a Resource. """
+        resource = _mapped_resource(uri, kwargs, self._session)
+        if resource is not None:
+            return resource
+
+        document = _request(uri, args, kwargs, self._rel, self._session)
+        return _unserialize(self._resource_factory(), document, self._rel, uri)
+
+    async def _afetch(self, uri, args, kwargs):
+        """ Internal method awaiting an expanded URI, returning a Resource. """
+        resource = _mapped_resource(uri, kwargs, self._session)
+        if resource is not None:
+            return resource
+
+        document = await _arequest(uri, args, kwargs, self._rel, self._session)
+        return _unserialize(self._resource_factory(), document, self._rel, uri)
+
+    def _resource_factory(self):
+        """ Internal method returning the callable building a response Resource. """
+        if self._session is None:
+            return Resource
+        return functools.partial(Resource, session=self._session)
+
+    def stream(self, rel, *args, **kwargs):
+        """ Call the Link, yielding its embedded Resources of type `rel`.
+
+        Rather than a decoded dictionary, the request function must return
+        the raw response body as bytes, a file-like object or an iterable of
+        chunks. The body is parsed incrementally, see `iter_embedded`.
+        Request functions created by `habu.client.make_request_func` are
+        called with `stream=True` to do so. Responses are never cached.
+        """
+        request_func = _request_func if self._session is None else self._session.request_func
+        if not request_func:
+            raise RuntimeError(
+                "Must set a request function using 'set_request_func'"
+            )
+
+        (uri, args, kwargs) = self._expand(args, kwargs)
+        if getattr(request_func, "supports_stream", False):
+            kwargs.setdefault("stream", True)
+        body = response_body(request_func(uri, *args, **kwargs), decode=False)
+        if isinstance(body, (dict, list)):
+            raise TypeError(
+                "request function returned a decoded '%s' for '%s'; streaming "
+                "requires the raw response body" % (body.__class__.__name__, uri)
+            )
+        return iter_embedded(body, rel, session=self._session)
+
+    def _expand(self, args, kwargs):
+        """ Internal method returning the URI to request, and unused args/kwargs. """
+        if not self.templated:
+            return (self.href, args, kwargs)
+        if not metrics.enabled:
+            return uri_parsing.parse_uri(self.href, *args, **kwargs)
+
+        start = metrics.clock()
+        result = uri_parsing.parse_uri(self.href, *args, **kwargs)
+        metrics.emit("expand", start, self._rel, self.href)
+        return result
+
+    def expand_many(self, rows):
+        """ Yield the expanded URI of the Link for every row of arguments.
+
+        `rows` is either an iterable of keyword-argument dictionaries or a
+        dictionary of equal-length sequences. The template is only parsed
+        once for the whole batch. No requests are performed.
+        """
+        if not self.templated:
+            if isinstance(rows, dict):
+                rows = zip(*rows.values())
+            for _ in rows:
+                yield self.href
+            return
+
+        for uri in uri_parsing.expand_batch(self.href, rows):
+            yield uri
+
+    def unserialize(self, dict_, strict=True):
+        """ Unserialize a dictionary object into the current Link's attributes.
+
+        When `strict` is `False` the dictionary is trusted: no validation is
+        performed, no warnings are issued and unknown attributes are ignored.
+        """
+        if not strict:
+            for key, val in dict_.items():
+                if key in _link_attributes:
+                    setattr(self, key, val)
+            return
 
         # Must be a dictionary. Otherwise error.
         if not isinstance(dict_, dict):
@@ -145,8 +591,8 @@ class Link(object):
             warnings.warn("missing HREF attribute in Link")
 
         for key, val in dict_.items():
-            if key in self.__dict__:
-                self.__dict__[key] = val
+            if key in _link_attributes:
+                setattr(self, key, val)
             else:
                 # An attribute is present in the dictionary that does not match
                 # any available properties of the Link. Warn the user.
@@ -159,9 +605,22 @@ class Link(object):
                 "link rel '%s' has been deprecated; use at own risk" % self._rel
             )
 
+    def __getstate__(self):
+        """ Return the state to pickle, leaving out the process-local Session. """
+        state = dict((key, getattr(self, key)) for key in Link.__slots__)
+        state["_session"] = None
+        return (None, state)
+
+    def as_dict(self):
+        """ Return the attributes of the current Link as a dictionary. """
+        return dict((key, getattr(self, key)) for key in Link._fields)
+
     def __str__(self):
         """ Represent the current Link as a string. """
-        return "Link(" + pprint.pformat(self.__dict__) + ")"
+        return "Link(" + pprint.pformat(self.as_dict()) + ")"
+
+
+_link_attributes = frozenset(Link._fields)
 
 
 class CURIE(Link):
@@ -171,8 +630,14 @@ class CURIE(Link):
     for more information. Used internally for generating Link instances which
     populate the `_documentation` attribute of received Links.
     """
+    __slots__ = ("_registry",)
+
+    def __init__(self):
+        """ Initialize a new instance using sane defaults. """
+        super(CURIE, self).__init__()
+        self._registry = None
 
-    def resolve(self, link):
+    def resolve(self, link, strict=True):
         """ Return a new Link to documentation for the provided Link.
 
         Create and return a new Link instance. It is populated with a `href`
@@ -180,14 +645,117 @@ class CURIE(Link):
         using information from the Link parameter.
         """
         l = Link()
-        l.unserialize(self.__dict__)
+        if strict:
+            l.unserialize(self.as_dict(), strict=strict)
+        else:
+            for key in _curie_copied_fields:
+                setattr(l, key, getattr(self, key))
 
+        l._session = link._session
         l.href = l.href.replace("{rel}", link._rel)
         l.templated = False
         l.name = "%s:%s" % (self.name, link._rel)
 
         return l
 
+    def __getstate__(self):
+        """ Return the state to pickle, leaving out the CurieRegistry. """
+        (_, state) = super(CURIE, self).__getstate__()
+        state["_registry"] = None
+        return (None, state)
+
+    def documentation(self, link):
+        """ Return the documentation Link for the provided Link.
+
+        When the CURIE was shared through a `CurieRegistry`, the documentation
+        Link is interned in it and shared by every Link of the same relation.
+        """
+        if self._registry is None:
+            return self.resolve(link, strict=False)
+        return self._registry.documentation(self, link)
+
+
+_curie_copied_fields = Link._fields[1:]
+
+
+class CurieRegistry(object):
+    """ Shares identical CURIEs and their documentation Links between resources.
+
+    CURIEs are keyed by their `(name, href)` and whether they were parsed
+    strictly, so a CURIE declared by many resources is only unserialized
+    once, and the documentation Link of each relation is only generated once.
+    Other attributes of a CURIE, such as its `title`, are taken from its first
+    declaration. Shared Links must not be modified. At most `maxsize` CURIEs
+    and documentation Links are kept, the least recently used are discarded
+    first. Documentation Links of a Session are kept by the Session itself,
+    so the registry never keeps a Session alive.
+    """
+
+    def __init__(self, maxsize=1024):
+        """ Initialize an empty registry. """
+        self.maxsize = maxsize
+        self._curies = collections.OrderedDict()
+        self._documentation = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._curies)
+
+    def get(self, name, href, strict=True):
+        """ Return the registered CURIE for `(name, href)`, or `None`.
+
+        A CURIE parsed with another `strict` setting is never returned, so
+        trusted parsing never bypasses the validation of strict parsing.
+        """
+        key = (name, href, strict)
+        with self._lock:
+            curie = self._curies.get(key)
+            if curie is not None:
+                self._curies.move_to_end(key)
+            return curie
+
+    def add(self, curie, strict=True):
+        """ Register a CURIE, returning the one registered for its key. """
+        key = (curie.name, curie.href, strict)
+        with self._lock:
+            curie = self._curies.setdefault(key, curie)
+            curie._registry = self
+            while len(self._curies) > self.maxsize:
+                self._curies.popitem(last=False)
+            return curie
+
+    def documentation(self, curie, link):
+        """ Return the interned documentation Link of a CURIE for a Link.
+
+        Documentation Links carry the Session of the Link they were resolved
+        for, so they are only shared between Links of the same Session.
+        """
+        key = (curie, link._rel)
+        session = link._session
+        store = self._documentation if session is None else session._curie_documentation
+        with self._lock:
+            documentation = store.get(key)
+            if documentation is not None:
+                store.move_to_end(key)
+                return documentation
+
+        documentation = curie.resolve(link, strict=False)
+        with self._lock:
+            documentation = store.setdefault(key, documentation)
+            while len(store) > self.maxsize:
+                store.popitem(last=False)
+        return documentation
+
+    def clear(self):
+        """ Discard every registered CURIE and documentation Link.
+
+        Documentation Links kept by Sessions are discarded with the Sessions.
+        """
+        with self._lock:
+            self._curies.clear()
+            self._documentation.clear()
+
+
 
 class LinkContainer(object):
     """ A in-memory container for a grouping of Link and CURIE instances.
@@ -197,14 +765,61 @@ class LinkContainer(object):
     application/HAL+JSON document. It is used to as a proxy between a Resource
     and its related Links/CURIEs.
 
+    Every Link of a relation is kept, in document order, and indexed by its
+    relation with and without a CURIE prefix, its `name` and its `profile`.
+    Accessing a relation as an attribute returns its first Link, while
+    `get_all`, `by_name` and `by_profile` allow selecting among several.
+
     This structure is analogous to the `_link` object present in an
     application/HAL+JSON document.
     """
 
-    def __init__(self):
-        """ Populate the instance with Link and CURIE dictionaries. """
+    def __init__(self, strict=None, session=None):
+        """ Populate the instance with Link and CURIE dictionaries.
+
+        `strict` chooses validated or trusted parsing of links, defaulting to
+        the setting of the `session`, or the one chosen with
+        `use_strict_parsing`. Parsed Links carry the `session`.
+        """
+        if strict is None:
+            strict = _strict_parsing if session is None else session.strict
+        registry = _curie_registry if session is None else session.curie_registry
+        super(LinkContainer, self).__setattr__("_strict", strict)
+        super(LinkContainer, self).__setattr__("_session", session)
         super(LinkContainer, self).__setattr__("_links", {})
         super(LinkContainer, self).__setattr__("_curies", {})
+        super(LinkContainer, self).__setattr__("_registry", registry)
+        super(LinkContainer, self).__setattr__("_rels", {})
+        super(LinkContainer, self).__setattr__("_names", {})
+        super(LinkContainer, self).__setattr__("_rel_names", {})
+        super(LinkContainer, self).__setattr__("_profiles", {})
+        super(LinkContainer, self).__setattr__("_pending", None)
+        super(LinkContainer, self).__setattr__("_lock", threading.RLock())
+
+    def unserialize_all(self, links):
+        """ Unserialize every link relation of a `_links` object.
+
+        CURIEs are unserialized first, so they are available when resolving
+        documentation for the other links.
+        """
+        if "curies" in links:
+            self.unserialize("curies", links["curies"])
+        for name, obj in links.items():
+            if name != "curies":
+                self.unserialize(name, obj)
+
+    def defer(self, links):
+        """ Keep a `_links` object to be unserialized on first access. """
+        super(LinkContainer, self).__setattr__("_pending", links)
+
+    def _materialize(self):
+        """ Internal method unserializing any deferred `_links` object. """
+        if self._pending is None:
+            return
+        with self._lock:
+            if self._pending is not None:
+                self.unserialize_all(self._pending)
+                super(LinkContainer, self).__setattr__("_pending", None)
 
     def unserialize(self, name, obj):
         """ Unserializes lists or dictionaries of Link objects. """
@@ -226,13 +841,20 @@ class LinkContainer(object):
         # CURIE instances instead of normal Link instances.
         if name == "curies":
             for curie_dict in list_:
+                # An identical CURIE was already unserialized, and validated
+                # when parsing strictly, for another resource. Share it.
+                if self._registry is not None and isinstance(curie_dict, dict):
+                    c = self._registry.get(
+                        curie_dict.get("name"), curie_dict.get("href"), self._strict
+                    )
+                    if c is not None:
+                        self._curies[c.name] = c
+                        continue
+
                 # While HAL does not require a Link document to have a `name`
-                # attribute, WE do. If we have a `list` of CURIEs, the only
-                # way to specify a CURIE to use is by its name.
-                # TODO: Change this. Instead of inserting it as a key-value
-                # entry, and thus requiring a `name` attribute, just append it
-                # to a list instead. Then no `name` is required. HAL compliant.if "name" not in curie_dict:
-                if "name" not in curie_dict:
+                # attribute, CURIEs do: a CURIE is selected by its name, using
+                # the prefix of a link relation.
+                if self._strict and "name" not in curie_dict:
                     # Must have a name. Raise an error.
                     raise ValueError(
                         "Cannot unserialize a CURIE that does not have a 'name'"
@@ -241,7 +863,7 @@ class LinkContainer(object):
                 # HAL does require all link documents to have a `href` attribute.
                 # A CURIE is completely useless with a `href`, so we raise an
                 # error if it does not have one.
-                if "href" not in curie_dict:
+                if self._strict and "href" not in curie_dict:
                     raise ValueError(
                         "Cannot unserialize a CURIE that does not have a 'href'"
                     )
@@ -249,65 +871,23 @@ class LinkContainer(object):
                 # It is not common to have a CURIE which does not include a
                 # URI template placeholder for `rel`. Warning the user
                 # if one is not present.
-                if "{rel}" not in curie_dict["href"]:
+                if self._strict and "{rel}" not in curie_dict["href"]:
                     warnings.warn(
                         "CURIE named: '%s' does not include a '{rel}' template element in HREF" % curie_dict["name"]
                     )
 
                 c = CURIE()
                 c._rel = "curies"
-                c.unserialize(curie_dict)
+                c.unserialize(curie_dict, strict=self._strict)
+                if self._registry is not None:
+                    c = self._registry.add(c, self._strict)
 
                 self._curies[c.name] = c
             return # nothing else to do. Return from the method.
 
-        # First, check if we have a CURIE specified in the name of the type
-        # of links we are dealing with.
-        if ":" not in name:
-            # Okay, no CURIE.
-            for link_dict in list_:
-
-                """
-                We are going to break convention from HAL. We REQUIRE all link
-                documents to include a `name` attribute if they exist in a list.
-                We require this because we need some identifier for each link
-                in order to store it in the internal `_links` dictionary.
-                """
-                # TODO: Change this. Instead of inserting it as a key-value
-                # entry, and thus requiring a `name` attribute, just append it
-                # to a list instead. Then no `name` is required. HAL compliant.
-                if "name" not in link_dict:
-                    raise ValueError(
-                        "Cannot unserialize a Link in a list that does not have a 'name'"
-                    )
-                l = Link()
-                l._rel = name
-                l.unserialize(link_dict)
-                self._links.append(l)
-            return # returning since we are done.
-
-        # If we get here, we MUST have a CURIE identifier in the name.
-        # Create the Link like normal, but also generate a documentation Link
-        # instance for it.
-        curie_name = ""
-        parts = name.split(":")
-        if len(parts) != 2:
-            raise ValueError(
-                "Invalid link relation curry syntax for '%s'" % name
-            )
-        curie_name = parts[0]
-        name = parts[1]
-
+        (curie_name, rel) = self._split_rel(name)
         for link_dict in list_:
-            l = Link()
-            l._rel = name
-            l.unserialize(obj)
-
-            if curie_name and curie_name in self._curies:
-                l._documentation = self._curies[curie_name].resolve(l)
-
-            self._links[name] = l
-
+            self._add(name, curie_name, rel, link_dict)
 
     def _extract_from_dict(self, name, obj):
         """ Internal function used to unserialize a dict of Link objects. """
@@ -320,35 +900,98 @@ class LinkContainer(object):
         if name == "curies":
             raise TypeError("CURIEs must be contained in a list, not a object")
 
-        # First, check if we have a CURIE specified in the name of the type
-        # of links we are dealing with.
-        curie_name = ""
-        if ":" in name:
-            parts = name.split(":")
-            if len(parts) != 2:
-                raise ValueError(
-                    "Invalid link relation curry syntax for '%s'" % name
-                )
-            curie_name = parts[0]
-            name = parts[1]
+        (curie_name, rel) = self._split_rel(name)
+        self._add(name, curie_name, rel, obj)
+
+    def _split_rel(self, name):
+        """ Internal function splitting a relation into its CURIE and rel. """
+        if ":" not in name:
+            return ("", name)
 
+        parts = name.split(":")
+        if len(parts) != 2:
+            raise ValueError(
+                "Invalid link relation curry syntax for '%s'" % name
+            )
+        return (parts[0], parts[1])
+
+    def _add(self, name, curie_name, rel, link_dict):
+        """ Internal function unserializing a Link and adding it to the indexes.
+
+        Documentation for a CURIE-prefixed Link is not generated here, the
+        Link only keeps its CURIE to generate it when first accessed.
+        """
         l = Link()
-        l._rel = name
-        l.unserialize(obj)
+        l._rel = rel
+        l._session = self._session
+        l.unserialize(link_dict, strict=self._strict)
+        if curie_name:
+            l._curie = self._curies.get(curie_name)
+
+        if rel not in self._links:
+            self._links[rel] = l
+        self._rels.setdefault(rel, []).append(l)
+        if name != rel:
+            self._rels.setdefault(name, []).append(l)
+
+        if l.name:
+            self._names.setdefault(l.name, l)
+            self._rel_names.setdefault((rel, l.name), l)
+        if l.profile:
+            self._profiles.setdefault(l.profile, []).append(l)
+
+    def get_all(self, rel):
+        """ Return a list of every Link of a relation, in document order.
+
+        The relation may be given with or without its CURIE prefix. An empty
+        list is returned for an unknown relation.
+        """
+        self._materialize()
+        return list(self._rels.get(rel, ()))
+
+    def by_name(self, name, rel=None, default=None):
+        """ Return the Link with a `name`, optionally within a relation.
+
+        Without a `rel`, the first Link with that name in any relation is
+        returned. `default` is returned when there is no such Link.
+        """
+        self._materialize()
+        if rel is None:
+            return self._names.get(name, default)
+        return self._rel_names.get((self._split_rel(rel)[1], name), default)
 
-        if curie_name and curie_name in self._curies:
-            l._documentation = self._curies[curie_name].resolve(l)
+    def by_profile(self, profile):
+        """ Return a list of every Link with a `profile`, in document order. """
+        self._materialize()
+        return list(self._profiles.get(profile, ()))
 
-        self._links[name] = l
+    def __contains__(self, rel):
+        """ Return bool indicating if a relation, with or without CURIE, exists. """
+        self._materialize()
+        return rel in self._rels
 
     def __getattr__(self, key):
         """ Allow for retrieving Link instances using property-access. """
+        if key.startswith("__"):
+            raise AttributeError(key)
+        self._materialize()
         if key not in self._links:
             raise AttributeError(key)
         return self._links[key]
 
+    def __getstate__(self):
+        """ Return the state to pickle, leaving out process-local objects. """
+        state = dict(self.__dict__, _session=None, _registry=None)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__["_lock"] = threading.RLock()
+
     def __str__(self):
         """ Represent the current LinkContainer as a string. """
+        self._materialize()
         return "LinkContainer(" + pprint.pformat(self._links) + ")"
 
 class ResourceContainer(object):
@@ -363,31 +1006,103 @@ class ResourceContainer(object):
     application/HAL+JSON document.
     """
 
-    def __init__(self):
-        """ Populate the instance with a Resource dictionary. """
+    def __init__(self, strict=None, identity_map=None, session=None):
+        """ Populate the instance with a Resource dictionary.
+
+        `strict` chooses validated or trusted parsing of the embedded
+        resources, defaulting to the setting of the `session`, or the one
+        chosen with `use_strict_parsing`.
+        """
+        if strict is None:
+            strict = _strict_parsing if session is None else session.strict
+        super(ResourceContainer, self).__setattr__("_strict", strict)
+        super(ResourceContainer, self).__setattr__("_identity_map", identity_map)
+        super(ResourceContainer, self).__setattr__("_session", session)
         super(ResourceContainer, self).__setattr__("_resources", {})
+        super(ResourceContainer, self).__setattr__("_pending", {})
+        super(ResourceContainer, self).__setattr__("_lock", threading.RLock())
+
+    def defer(self, name, list_):
+        """ Keep a list of embedded resources to be unserialized on access. """
+        self._pending[name] = list_
+
+    def _materialize(self, key):
+        """ Internal method unserializing a deferred type of resources. """
+        with self._lock:
+            if key in self._pending:
+                self._resources[key] = [
+                    _embedded_resource(
+                        res, True, self._strict, self._identity_map, self._session
+                    )
+                    for res in self._pending[key]
+                ]
+                del self._pending[key]
 
     def __getattr__(self, key):
         """ Allow for retrieving Resource instances using property-access. """
+        if key.startswith("__"):
+            raise AttributeError(key)
+        if key not in self._resources and key in self._pending:
+            self._materialize(key)
         if key not in self._resources:
             # If a specified type of resource cannot be found, what do we do?
             # If `_embedded_empty_list_fallback` is `True`, return an empty
             # list. Otherwise, raise an AttributeError.
-            if _embedded_empty_list_fallback:
+            if self._session is None:
+                fallback = _embedded_empty_list_fallback
+            else:
+                fallback = self._session.embedded_fallback
+            if fallback:
                 return []
             raise AttributeError(key)
         return self._resources[key]
 
+    def __getstate__(self):
+        """ Return the state to pickle, leaving out process-local objects. """
+        state = dict(self.__dict__, _session=None, _identity_map=None)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__["_lock"] = threading.RLock()
+
     def contains(self, key):
         """ Return bool indicating if key exists in current instance. """
         return key in self
 
+    def __contains__(self, key):
+        return key in self._resources or key in self._pending
+
     def resource_names(self):
         """ Return a list of all available resource types. """
-        return self._resources.keys()
+        return list(self._resources.keys()) + [
+            key for key in list(self._pending) if key not in self._resources
+        ]
+
+    def follow_all(self, key, rel, *args, max_workers=8, **kwargs):
+        """ Follow the `rel` Link of every embedded Resource of type `key`.
+
+        See `follow_all` for further information.
+        """
+        return follow_all(
+            getattr(self, key), rel, *args, max_workers=max_workers, **kwargs
+        )
+
+    async def afollow_all(self, key, rel, *args, max_concurrency=8, **kwargs):
+        """ Await the `rel` Link of every embedded Resource of type `key`.
+
+        See `afollow_all` for further information.
+        """
+        return await afollow_all(
+            getattr(self, key), rel, *args,
+            max_concurrency=max_concurrency, **kwargs
+        )
 
     def __str__(self):
         """ Represent the current ResourceContainer as a string. """
+        for key in list(self._pending):
+            self._materialize(key)
         return "ResourceContainer(" + pprint.pformat(self._resources) + ")"
 
 def _def_wrapper_recursion(val):
@@ -431,8 +1146,16 @@ class DictionaryWrapper(dict):
         super(DictionaryWrapper, self).__init__(*args, **kwargs)
 
     def __getattr__(self, key):
+        # Special attributes, looked up by pickle and copy, are never items.
+        if key.startswith("__"):
+            raise AttributeError(key)
         return super(DictionaryWrapper, self).__getitem__(key)
 
+    def __reduce__(self):
+        # Stored values are already wrapped, so unpickling copies them as-is
+        # rather than converting every item again through `__setitem__`.
+        return (_unpickle_wrapper, (self.__class__, dict(self)))
+
     def __setattr__(self, key, value):
         return super(DictionaryWrapper, self).__setitem__(
             key,
@@ -461,6 +1184,85 @@ class DictionaryWrapper(dict):
             self[key] = value
 
 
+def _unpickle_wrapper(cls, dict_):
+    """ Internal function rebuilding a pickled DictionaryWrapper. """
+    wrapper = dict.__new__(cls)
+    dict.update(wrapper, dict_)
+    return wrapper
+
+
+class _WrappedList(list):
+    """ Internal list of already wrapped values, stored by LazyDictionaryWrapper.
+
+    Its class tells it apart from a raw list, so it is never converted again.
+    """
+
+
+def _lazy_wrapper(val):
+    """ Wrap a dict, list or tuple for LazyDictionaryWrapper without recursing. """
+    if val.__class__ is dict:
+        return LazyDictionaryWrapper(val)
+    return _WrappedList(
+        _lazy_wrapper(e) if e.__class__ in (dict, list, tuple) else e
+        for e in val
+    )
+
+
+class LazyDictionaryWrapper(DictionaryWrapper):
+    """A DictionaryWrapper which wraps nested values when they are accessed.
+
+    Rather than converting every nested dictionary up front, values are
+    stored as provided. A nested dict (or a list/tuple containing dicts) is
+    only converted when it is read using item or dot-notation access, and the
+    converted value replaces the stored one so it is only converted once.
+
+    Each conversion makes a shallow copy, so modifying the wrapper never
+    modifies the dictionaries it was created from. Note that `items`,
+    `values` and iteration return stored values, which may not be wrapped yet.
+    """
+
+    def __init__(self, dict_=None):
+        if not dict_:
+            return
+
+        if not isinstance(dict_, dict):
+            raise TypeError('\'dict_\' is not a dict')
+
+        dict.update(self, dict_)
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if value.__class__ in (dict, list, tuple):
+            value = _lazy_wrapper(value)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def __getattr__(self, key):
+        if key.startswith("__"):
+            raise AttributeError(key)
+        return self[key]
+
+    def get(self, key, default=None):
+        """ Return the wrapped value for key if key is present, else default. """
+        if key in self:
+            return self[key]
+        return default
+
+    def __setattr__(self, key, value):
+        dict.__setitem__(self, key, value)
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+
+    def update(self, dict_):
+        """ Override default `update` method to store values unconverted. """
+        if not isinstance(dict_, dict):
+            raise TypeError(
+                "'%s' object is not iterable" % dict_.__class__.__name__
+            )
+        dict.update(self, dict_)
+
+
 class Resource(object):
     """ A representation of a HAL+JSON resource document.
 
@@ -479,38 +1281,87 @@ class Resource(object):
     """
 
 
-    def __init__(self, dict_=None):
-        """ Initialize the current instance and its attributes. """
+    def __init__(self, dict_=None, lazy=None, strict=None, identity_map=None, session=None):
+        """ Initialize the current instance and its attributes.
+
+        When `lazy` is `True`, links and embedded resources are only
+        unserialized once accessed, and the state is a LazyDictionaryWrapper.
+        It defaults to the setting chosen with `use_lazy_resources`.
+
+        When `strict` is `False`, the dictionary is trusted and parsed without
+        validation or warnings. It defaults to the setting chosen with
+        `use_strict_parsing`.
+
+        `identity_map` is the IdentityMap used to share embedded resources,
+        defaulting to the scope chosen with `use_identity_map`.
+
+        With a `session`, the Resource and its Links use the request function
+        and options of that Session, including its defaults for the settings
+        above, instead of the module-level ones.
+        """
         if dict_ and not isinstance(dict_, dict):
             raise TypeError("'%s' must be a dict" % dict_.__class__.__name__)
 
-        super(Resource, self).__setattr__("links", LinkContainer())
-        super(Resource, self).__setattr__("embedded", ResourceContainer())
-        super(Resource, self).__setattr__("_state", DictionaryWrapper())
+        if metrics.enabled:
+            metrics.count("resources")
+
+        if session is None:
+            (default_lazy, default_strict, scope) = (_lazy_resources, _strict_parsing, _identity_map)
+        else:
+            (default_lazy, default_strict, scope) = (session.lazy, session.strict, session.identity_map)
+        if lazy is None:
+            lazy = default_lazy
+        if strict is None:
+            strict = default_strict
+        if identity_map is None and scope is not None:
+            identity_map = IdentityMap() if scope == "response" else scope
+
+        super(Resource, self).__setattr__("links", LinkContainer(strict, session))
+        super(Resource, self).__setattr__(
+            "embedded", ResourceContainer(strict, identity_map, session)
+        )
+        super(Resource, self).__setattr__(
+            "_state", LazyDictionaryWrapper() if lazy else DictionaryWrapper()
+        )
+        super(Resource, self).__setattr__("_lazy", lazy)
+        super(Resource, self).__setattr__("_strict", strict)
+        super(Resource, self).__setattr__("_identity_map", identity_map)
+        super(Resource, self).__setattr__("_session", session)
 
         if dict_:
+            if identity_map is not None:
+                href = identity.self_href(dict_)
+                if href is not None:
+                    identity_map.add(href, self)
             self.unserialize(dict_)
 
     def unserialize(self, dict_):
         """ Unserialize a dictionary into the current Resource. """
         for key, value in dict_.items():
             if key == "_links":
-                if not isinstance(value, dict):
+                if self._strict and not isinstance(value, dict):
                     raise TypeError(
                         "'%s' must be a dict" % value.__class__.__name__
                     )
-                if "curies" in value:
-                    self.links.unserialize("curies", value["curies"])
-                    value.pop("curies", None)
-                for name, obj in value.items():
-                    self.links.unserialize(name, obj)
+                if self._lazy:
+                    self.links.defer(value)
+                else:
+                    self.links.unserialize_all(value)
             elif key == "_embedded":
-                if not isinstance(value, dict):
+                if self._strict and not isinstance(value, dict):
                     raise TypeError(
                         "'%s' must be a dict" % value.__class__.__name__
                     )
                 for name, list_ in value.items():
-                    self.embedded._resources[name] = [Resource(res) for res in list_]
+                    if self._lazy:
+                        self.embedded.defer(name, list_)
+                    else:
+                        self.embedded._resources[name] = [
+                            _embedded_resource(
+                                res, False, self._strict, self._identity_map, self._session
+                            )
+                            for res in list_
+                        ]
             else:
                 self._state[key] = value
 
@@ -531,10 +1382,14 @@ class Resource(object):
         if partial:
             self._state.update(dict_)
         else:
-            self._state = DictionaryWrapper(dict_)
+            super(Resource, self).__setattr__(
+                "_state", self._state.__class__(dict_)
+            )
 
     def __getattr__(self, key):
         """ Get a attribute from the internal state. """
+        if key.startswith("__"):
+            raise AttributeError(key)
         if key not in self._state:
             raise AttributeError(key)
         return self._state[key]
@@ -545,6 +1400,17 @@ class Resource(object):
             raise AttributeError(key)
         self._state[key] = value
 
+    def __getstate__(self):
+        """ Return the state to pickle, leaving out process-local objects.
+
+        The Session and IdentityMap hold locks and only make sense in the
+        process that created them, so an unpickled Resource has neither.
+        """
+        return dict(self.__dict__, _session=None, _identity_map=None)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
     def __str__(self):
         """ Represent the current Resource as a string. """
         dict_ = {
@@ -556,15 +1422,535 @@ class Resource(object):
         return "Resource(" + pprint.pformat(dict_) + ")"
 
 
+def _embedded_resource(dict_, lazy, strict, identity_map, session):
+    """ Internal function building an embedded Resource, or sharing a mapped one. """
+    if identity_map is not None:
+        href = identity.self_href(dict_)
+        if href is not None:
+            resource = identity_map.get(href)
+            if resource is not None:
+                return resource
+    return Resource(
+        dict_, lazy=lazy, strict=strict, identity_map=identity_map, session=session
+    )
+
+
+def follow_all(resources, rel, *args, max_workers=8, **kwargs):
+    """ Call the `rel` Link of many Resources concurrently, using threads.
+
+    At most `max_workers` requests are in flight at once. Any positional or
+    keyword arguments are passed to every Link call.
+
+    Returns a list in the same order as `resources`. Each element is either
+    the retrieved Resource or, if following the link failed, the exception
+    which was raised. A failure never aborts the rest of the batch.
+    """
+    if not isinstance(max_workers, int) or max_workers < 1:
+        raise ValueError("max_workers must be a positive integer")
+
+    def follow(resource):
+        try:
+            return getattr(resource.links, rel)(*args, **kwargs)
+        except Exception as e:
+            return e
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(follow, resources))
+
+
+async def afollow_all(resources, rel, *args, max_concurrency=8, **kwargs):
+    """ Await the `rel` Link of many Resources concurrently.
+
+    The asynchronous counterpart to `follow_all`, bounded by an asyncio
+    semaphore of `max_concurrency` and using `Link.acall`.
+    """
+    if not isinstance(max_concurrency, int) or max_concurrency < 1:
+        raise ValueError("max_concurrency must be a positive integer")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def follow(resource):
+        async with semaphore:
+            try:
+                return await getattr(resource.links, rel).acall(*args, **kwargs)
+            except Exception as e:
+                return e
+
+    return await asyncio.gather(*[follow(r) for r in resources])
+
+
+def hal_hook(pairs):
+    """ Build habu objects while decoding JSON, for `object_pairs_hook`.
+
+    Use as `json.loads(data, object_pairs_hook=habu.hal_hook)`. Every JSON
+    object containing `_links` or `_embedded` is built into a Resource, with
+    Link instances and embedded Resources, and every other object into a
+    DictionaryWrapper. Nothing is copied or walked a second time after
+    decoding, unlike `Resource(json.loads(data))`, which produces the same
+    Resource tree for HAL documents.
+
+    Note that, as objects are built before their parent is known, an object
+    with `_links` or `_embedded` nested in the state of a resource is also
+    built into a Resource. Use `loads` to always get a Resource back, even for
+    a document without `_links` or `_embedded`.
+    """
+    wrapper = dict.__new__(DictionaryWrapper)
+    dict.update(wrapper, pairs)
+    if "_links" in wrapper or "_embedded" in wrapper:
+        return _hooked_resource(wrapper)
+    return wrapper
+
+
+def _hooked_resource(document):
+    """ Internal function building a Resource from a hooked JSON object. """
+    if not isinstance(document, dict):
+        raise TypeError("'%s' must be a dict" % document.__class__.__name__)
+
+    resource = Resource(lazy=False)
+    for key, value in document.items():
+        if key == "_links":
+            resource.links.unserialize_all(value)
+        elif key == "_embedded":
+            for name, items in value.items():
+                if not isinstance(items, list):
+                    items = [items]
+                resource.embedded._resources[name] = [
+                    item if isinstance(item, Resource) else _hooked_resource(item)
+                    for item in items
+                ]
+        else:
+            dict.__setitem__(resource._state, key, value)
+    return resource
+
+
+def loads(data):
+    """ Decode a HAL+JSON document, as bytes or str, directly into a Resource.
+
+    See `hal_hook`, which is used to build the Resource during decoding.
+    """
+    document = json.loads(data, object_pairs_hook=hal_hook)
+    if isinstance(document, Resource):
+        return document
+    return _hooked_resource(document)
+
+
+def paginate(link_or_resource, rel="items", max_pages=None, page_size=None, prefetch=True):
+    """ Yield the embedded Resources of type `rel` across pages of a collection.
+
+    Starting from a Link (which is called) or an already retrieved Resource,
+    each page's `next` Link is followed until there is none, or `max_pages`
+    pages have been read. When `page_size` is provided, it is passed as the
+    `page_size` keyword argument when calling the first Link, whose template
+    must then declare a `page_size` variable.
+
+    With `prefetch` enabled, the next page is requested in a background thread
+    while the items of the current page are being consumed.
+    """
+    if max_pages is not None and (not isinstance(max_pages, int) or max_pages < 1):
+        raise ValueError("max_pages must be a positive integer")
+
+    page = _first_page(link_or_resource, page_size)
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        pages = 1
+        while page is not None:
+            next_link = None
+            if max_pages is None or pages < max_pages:
+                next_link = getattr(page.links, "next", None)
+
+            future = None
+            if next_link is not None and pool is not None:
+                future = pool.submit(next_link)
+
+            for item in getattr(page.embedded, rel):
+                yield item
+
+            if next_link is None:
+                page = None
+            elif future is not None:
+                page = future.result()
+            else:
+                page = next_link()
+            pages += 1
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def apaginate(link_or_resource, rel="items", max_pages=None, page_size=None, prefetch=True):
+    """ Asynchronously yield the embedded Resources of `rel` across pages.
+
+    The asynchronous counterpart to `paginate`, using `Link.acall`. With
+    `prefetch` enabled, the next page is requested in an asyncio task while
+    the items of the current page are being consumed.
+    """
+    if max_pages is not None and (not isinstance(max_pages, int) or max_pages < 1):
+        raise ValueError("max_pages must be a positive integer")
+
+    if isinstance(link_or_resource, Link):
+        page = await link_or_resource.acall(**_page_size_kwargs(link_or_resource, page_size))
+    else:
+        page = _first_page(link_or_resource, page_size)
+
+    task = None
+    try:
+        pages = 1
+        while page is not None:
+            next_link = None
+            if max_pages is None or pages < max_pages:
+                next_link = getattr(page.links, "next", None)
+
+            if next_link is not None and prefetch:
+                task = asyncio.ensure_future(next_link.acall())
+
+            for item in getattr(page.embedded, rel):
+                yield item
+
+            if next_link is None:
+                page = None
+            elif task is not None:
+                page = await task
+                task = None
+            else:
+                page = await next_link.acall()
+            pages += 1
+    finally:
+        if task is not None:
+            task.cancel()
+
+
+def _first_page(link_or_resource, page_size):
+    """ Internal function returning the first page of a paginated collection. """
+    if isinstance(link_or_resource, Resource):
+        return link_or_resource
+    if isinstance(link_or_resource, Link):
+        return link_or_resource(**_page_size_kwargs(link_or_resource, page_size))
+    raise TypeError(
+        "'%s' must be a Link or a Resource" % link_or_resource.__class__.__name__
+    )
+
+
+def _page_size_kwargs(link, page_size):
+    """ Internal function returning the kwargs passing `page_size` to a Link.
+
+    Only a templated Link declaring a `page_size` variable consumes it; any
+    other Link would pass it on to the request function.
+    """
+    if page_size is None:
+        return {}
+    variables = uri_parsing.compile_template(link.href).variables if link.templated else []
+    if "page_size" not in variables:
+        raise ValueError(
+            "cannot pass page_size to '%s', which has no 'page_size' template variable"
+            % link.href
+        )
+    return {"page_size": page_size}
+
+
+def iter_embedded(stream, rel, chunk_size=streaming.default_chunk_size, lazy=None, session=None):
+    """ Yield the embedded Resources of type `rel` from a HAL+JSON stream.
+
+    The stream may be bytes, a str, a file-like object or an iterable of
+    bytes/str chunks. It is parsed incrementally, and each embedded resource
+    is yielded as soon as it has been read, so memory use does not grow with
+    the size of the document. The rest of the document is skipped.
+    """
+    for item in streaming.iter_embedded_items(stream, rel, chunk_size):
+        yield Resource(item, lazy=lazy, session=session)
+
+
+def parse_parallel(payload, workers=None, threshold=None, executor=None, strict=None):
+    """ Parse a large HAL+JSON document, building embedded Resources in processes.
+
+    The `_embedded` arrays of `payload`, a dictionary or raw JSON, are split
+    into chunks which are parsed into Resources by a ProcessPoolExecutor of
+    `workers` processes, defaulting to one per CPU. They are then pickled
+    back and reassembled, in order, into the returned Resource.
+
+    Documents with fewer than `threshold` embedded resources, which defaults
+    to the module's `parallel_threshold`, are parsed serially, as is any
+    document when `workers` is 1. An existing `executor` may be given to
+    avoid starting processes for every call. Resources are always parsed
+    eagerly and without a Session or identity map.
+
+    Unpickling the Resources in this process is itself costly, so only large
+    documents on hosts with several idle CPUs gain from this; measure with
+    `benchmarks/bench_parallel.py`. Lazy parsing, see `use_lazy_resources`,
+    is usually the cheaper way to handle large documents.
+    """
+    document = decoding.decode(payload)
+    if strict is None:
+        strict = _strict_parsing
+    if threshold is None:
+        threshold = parallel_threshold
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    embedded = document.get("_embedded") if isinstance(document, dict) else None
+    if not isinstance(embedded, dict) or not all(
+        isinstance(list_, list) for list_ in embedded.values()
+    ):
+        return Resource(document, lazy=False, strict=strict)
+
+    total = sum(len(list_) for list_ in embedded.values())
+    if workers < 2 or total < threshold:
+        return Resource(document, lazy=False, strict=strict)
+
+    resource = Resource(
+        dict((key, value) for key, value in document.items() if key != "_embedded"),
+        lazy=False, strict=strict
+    )
+
+    # Several chunks per worker balance the load when resources differ in size.
+    chunk_size = max(1, -(-total // (workers * 4)))
+    chunks = []
+    for name, list_ in embedded.items():
+        for start in range(0, len(list_), chunk_size):
+            chunks.append((name, list_[start:start + chunk_size]))
+
+    owned = executor is None
+    if owned:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    try:
+        results = executor.map(
+            _parse_chunk, [list_ for (_, list_) in chunks], [strict] * len(chunks)
+        )
+        for (name, _), resources in zip(chunks, results):
+            resource.embedded._resources.setdefault(name, []).extend(resources)
+    finally:
+        if owned:
+            executor.shutdown()
+
+    for name in embedded:
+        resource.embedded._resources.setdefault(name, [])
+    return resource
+
+
+def _parse_chunk(list_, strict):
+    """ Internal function building Resources in a worker process. """
+    return [Resource(item, lazy=False, strict=strict) for item in list_]
+
 
 def enter(uri):
-    result = _request_func(uri)
-    link_container = LinkContainer()
+    links = _cached_entry(uri)
+    if links is None:
+        result = _request(uri, (), {})
+        links = _remember_entry(uri, _unserialize(_entry_links, result, None, uri))
+    return links
+
+
+async def aenter(uri):
+    """ Await the entry point of an API, like `enter` does synchronously. """
+    if not _async_request_func:
+        raise RuntimeError(
+            "Must set an async request function using 'set_async_request_func'"
+        )
+    links = _cached_entry(uri)
+    if links is None:
+        result = await _arequest(uri, (), {})
+        links = _remember_entry(uri, _unserialize(_entry_links, result, None, uri))
+    return links
+
+
+def _entry_store(session):
+    """ Internal function returning the entry cache ttl, dict and lock to use. """
+    if session is None:
+        return (_entry_cache_ttl, _entry_cache, _entry_cache_lock)
+    return (session.entry_cache_ttl, session._entry_cache, session._entry_cache_lock)
+
+
+def _cached_entry(uri, session=None):
+    """ Internal function returning a memoized entry point, if still fresh. """
+    (ttl, entries, lock) = _entry_store(session)
+    if ttl is None:
+        return None
+    with lock:
+        entry = entries.get(uri)
+        if entry is None:
+            return None
+        (expires, links) = entry
+        if time.time() >= expires:
+            del entries[uri]
+            return None
+        return links
+
+
+def _remember_entry(uri, links, session=None):
+    """ Internal function memoizing an entry point, if enabled. """
+    (ttl, entries, lock) = _entry_store(session)
+    if ttl is not None:
+        with lock:
+            entries[uri] = (time.time() + ttl, links)
+    return links
+
+
+def _entry_links(result, session=None):
+    """ Internal function building a LinkContainer from an entry point. """
+    link_container = LinkContainer(session=session)
     if "_links" in result:
-        for key, val in result["_links"].items():
-            link_container.unserialize(key, val)
+        link_container.unserialize_all(result["_links"])
     return link_container
 
+
+class Session(object):
+    """ An independent set of request functions, caches and parsing options.
+
+    The module-level configuration, such as `set_request_func`, is shared by
+    the whole process. A Session owns its own instead, so traversals using
+    different credentials or backends may run concurrently in one process.
+    Resources and Links parsed by a Session keep a reference to it, and use
+    it when they are followed.
+
+    * `request_func` - The function executing requests, see
+    `set_request_func`. Without one, a `habu.client` request function is
+    created for `base_url` and `headers`, whose connection pools the Session
+    owns and closes in `close`.
+
+    * `async_request_func` - The coroutine function awaited by `Link.acall`
+    and `aenter`, see `set_async_request_func`.
+
+    * `response_cache` - A `habu.cache.BaseCache`, see `set_cache`.
+
+    * `policy` - A `Policy` applied to every request, see `set_policy`.
+
+    * `strict`, `lazy`, `embedded_fallback` - See `use_strict_parsing`,
+    `use_lazy_resources` and `use_missing_embedded_fallback`.
+
+    * `single_flight` - See `use_single_flight`.
+
+    * `identity_map` - "response", an `IdentityMap` or `None`, see
+    `use_identity_map`.
+
+    * `curie_registry` - A `CurieRegistry` sharing CURIEs between resources
+    of the Session, see `set_curie_registry`. None is used by default.
+
+    * `entry_cache_ttl` - Enables memoizing `enter`, see `use_entry_cache`.
+    """
+
+    def __init__(self, request_func=None, async_request_func=None, base_url="",
+                 headers=None, response_cache=None, policy=None, strict=True,
+                 lazy=False, embedded_fallback=True, single_flight=False,
+                 identity_map=None, curie_registry=None, entry_cache_ttl=None):
+        """ Initialize a new Session, creating a request function if needed. """
+        self._pools = None
+        if request_func is None:
+            request_func = client.make_request_func(base_url, headers)
+            self._pools = request_func.pools
+        for func in (request_func, async_request_func):
+            if func is not None and not callable(func):
+                raise TypeError("'%s' must be callable" % func.__class__.__name__)
+        if response_cache is not None and not isinstance(response_cache, cache.BaseCache):
+            raise TypeError("'%s' must be a BaseCache" % response_cache.__class__.__name__)
+        if policy is not None and not isinstance(policy, Policy):
+            raise TypeError("'%s' must be a Policy" % policy.__class__.__name__)
+        if identity_map is not None and identity_map != "response" and not isinstance(identity_map, IdentityMap):
+            raise ValueError("identity_map must be 'response', an IdentityMap or None")
+
+        self.request_func = request_func
+        self.async_request_func = async_request_func
+        self.cache = response_cache
+        self.policy = policy
+        self.rel_policies = {}
+        self.strict = strict
+        self.lazy = lazy
+        self.embedded_fallback = embedded_fallback
+        self.single_flight = singleflight.SingleFlight() if single_flight else None
+        self.identity_map = identity_map
+        self.curie_registry = curie_registry
+        self._curie_documentation = collections.OrderedDict()
+        self.entry_cache_ttl = None
+        self._entry_cache = {}
+        self._entry_cache_lock = threading.Lock()
+        self.use_entry_cache(entry_cache_ttl)
+
+    def use_entry_cache(self, ttl=300):
+        """ Memoize the LinkContainer returned by `enter` for `ttl` seconds.
+
+        Behaves like the module-level `use_entry_cache`, for this Session.
+        Pass `None` to disable and empty the entry cache.
+        """
+        if ttl is not None and (not isinstance(ttl, (int, float)) or ttl < 0):
+            raise ValueError("ttl must be a non-negative number or None")
+        self.entry_cache_ttl = ttl
+        if ttl is None:
+            with self._entry_cache_lock:
+                self._entry_cache.clear()
+
+    def set_policy(self, policy_, rel=None):
+        """ Set the Policy of the Session, or of Links with a rel. """
+        if policy_ is not None and not isinstance(policy_, Policy):
+            raise TypeError("'%s' must be a Policy" % policy_.__class__.__name__)
+        if rel is None:
+            self.policy = policy_
+        elif policy_ is None:
+            self.rel_policies.pop(rel, None)
+        else:
+            self.rel_policies[rel] = policy_
+
+    def policy_for(self, rel):
+        """ Return the Policy applying to requests of a rel, if any. """
+        if self.rel_policies and rel in self.rel_policies:
+            return self.rel_policies[rel]
+        return self.policy
+
+    def enter(self, uri):
+        """ Enter an API at `uri`, returning the LinkContainer of its links. """
+        links = _cached_entry(uri, self)
+        if links is None:
+            result = _request(uri, (), {}, session=self)
+            links = _remember_entry(uri, _unserialize(
+                functools.partial(_entry_links, session=self), result, None, uri
+            ), self)
+        return links
+
+    async def aenter(self, uri):
+        """ Await the entry point of an API, like `enter` does synchronously. """
+        if not self.async_request_func:
+            raise RuntimeError("Session has no async request function")
+        links = _cached_entry(uri, self)
+        if links is None:
+            result = await _arequest(uri, (), {}, session=self)
+            links = _remember_entry(uri, _unserialize(
+                functools.partial(_entry_links, session=self), result, None, uri
+            ), self)
+        return links
+
+    def resource(self, dict_=None, **kwargs):
+        """ Return a new Resource for a dictionary, parsed by the Session. """
+        return Resource(dict_, session=self, **kwargs)
+
+    def invalidate(self, uri=None):
+        """ Discard the entry point, cached responses and mapped resources of
+        a URI, or of every URI.
+        """
+        with self._entry_cache_lock:
+            if uri is None:
+                self._entry_cache.clear()
+            else:
+                self._entry_cache.pop(uri, None)
+
+        if isinstance(self.identity_map, IdentityMap):
+            if uri is None:
+                self.identity_map.clear()
+            else:
+                self.identity_map.discard(uri)
+        if self.cache is not None:
+            if uri is None:
+                self.cache.clear()
+            else:
+                self.cache.delete(cache.make_key(uri, (), {}))
+
+    def close(self):
+        """ Close the connection pools created by the Session, if any. """
+        if self._pools is not None:
+            self._pools.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
 """
 res = entrypoint(host="http://api.amberengine.dev", method="options")
 
@@ -0,0 +1,341 @@
+import collections
+import pickle
+import sqlite3
+import threading
+import time
+
+from habu.response import Response, response_body
+
+
+cacheable_methods = ("GET", "HEAD")
+
+
+class CacheStats(object):
+    """ Counters describing how effective a response cache has been.
+
+    * `hits` - Requests answered from a fresh cache entry.
+
+    * `misses` - Requests which had to be sent to the request function.
+
+    * `revalidations` - Stale entries confirmed unchanged by a 304 response.
+
+    * `stores` - Responses written to the cache.
+
+    * `evictions` - Entries dropped to keep the cache within its size.
+    """
+
+    def __init__(self):
+        """ Initialize all counters to zero. """
+        self.reset()
+
+    def reset(self):
+        """ Set all counters back to zero. """
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def as_dict(self):
+        """ Return the counters as a dictionary. """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+    def __repr__(self):
+        """ Represent the current CacheStats as a string. """
+        return "CacheStats(%r)" % self.as_dict()
+
+
+class CacheEntry(object):
+    """ A cached response document along with its freshness information. """
+
+    def __init__(self, body, expires, etag=None, last_modified=None):
+        """ Initialize a new entry. `expires` is a `time.time()` timestamp. """
+        self.body = body
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def is_fresh(self, now=None):
+        """ Return bool indicating if the entry may be used without a request. """
+        return (now or time.time()) < self.expires
+
+    def conditional_headers(self):
+        """ Return request headers used to revalidate a stale entry. """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def is_cacheable(kwargs):
+    """ Return bool indicating if a request with these kwargs is idempotent. """
+    return str(kwargs.get("method", "GET")).upper() in cacheable_methods
+
+
+def make_key(uri, args, kwargs):
+    """ Return the cache key for a request of `uri` with the given arguments. """
+    return repr((uri, tuple(args), sorted(kwargs.items())))
+
+
+def parse_cache_control(value):
+    """ Parse a Cache-Control header into a dictionary of directives. """
+    directives = {}
+    for part in (value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "=" in part:
+            key, val = part.split("=", 1)
+            directives[key.strip().lower()] = val.strip().strip('"')
+        else:
+            directives[part.lower()] = None
+    return directives
+
+
+class BaseCache(object):
+    """ Base class of a bounded response cache used beneath Link requests.
+
+    Subclasses implement storage using `get`, `set`, `delete`, `clear` and
+    `__len__`, while this class implements the HTTP caching behaviour in
+    `fetch` and `afetch`.
+
+    Entries are fresh for the `max-age` given by a response's Cache-Control
+    header, or for `ttl` seconds when the request function does not provide
+    one. Stale entries are kept for revalidation until evicted: if they have
+    an `ETag` or `Last-Modified` header, the next request is sent with
+    `If-None-Match`/`If-Modified-Since` in a `headers` keyword argument, and a
+    304 response reuses the cached document. At most `maxsize` entries are
+    kept, evicting the least recently used first.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        """ Initialize the cache limits and statistics. """
+        if not isinstance(maxsize, int) or maxsize < 1:
+            raise ValueError("maxsize must be a positive integer")
+        if ttl < 0:
+            raise ValueError("ttl must not be negative")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+
+    def get(self, key):
+        """ Return the CacheEntry stored under the key, or `None`. """
+        raise NotImplementedError()
+
+    def set(self, key, entry):
+        """ Store a CacheEntry under the key. """
+        raise NotImplementedError()
+
+    def delete(self, key):
+        """ Remove the entry stored under the key, if any. """
+        raise NotImplementedError()
+
+    def clear(self):
+        """ Remove every entry from the cache. """
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
+
+    def fetch(self, request_func, uri, args, kwargs):
+        """ Return the document for a request, using the cache when possible. """
+        (key, entry, kwargs) = self._prepare(uri, args, kwargs)
+        if key is None:
+            return response_body(request_func(uri, *args, **kwargs))
+        if entry is not None and entry.is_fresh():
+            return entry.body
+
+        return self._complete(key, entry, request_func(uri, *args, **kwargs))
+
+    async def afetch(self, request_func, uri, args, kwargs):
+        """ Await the document for a request, using the cache when possible. """
+        (key, entry, kwargs) = self._prepare(uri, args, kwargs)
+        if key is None:
+            return response_body(await request_func(uri, *args, **kwargs))
+        if entry is not None and entry.is_fresh():
+            return entry.body
+
+        return self._complete(key, entry, await request_func(uri, *args, **kwargs))
+
+    def _prepare(self, uri, args, kwargs):
+        """ Internal method looking up a request before it is performed.
+
+        Returns the cache key (or `None` for an uncacheable request), the
+        entry found and the keyword arguments to send the request with.
+        """
+        if not is_cacheable(kwargs):
+            return (None, None, kwargs)
+
+        key = make_key(uri, args, kwargs)
+        entry = self.get(key)
+        if entry is not None and entry.is_fresh():
+            self.stats.hits += 1
+            return (key, entry, kwargs)
+
+        self.stats.misses += 1
+        if entry is not None:
+            conditional = entry.conditional_headers()
+            if conditional:
+                headers = dict(kwargs.get("headers") or {})
+                headers.update(conditional)
+                kwargs = dict(kwargs, headers=headers)
+        return (key, entry, kwargs)
+
+    def _complete(self, key, entry, result):
+        """ Internal method storing a response, returning its document. """
+        if not isinstance(result, Response):
+            body = response_body(result)
+            self._store(key, CacheEntry(body, time.time() + self.ttl))
+            return body
+
+        if result.status == 304 and entry is not None:
+            self.stats.revalidations += 1
+            body = entry.body
+        elif 200 <= result.status < 300:
+            body = response_body(result)
+        else:
+            return response_body(result)
+
+        directives = parse_cache_control(result.header("cache-control"))
+        if "no-store" in directives:
+            self.delete(key)
+            return body
+
+        ttl = self.ttl
+        if "no-cache" in directives:
+            ttl = 0
+        elif directives.get("max-age"):
+            try:
+                ttl = int(directives["max-age"])
+            except ValueError:
+                pass
+
+        self._store(key, CacheEntry(
+            body,
+            time.time() + ttl,
+            etag=result.header("etag") or (entry and entry.etag),
+            last_modified=result.header("last-modified") or (entry and entry.last_modified),
+        ))
+        return body
+
+    def _store(self, key, entry):
+        """ Internal method writing an entry and counting the store. """
+        self.set(key, entry)
+        self.stats.stores += 1
+
+
+class MemoryCache(BaseCache):
+    """ An in-memory, thread-safe LRU response cache. """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        """ Initialize an empty cache. See `BaseCache` for the parameters. """
+        super(MemoryCache, self).__init__(maxsize, ttl)
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """ Return the CacheEntry stored under the key, or `None`. """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        """ Store a CacheEntry under the key, evicting old entries if full. """
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def delete(self, key):
+        """ Remove the entry stored under the key, if any. """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """ Remove every entry from the cache. """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteCache(BaseCache):
+    """ An on-disk LRU response cache stored in a sqlite database.
+
+    Entries are pickled, so the cache may be shared between processes and
+    survives restarts. Use a `path` of ":memory:" for a private database.
+    """
+
+    def __init__(self, path, maxsize=1024, ttl=60):
+        """ Open (or create) the database at `path`. See `BaseCache`. """
+        super(SqliteCache, self).__init__(maxsize, ttl)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS habu_cache ("
+                "key TEXT PRIMARY KEY, entry BLOB, accessed REAL)"
+            )
+
+    def get(self, key):
+        """ Return the CacheEntry stored under the key, or `None`. """
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT entry FROM habu_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE habu_cache SET accessed = ? WHERE key = ?",
+                (time.time(), key)
+            )
+        return pickle.loads(row[0])
+
+    def set(self, key, entry):
+        """ Store a CacheEntry under the key, evicting old entries if full. """
+        blob = pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO habu_cache VALUES (?, ?, ?)",
+                (key, blob, time.time())
+            )
+            count = self._db.execute("SELECT COUNT(*) FROM habu_cache").fetchone()[0]
+            if count > self.maxsize:
+                self._db.execute(
+                    "DELETE FROM habu_cache WHERE key IN ("
+                    "SELECT key FROM habu_cache ORDER BY accessed LIMIT ?)",
+                    (count - self.maxsize,)
+                )
+                self.stats.evictions += count - self.maxsize
+
+    def delete(self, key):
+        """ Remove the entry stored under the key, if any. """
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM habu_cache WHERE key = ?", (key,))
+
+    def clear(self):
+        """ Remove every entry from the cache. """
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM habu_cache")
+
+    def close(self):
+        """ Close the underlying database connection. """
+        self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM habu_cache").fetchone()[0]
@@ -0,0 +1,314 @@
+import collections
+import http.client
+import json
+import threading
+import urllib.parse
+
+from habu import decoding
+from habu.response import Response
+
+
+class HTTPError(Exception):
+    """ Raised by a built-in request function for an error HTTP status.
+
+    * `status` - The integer HTTP status code.
+
+    * `reason` - The reason phrase sent with the status.
+
+    * `response` - The habu.Response, including any decoded error document.
+    A body which is not JSON is kept as text.
+    """
+
+    def __init__(self, uri, response, reason=""):
+        super(HTTPError, self).__init__(
+            "%s %s for '%s'" % (response.status, reason, uri)
+        )
+        self.status = response.status
+        self.reason = reason
+        self.response = response
+
+
+# Errors raised when a kept-alive connection was closed by the server.
+_stale_connection_errors = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+# Methods which may safely be sent again when a stale connection was reset.
+idempotent_methods = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+class ResponseStream(object):
+    """ An iterator over the body of a response, in chunks of bytes.
+
+    The connection stays acquired from its pool while the body is read. It is
+    released once the body is exhausted, or closed when the stream is closed
+    before that, since it then still holds unread data.
+    """
+
+    def __init__(self, pool, connection, response, chunk_size):
+        """ Initialize the stream over an acquired connection's response. """
+        self._pool = pool
+        self._connection = connection
+        self._response = response
+        self._chunk_size = chunk_size
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._response is None:
+            raise StopIteration
+        try:
+            chunk = self._response.read(self._chunk_size)
+        except BaseException:
+            self._finish(False)
+            raise
+        if not chunk:
+            self._finish(not self._response.will_close)
+            raise StopIteration
+        return chunk
+
+    def _finish(self, reusable):
+        """ Internal method giving the connection back to its pool. """
+        (connection, self._connection, self._response) = (self._connection, None, None)
+        self._pool.release(connection, reusable=reusable)
+
+    def close(self):
+        """ Stop reading the body, closing the connection if unread data remains. """
+        if self._response is not None:
+            self._finish(False)
+
+    def __del__(self):
+        self.close()
+
+
+class ConnectionPool(object):
+    """ A bounded, thread-safe pool of kept-alive connections to one host.
+
+    At most `maxsize` connections are open at once; further requests wait for
+    a connection to be released. Idle connections are reused, so connection
+    and TLS setup only happen once per pooled connection.
+    """
+
+    def __init__(self, scheme, host, port=None, maxsize=10, timeout=None, ssl_context=None):
+        """ Initialize an empty pool for the scheme, host and port. """
+        if scheme not in ("http", "https"):
+            raise ValueError("unsupported uri scheme '%s'" % scheme)
+        if not isinstance(maxsize, int) or maxsize < 1:
+            raise ValueError("maxsize must be a positive integer")
+
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+
+        self._idle = collections.deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxsize)
+
+    def _connect(self):
+        """ Internal method creating a new, unopened connection. """
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(
+                self.host, self.port, timeout=self.timeout, context=self.ssl_context
+            )
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def acquire(self):
+        """ Wait for a connection, returning it and whether it was reused. """
+        self._slots.acquire()
+        with self._lock:
+            if self._idle:
+                return (self._idle.pop(), True)
+        return (self._connect(), False)
+
+    def release(self, connection, reusable=True):
+        """ Return an acquired connection, closing it if it is not reusable. """
+        if reusable:
+            with self._lock:
+                self._idle.append(connection)
+        else:
+            connection.close()
+        self._slots.release()
+
+    def _send(self, method, target, body, headers):
+        """ Internal method sending a request, returning its connection and response.
+
+        A reused connection which turns out to have been closed by the server
+        is replaced by a new connection and the request is sent once more, but
+        only for idempotent methods: the server may have received the request
+        before the connection was reset.
+        """
+        while True:
+            (connection, reused) = self.acquire()
+            try:
+                connection.request(method, target, body=body, headers=headers or {})
+                response = connection.getresponse()
+            except _stale_connection_errors:
+                self.release(connection, reusable=False)
+                if reused and method in idempotent_methods:
+                    continue
+                raise
+            except BaseException:
+                self.release(connection, reusable=False)
+                raise
+            return (connection, response)
+
+    def request(self, method, target, body=None, headers=None):
+        """ Perform a request, returning the status, reason, headers and body. """
+        (connection, response) = self._send(method, target, body, headers)
+        try:
+            data = response.read()
+        except BaseException:
+            self.release(connection, reusable=False)
+            raise
+
+        self.release(connection, reusable=not response.will_close)
+        return (response.status, response.reason, dict(response.getheaders()), data)
+
+    def stream(self, method, target, body=None, headers=None, chunk_size=64 * 1024):
+        """ Perform a request, returning the status, reason, headers and a
+        ResponseStream yielding the body in chunks of at most `chunk_size` bytes.
+        """
+        (connection, response) = self._send(method, target, body, headers)
+        return (
+            response.status, response.reason, dict(response.getheaders()),
+            ResponseStream(self, connection, response, chunk_size)
+        )
+
+    def close(self):
+        """ Close every idle connection. """
+        with self._lock:
+            while self._idle:
+                self._idle.pop().close()
+
+
+class PoolManager(object):
+    """ Keeps one ConnectionPool per scheme, host and port. """
+
+    def __init__(self, maxsize=10, timeout=None, ssl_context=None):
+        """ Initialize the options used for every created pool. """
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def pool_for(self, scheme, host, port):
+        """ Return the ConnectionPool for a scheme, host and port. """
+        key = (scheme, host, port)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(
+                    scheme, host, port, maxsize=self.maxsize,
+                    timeout=self.timeout, ssl_context=self.ssl_context
+                )
+                self._pools[key] = pool
+            return pool
+
+    def close(self):
+        """ Close every idle connection of every pool. """
+        with self._lock:
+            for pool in self._pools.values():
+                pool.close()
+
+
+# The request function takes a `json` argument, shadowing the module.
+_json_dumps = json.dumps
+
+
+def _json_loads(data):
+    """ Internal function decoding a JSON response body. """
+    return decoding.decode(data)
+
+
+def _error_document(data):
+    """ Internal function decoding the body of an error response.
+
+    Error bodies are often not JSON, such as the HTML page of a proxy, in
+    which case the body is returned as text instead.
+    """
+    if not data:
+        return {}
+    try:
+        return _json_loads(data)
+    except ValueError:
+        return data.decode("utf-8", "replace")
+
+
+def make_request_func(base_url="", headers=None, maxsize=10, timeout=30, ssl_context=None):
+    """ Create a request function using pooled, kept-alive connections.
+
+    The returned function is suitable for `habu.set_request_func`. Relative
+    URIs are resolved against `base_url`, and `headers` are sent with every
+    request. At most `maxsize` connections are kept open per host.
+
+    The function accepts these keyword arguments, passed through Link calls:
+
+    * `method` - The HTTP method to use. Defaults to "GET".
+
+    * `headers` - Additional headers for this request.
+
+    * `json` - A value to send as a JSON encoded request body.
+
+    * `body` - Raw bytes or str to send as the request body.
+
+    * `stream` - When `True`, the body of the returned Response is not read
+    nor decoded, but is a ResponseStream of byte chunks. Used by
+    `Link.stream`.
+
+    It returns a habu.Response holding the decoded JSON document, and raises
+    an HTTPError for any status of 400 or above. The PoolManager in use is
+    available as the `pools` attribute of the function.
+    """
+    default_headers = {"Accept": "application/hal+json, application/json"}
+    default_headers.update(headers or {})
+    pools = PoolManager(maxsize=maxsize, timeout=timeout, ssl_context=ssl_context)
+
+    def request_func(uri, method="GET", headers=None, json=None, body=None, stream=False):
+        url = urllib.parse.urljoin(base_url, uri)
+        parts = urllib.parse.urlsplit(url)
+        if not parts.hostname:
+            raise ValueError("cannot request relative uri '%s' without a base_url" % uri)
+
+        request_headers = dict(default_headers)
+        request_headers.update(headers or {})
+        if json is not None:
+            body = _json_dumps(json)
+            request_headers.setdefault("Content-Type", "application/json")
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        pool = pools.pool_for(parts.scheme, parts.hostname, parts.port)
+        if stream:
+            (status, reason, response_headers, chunks) = pool.stream(
+                method.upper(), target, body=body, headers=request_headers
+            )
+            if status < 400:
+                return Response(chunks, response_headers, status)
+            data = b"".join(chunks)
+        else:
+            (status, reason, response_headers, data) = pool.request(
+                method.upper(), target, body=body, headers=request_headers
+            )
+
+        if status >= 400:
+            response = Response(_error_document(data), response_headers, status)
+            raise HTTPError(url, response, reason)
+        document = _json_loads(data) if data else {}
+        return Response(document, response_headers, status)
+
+    request_func.pools = pools
+    request_func.supports_stream = True
+    return request_func
@@ -0,0 +1,39 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def default_decoder():
+    """ Return the fastest JSON decoding function which is installed.
+
+    `orjson` is preferred, followed by `ujson`, falling back to the standard
+    library `json` module.
+    """
+    if orjson is not None:
+        return orjson.loads
+    if ujson is not None:
+        return ujson.loads
+    return json.loads
+
+
+decoder = default_decoder()
+
+
+def decode(data):
+    """ Decode a raw JSON response body, as bytes or str, into a document.
+
+    Anything else, such as an already decoded dictionary, is returned as-is.
+    """
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    if isinstance(data, (bytes, bytearray, str)):
+        return decoder(data)
+    return data
@@ -0,0 +1,53 @@
+import threading
+
+
+def self_href(document):
+    """ Return the `_links.self.href` of a resource document, or `None`. """
+    try:
+        return document["_links"]["self"]["href"]
+    except (KeyError, TypeError):
+        return None
+
+
+class IdentityMap(object):
+    """ Maps the self href of resources to a single shared Resource.
+
+    While parsing with an identity map, every embedded resource whose
+    `_links.self.href` was already seen resolves to the Resource built for
+    its first occurrence, instead of a new copy. A map kept for a whole
+    traversal also satisfies later Link calls to those hrefs, without
+    performing a request. See `habu.use_identity_map`.
+
+    Shared resources are not copied, so modifying one is visible everywhere
+    it appears. Use `discard` or `clear` to forget resources which changed.
+    """
+
+    def __init__(self):
+        """ Initialize an empty identity map. """
+        self._resources = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._resources)
+
+    def __contains__(self, href):
+        return href in self._resources
+
+    def get(self, href):
+        """ Return the Resource mapped to `href`, or `None`. """
+        return self._resources.get(href)
+
+    def add(self, href, resource):
+        """ Map `href` to a Resource, returning the one already mapped, if any. """
+        with self._lock:
+            return self._resources.setdefault(href, resource)
+
+    def discard(self, href):
+        """ Forget the Resource mapped to `href`, if any. """
+        with self._lock:
+            self._resources.pop(href, None)
+
+    def clear(self):
+        """ Forget every mapped Resource. """
+        with self._lock:
+            self._resources.clear()
@@ -0,0 +1,139 @@
+import collections
+import math
+import threading
+import time
+
+
+# `True` while at least one listener is attached. Instrumented code checks
+# this flag first, so there is no overhead beyond it when nobody listens.
+enabled = False
+clock = time.perf_counter
+counters = collections.Counter()
+
+_listeners = []
+_lock = threading.Lock()
+
+
+class Event(object):
+    """ A timed step of a Link traversal, passed to every listener.
+
+    * `name` - One of "expand", "request", "decode" or "unserialize".
+
+    * `rel` - The relation of the Link being followed, or `None` when
+    entering an API with `enter`.
+
+    * `uri` - The templated href while expanding, otherwise the requested URI.
+
+    * `duration` - The time the step took, in seconds.
+    """
+
+    __slots__ = ("name", "rel", "uri", "duration")
+
+    def __init__(self, name, rel, uri, duration):
+        self.name = name
+        self.rel = rel
+        self.uri = uri
+        self.duration = duration
+
+    def __repr__(self):
+        """ Represent the current Event as a string. """
+        return "Event(%r, rel=%r, uri=%r, duration=%.6f)" % (
+            self.name, self.rel, self.uri, self.duration
+        )
+
+
+def add_listener(callable_):
+    """ Attach a function to be called with every Event.
+
+    While any listener is attached, the `counters` of created links and
+    resources are maintained as well.
+    """
+    if not callable(callable_):
+        raise TypeError("'%s' must be callable" % callable_.__class__.__name__)
+    global enabled
+    with _lock:
+        _listeners.append(callable_)
+        enabled = True
+
+
+def remove_listener(callable_):
+    """ Detach a function previously attached with `add_listener`. """
+    global enabled
+    with _lock:
+        _listeners.remove(callable_)
+        enabled = bool(_listeners)
+
+
+def emit(name, start, rel, uri):
+    """ Send an Event for a step which began at `start` to every listener. """
+    event = Event(name, rel, uri, clock() - start)
+    for listener in list(_listeners):
+        listener(event)
+
+
+def count(name, amount=1):
+    """ Increase a counter, such as "links" or "resources". """
+    counters[name] += amount
+
+
+def percentile(sorted_values, fraction):
+    """ Return the nearest-rank percentile of an already sorted list. """
+    if not sorted_values:
+        return 0.0
+    # Rounding first keeps float error, as in 0.07 * 100, from adding a rank.
+    rank = math.ceil(round(fraction * len(sorted_values), 9))
+    return sorted_values[max(rank, 1) - 1]
+
+
+class Aggregator(object):
+    """ A listener collecting the durations of Events per step and rel.
+
+    Attach it using `add_listener(aggregator)`, then use `report` to get the
+    p50, p95 and p99 durations of every step for every rel.
+    """
+
+    def __init__(self):
+        """ Initialize with no recorded durations. """
+        self._durations = collections.defaultdict(list)
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        """ Record the duration of an Event. """
+        key = (event.rel if event.rel is not None else event.uri, event.name)
+        with self._lock:
+            self._durations[key].append(event.duration)
+
+    def summary(self):
+        """ Return a dict of (rel, step) to count, p50, p95 and p99 seconds. """
+        with self._lock:
+            items = [(key, sorted(values)) for key, values in self._durations.items()]
+        return dict(
+            (key, {
+                "count": len(values),
+                "p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "p99": percentile(values, 0.99),
+            })
+            for key, values in items
+        )
+
+    def report(self):
+        """ Return a printable table of the collected percentiles. """
+        lines = ["%-30s %-12s %8s %10s %10s %10s" % (
+            "rel", "step", "count", "p50 ms", "p95 ms", "p99 ms"
+        )]
+        for (rel, name), stats in sorted(self.summary().items()):
+            lines.append("%-30s %-12s %8i %10.3f %10.3f %10.3f" % (
+                rel, name, stats["count"], stats["p50"] * 1e3,
+                stats["p95"] * 1e3, stats["p99"] * 1e3
+            ))
+        return "\n".join(lines)
+
+    def print_report(self):
+        """ Print the table returned by `report`. """
+        print(self.report())
+
+    def reset(self):
+        """ Forget every recorded duration. """
+        with self._lock:
+            self._durations.clear()
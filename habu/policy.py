@@ -0,0 +1,277 @@
+import asyncio
+import collections
+import concurrent.futures
+import random
+import threading
+import time
+
+from habu import cache
+from habu import client
+from habu import metrics
+
+
+class DeadlineExceeded(TimeoutError):
+    """ Raised when a request did not complete within its policy's timeout. """
+
+
+def is_retryable(error):
+    """ Return bool indicating if a failed request attempt may be retried.
+
+    Connection errors, timeouts and HTTP errors with a 5xx or 429 status are
+    considered transient. Any other exception is raised immediately.
+    """
+    if isinstance(error, client.HTTPError):
+        return error.status >= 500 or error.status == 429
+    return isinstance(error, (OSError, TimeoutError))
+
+
+class Policy(object):
+    """ Retry, timeout and hedging rules applied around a request function.
+
+    * `timeout` - The deadline, in seconds, for the whole call including
+    every retry. `DeadlineExceeded` is raised once it passes. Synchronous
+    attempts run on a worker thread so they can be abandoned; the thread
+    itself finishes in the background.
+
+    * `retries` - How many times a failed idempotent (GET or HEAD) request
+    is retried. Other methods are never retried nor hedged.
+
+    * `backoff`, `backoff_max` - The delay before the first retry, doubled
+    for every following retry up to `backoff_max`. With `jitter`, a random
+    delay between zero and that value is used instead.
+
+    * `retry_on` - A function of the raised exception, returning whether the
+    attempt may be retried. Defaults to `is_retryable`.
+
+    * `hedge` - Enable firing a duplicate request when the first one has not
+    answered after `hedge_delay` seconds, using whichever succeeds first.
+    Without a `hedge_delay`, the p95 latency of the last `window` successful
+    requests is used, once at least `min_samples` were observed.
+    """
+
+    def __init__(self, timeout=None, retries=0, backoff=0.1, backoff_max=2.0,
+                 jitter=True, retry_on=is_retryable, hedge=False,
+                 hedge_delay=None, window=100, min_samples=20, max_workers=16):
+        """ Initialize a new instance using sane defaults. """
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout must be a positive number or None")
+        if retries < 0:
+            raise ValueError("retries must be a non-negative integer")
+
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_on = retry_on
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+
+        self._latencies = collections.deque(maxlen=window)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        """ Represent the current Policy as a string. """
+        return "Policy(timeout=%r, retries=%r, hedge=%r)" % (
+            self.timeout, self.retries, self.hedge
+        )
+
+    def observe(self, latency):
+        """ Record the latency of a successful request, used for hedging. """
+        self._latencies.append(latency)
+
+    def current_hedge_delay(self):
+        """ Return the delay before hedging a request, or None to not hedge. """
+        if not self.hedge:
+            return None
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        if len(self._latencies) < self.min_samples:
+            return None
+        return metrics.percentile(sorted(self._latencies), 0.95)
+
+    def backoff_delay(self, attempt):
+        """ Return the seconds to sleep before retry number `attempt`. """
+        delay = min(self.backoff_max, self.backoff * (2 ** attempt))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def wrap(self, request_func):
+        """ Return a request function applying this policy to `request_func`. """
+        def request(uri, *args, **kwargs):
+            return self.call(request_func, uri, args, kwargs)
+        return request
+
+    def awrap(self, async_request_func):
+        """ Return a coroutine function applying this policy to the given one. """
+        async def request(uri, *args, **kwargs):
+            return await self.acall(async_request_func, uri, args, kwargs)
+        return request
+
+    def _deadline(self):
+        """ Internal method returning the clock time the call must end by. """
+        if self.timeout is None:
+            return None
+        return time.monotonic() + self.timeout
+
+    def _remaining(self, deadline):
+        """ Internal method returning the seconds left, raising when none are. """
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded("request deadline of %ss exceeded" % self.timeout)
+        return remaining
+
+    def _pool(self):
+        """ Internal method returning the executor running timed attempts. """
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="habu-policy"
+                )
+            return self._executor
+
+    def call(self, request_func, uri, args, kwargs):
+        """ Call `request_func(uri, *args, **kwargs)` under this policy. """
+        idempotent = cache.is_cacheable(kwargs)
+        retries = self.retries if idempotent else 0
+        deadline = self._deadline()
+
+        attempt = 0
+        while True:
+            try:
+                return self._attempt(request_func, uri, args, kwargs, deadline, idempotent)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                if attempt >= retries or not self.retry_on(e):
+                    raise
+                delay = self.backoff_delay(attempt)
+                remaining = self._remaining(deadline)
+                if remaining is not None and delay >= remaining:
+                    raise
+                attempt += 1
+                if metrics.enabled:
+                    metrics.count("retries")
+                time.sleep(delay)
+
+    def _attempt(self, request_func, uri, args, kwargs, deadline, idempotent):
+        """ Internal method performing one, possibly hedged, request attempt. """
+        hedge_delay = self.current_hedge_delay() if idempotent else None
+        if deadline is None and hedge_delay is None:
+            start = time.monotonic()
+            result = request_func(uri, *args, **kwargs)
+            self.observe(time.monotonic() - start)
+            return result
+
+        pool = self._pool()
+        start = time.monotonic()
+        futures = [pool.submit(request_func, uri, *args, **kwargs)]
+        if hedge_delay is not None:
+            remaining = self._remaining(deadline)
+            wait = hedge_delay if remaining is None else min(hedge_delay, remaining)
+            (done, _) = concurrent.futures.wait(futures, timeout=wait)
+            if not done:
+                self._remaining(deadline)
+                if metrics.enabled:
+                    metrics.count("hedges")
+                futures.append(pool.submit(request_func, uri, *args, **kwargs))
+
+        error = None
+        pending = set(futures)
+        while pending:
+            (done, pending) = concurrent.futures.wait(
+                pending,
+                timeout=self._remaining(deadline),
+                return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            if not done:
+                self._remaining(deadline)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    self.observe(time.monotonic() - start)
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def acall(self, async_request_func, uri, args, kwargs):
+        """ Await `async_request_func(uri, *args, **kwargs)` under this policy. """
+        idempotent = cache.is_cacheable(kwargs)
+        retries = self.retries if idempotent else 0
+        deadline = self._deadline()
+
+        attempt = 0
+        while True:
+            try:
+                return await self._aattempt(
+                    async_request_func, uri, args, kwargs, deadline, idempotent
+                )
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                if attempt >= retries or not self.retry_on(e):
+                    raise
+                delay = self.backoff_delay(attempt)
+                remaining = self._remaining(deadline)
+                if remaining is not None and delay >= remaining:
+                    raise
+                attempt += 1
+                if metrics.enabled:
+                    metrics.count("retries")
+                await asyncio.sleep(delay)
+
+    async def _aattempt(self, async_request_func, uri, args, kwargs, deadline, idempotent):
+        """ Internal method awaiting one, possibly hedged, request attempt. """
+        hedge_delay = self.current_hedge_delay() if idempotent else None
+        start = time.monotonic()
+        if hedge_delay is None:
+            coro = async_request_func(uri, *args, **kwargs)
+            if deadline is None:
+                result = await coro
+            else:
+                try:
+                    result = await asyncio.wait_for(coro, self._remaining(deadline))
+                except asyncio.TimeoutError:
+                    self._remaining(deadline)
+                    raise
+            self.observe(time.monotonic() - start)
+            return result
+
+        tasks = [asyncio.ensure_future(async_request_func(uri, *args, **kwargs))]
+        try:
+            remaining = self._remaining(deadline)
+            wait = hedge_delay if remaining is None else min(hedge_delay, remaining)
+            (done, _) = await asyncio.wait(tasks, timeout=wait)
+            if not done:
+                self._remaining(deadline)
+                if metrics.enabled:
+                    metrics.count("hedges")
+                tasks.append(asyncio.ensure_future(async_request_func(uri, *args, **kwargs)))
+
+            error = None
+            pending = set(tasks)
+            while pending:
+                (done, pending) = await asyncio.wait(
+                    pending,
+                    timeout=self._remaining(deadline),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self._remaining(deadline)
+                for task in done:
+                    if task.exception() is None:
+                        self.observe(time.monotonic() - start)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
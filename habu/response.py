@@ -0,0 +1,47 @@
+from habu import decoding
+
+
+class Response(object):
+    """ A response returned by a request function, along with its metadata.
+
+    Request functions may return a plain dictionary containing the decoded
+    HAL+JSON document. Returning a Response instead exposes the HTTP status
+    and headers to habu, which enables features such as conditional cache
+    revalidation using `ETag` and `Last-Modified` headers.
+
+    * `body` - The HAL+JSON document, either decoded or as raw JSON bytes.
+
+    * `headers` - A dictionary of response headers. Header names are
+    matched case-insensitively.
+
+    * `status` - The integer HTTP status code of the response.
+    """
+
+    def __init__(self, body=None, headers=None, status=200):
+        """ Initialize a new instance from a body, headers and status. """
+        self.body = body if body is not None else {}
+        self.headers = dict(
+            (key.lower(), value) for key, value in (headers or {}).items()
+        )
+        self.status = status
+
+    def header(self, name, default=None):
+        """ Return the value of a response header, ignoring case. """
+        return self.headers.get(name.lower(), default)
+
+    def __repr__(self):
+        """ Represent the current Response as a string. """
+        return "Response(status=%r, headers=%r)" % (self.status, self.headers)
+
+
+def response_body(result, decode=True):
+    """ Return the document of a request function result.
+
+    Raw JSON bodies (bytes or str) are decoded using `decoding.decode`,
+    unless `decode` is `False`.
+    """
+    if isinstance(result, Response):
+        result = result.body
+    if decode:
+        return decoding.decode(result)
+    return result
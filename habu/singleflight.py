@@ -0,0 +1,94 @@
+import asyncio
+import threading
+
+
+class _Call(object):
+    """ An in-flight call shared by every thread requesting the same key. """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """ Collapses concurrent calls with the same key into a single call.
+
+    The first caller of a key performs the call, while every caller arriving
+    before it finishes waits and receives the same result or exception.
+    Calls made after it finished are performed again. `do` is used from
+    threads and `ado` from asyncio coroutines; each event loop has its own
+    set of in-flight calls.
+    """
+
+    def __init__(self):
+        """ Initialize with no calls in flight. """
+        self._calls = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """ Return the result of `func()`, shared with concurrent callers of key. """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    async def ado(self, key, coro_func):
+        """ Await `coro_func()`, shared with concurrent callers of key.
+
+        When the coroutine performing the call is cancelled, the callers
+        waiting on it are not: one of them performs the call instead.
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+
+        future = self._tasks.get(task_key)
+        while future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Only the shared call was cancelled, not this waiter.
+                if not future.cancelled():
+                    raise
+            future = self._tasks.get(task_key)
+
+        future = loop.create_future()
+        self._tasks[task_key] = future
+        try:
+            result = await coro_func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieve it, so an exception nobody else waited on is not logged.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._tasks[task_key]
+
+    def __len__(self):
+        return len(self._calls) + len(self._tasks)
@@ -0,0 +1,213 @@
+import codecs
+import json
+import re
+
+
+default_chunk_size = 64 * 1024
+
+_outside_string = re.compile(r'["{}\[\]]')
+_inside_string = re.compile(r'["\\]')
+_scalar_end = re.compile(r'[,\]}\s]')
+_non_whitespace = re.compile(r'\S')
+
+
+def iter_chunks(stream, chunk_size=default_chunk_size):
+    """ Yield text chunks from bytes, str, a file-like object or an iterable.
+
+    Bytes are decoded incrementally as UTF-8, so multi-byte characters may be
+    split across chunks.
+    """
+    if isinstance(stream, (bytes, bytearray, str)):
+        chunks = iter([stream])
+    elif hasattr(stream, "read"):
+        chunks = iter(lambda: stream.read(chunk_size), stream.read(0))
+    else:
+        chunks = iter(stream)
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            yield chunk
+        elif chunk:
+            yield decoder.decode(bytes(chunk))
+
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+class Reader(object):
+    """ An incremental reader over the structure of a JSON document.
+
+    Only the part of the document which has not been consumed yet is kept in
+    `buffer`, starting at `pos`. Values may be skipped without holding them in
+    memory, or extracted and decoded one at a time.
+    """
+
+    def __init__(self, chunks):
+        """ Initialize the reader from an iterable of text chunks. """
+        self._chunks = iter(chunks)
+        self.buffer = ""
+        self.pos = 0
+
+    def fill(self):
+        """ Read the next chunk, dropping consumed text from the buffer.
+
+        Returns the number of characters dropped from the start of the
+        buffer, or raises a ValueError at the end of the stream.
+        """
+        for chunk in self._chunks:
+            if chunk:
+                trimmed = self.pos
+                self.buffer = self.buffer[trimmed:] + chunk
+                self.pos = 0
+                return trimmed
+        raise ValueError("unexpected end of JSON stream")
+
+    def peek(self):
+        """ Skip whitespace and return the next character without consuming it. """
+        while True:
+            match = _non_whitespace.search(self.buffer, self.pos)
+            if match:
+                self.pos = match.start()
+                return self.buffer[self.pos]
+            self.pos = len(self.buffer)
+            self.fill()
+
+    def expect(self, char):
+        """ Consume the next non-whitespace character, which must be `char`. """
+        found = self.peek()
+        if found != char:
+            raise ValueError(
+                "expected '%s' but found '%s' in JSON stream" % (char, found)
+            )
+        self.pos += 1
+
+    def value_end(self, keep=True):
+        """ Return the buffer index just past the value starting at `pos`.
+
+        When `keep` is `False` the text of the value is dropped from the
+        buffer while it is scanned, so skipping a large value uses no memory.
+        Otherwise the whole value stays buffered, starting at `pos`.
+        """
+        def more(i):
+            if not keep:
+                self.pos = i
+            return i - self.fill()
+
+        if self.peek() not in '{["':
+            i = self.pos
+            while True:
+                match = _scalar_end.search(self.buffer, i)
+                if match:
+                    return match.start()
+                i = more(len(self.buffer))
+
+        i = self.pos
+        depth = 0
+        in_string = False
+        while True:
+            pattern = _inside_string if in_string else _outside_string
+            match = pattern.search(self.buffer, i)
+            if match is None:
+                i = more(len(self.buffer))
+                continue
+
+            i = match.start()
+            char = self.buffer[i]
+            if in_string:
+                if char == "\\":
+                    if i + 1 >= len(self.buffer):
+                        i = more(i)
+                        continue
+                    i += 2
+                    continue
+                in_string = False
+                i += 1
+                if depth == 0:
+                    return i
+            elif char == '"':
+                in_string = True
+                i += 1
+            elif char in "{[":
+                depth += 1
+                i += 1
+            else:
+                depth -= 1
+                i += 1
+                if depth == 0:
+                    return i
+
+    def read_value(self):
+        """ Consume and decode the value starting at `pos`. """
+        end = self.value_end(keep=True)
+        value = json.loads(self.buffer[self.pos:end])
+        self.pos = end
+        return value
+
+    def skip_value(self):
+        """ Consume the value starting at `pos` without decoding it. """
+        self.pos = self.value_end(keep=False)
+
+    def iter_keys(self):
+        """ Consume an object, yielding each key once its value is next.
+
+        The caller must consume each value before requesting the next key.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+
+        while True:
+            if self.peek() != '"':
+                raise ValueError("expected an object key in JSON stream")
+            key = self.read_value()
+            self.expect(":")
+            self.peek()
+            yield key
+
+            if self.peek() == "}":
+                self.pos += 1
+                return
+            self.expect(",")
+
+    def iter_items(self):
+        """ Consume an array, yielding once each element is next.
+
+        The caller must consume each element before requesting the next one.
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+
+        while True:
+            yield
+            if self.peek() == "]":
+                self.pos += 1
+                return
+            self.expect(",")
+
+
+def iter_embedded_items(stream, rel, chunk_size=default_chunk_size):
+    """ Yield each `_embedded` item of type `rel` from a HAL+JSON stream.
+
+    Items are decoded into dictionaries one at a time, as soon as each one
+    has been read, so only a single item is held in memory at once. Other
+    parts of the document are skipped without being decoded.
+    """
+    reader = Reader(iter_chunks(stream, chunk_size))
+    for key in reader.iter_keys():
+        if key != "_embedded" or reader.peek() != "{":
+            reader.skip_value()
+            continue
+
+        for name in reader.iter_keys():
+            if name != rel:
+                reader.skip_value()
+            elif reader.peek() == "[":
+                for _ in reader.iter_items():
+                    yield reader.read_value()
+            else:
+                yield reader.read_value()
@@ -0,0 +1,186 @@
+import os
+import tempfile
+import unittest
+
+import habu
+from habu import cache
+
+
+class RecordingRequestFunc(object):
+    """ A request function recording its calls and replaying responses. """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def __call__(self, uri, *args, **kwargs):
+        self.calls.append((uri, args, kwargs))
+        if len(self.responses) > 1:
+            return self.responses.pop(0)
+        return self.responses[0]
+
+
+class MemoryCache(unittest.TestCase):
+    """ Test suite for the cache.MemoryCache class.  """
+
+    def test_hit_and_miss(self):
+        """ Assert a repeated request is answered from the cache. """
+        request_func = RecordingRequestFunc({"name": "Curtis"})
+        c = cache.MemoryCache()
+
+        first = c.fetch(request_func, "/people/1", (), {})
+        second = c.fetch(request_func, "/people/1", (), {})
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(request_func.calls), 1)
+        self.assertEqual(c.stats.hits, 1)
+        self.assertEqual(c.stats.misses, 1)
+
+    def test_key_includes_arguments(self):
+        """ Assert requests with different arguments are cached separately. """
+        request_func = RecordingRequestFunc({})
+        c = cache.MemoryCache()
+
+        c.fetch(request_func, "/people", (), {"page": 1})
+        c.fetch(request_func, "/people", (), {"page": 2})
+
+        self.assertEqual(len(request_func.calls), 2)
+
+    def test_uncacheable_method(self):
+        """ Assert non-GET requests always reach the request function. """
+        request_func = RecordingRequestFunc({})
+        c = cache.MemoryCache()
+
+        c.fetch(request_func, "/people", (), {"method": "post"})
+        c.fetch(request_func, "/people", (), {"method": "post"})
+
+        self.assertEqual(len(request_func.calls), 2)
+        self.assertEqual(len(c), 0)
+
+    def test_lru_eviction(self):
+        """ Assert the least recently used entry is evicted when full. """
+        request_func = RecordingRequestFunc({})
+        c = cache.MemoryCache(maxsize=2)
+
+        for uri in ["/a", "/b", "/a", "/c"]:
+            c.fetch(request_func, uri, (), {})
+
+        self.assertIsNone(c.get(cache.make_key("/b", (), {})))
+        self.assertIsNotNone(c.get(cache.make_key("/a", (), {})))
+        self.assertEqual(c.stats.evictions, 1)
+
+    def test_ttl_expiry(self):
+        """ Assert an entry past its ttl is fetched again. """
+        request_func = RecordingRequestFunc({})
+        c = cache.MemoryCache(ttl=0)
+
+        c.fetch(request_func, "/a", (), {})
+        c.fetch(request_func, "/a", (), {})
+
+        self.assertEqual(len(request_func.calls), 2)
+
+    def test_conditional_revalidation(self):
+        """ Assert a stale entry with an ETag is revalidated by a 304. """
+        request_func = RecordingRequestFunc(
+            habu.Response({"name": "Curtis"}, {"ETag": '"v1"', "Cache-Control": "no-cache"}),
+            habu.Response(None, {}, status=304),
+        )
+        c = cache.MemoryCache()
+
+        c.fetch(request_func, "/people/1", (), {})
+        body = c.fetch(request_func, "/people/1", (), {})
+
+        self.assertEqual(body, {"name": "Curtis"})
+        self.assertEqual(request_func.calls[1][2], {"headers": {"If-None-Match": '"v1"'}})
+        self.assertEqual(c.stats.revalidations, 1)
+
+    def test_max_age_and_no_store(self):
+        """ Assert Cache-Control max-age and no-store are honoured. """
+        c = cache.MemoryCache(ttl=0)
+        request_func = RecordingRequestFunc(
+            habu.Response({}, {"Cache-Control": "max-age=300"})
+        )
+        c.fetch(request_func, "/a", (), {})
+        c.fetch(request_func, "/a", (), {})
+        self.assertEqual(len(request_func.calls), 1)
+
+        request_func = RecordingRequestFunc(
+            habu.Response({}, {"Cache-Control": "no-store"})
+        )
+        c.fetch(request_func, "/b", (), {})
+        self.assertIsNone(c.get(cache.make_key("/b", (), {})))
+
+
+class SqliteCache(unittest.TestCase):
+    """ Test suite for the cache.SqliteCache class.  """
+
+    def setUp(self):
+        (handle, self.path) = tempfile.mkstemp(suffix=".sqlite")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_persists_entries(self):
+        """ Assert entries survive reopening the database. """
+        request_func = RecordingRequestFunc({"name": "Curtis"})
+
+        c = cache.SqliteCache(self.path)
+        c.fetch(request_func, "/people/1", (), {})
+        c.close()
+
+        c = cache.SqliteCache(self.path)
+        self.assertEqual(c.fetch(request_func, "/people/1", (), {}), {"name": "Curtis"})
+        self.assertEqual(len(request_func.calls), 1)
+        c.close()
+
+    def test_lru_eviction(self):
+        """ Assert the database is kept within its maxsize. """
+        request_func = RecordingRequestFunc({})
+        c = cache.SqliteCache(self.path, maxsize=2)
+
+        for uri in ["/a", "/b", "/c"]:
+            c.fetch(request_func, uri, (), {})
+
+        self.assertEqual(len(c), 2)
+        self.assertIsNone(c.get(cache.make_key("/a", (), {})))
+        c.close()
+
+
+class SetCache(unittest.TestCase):
+    """ Test suite for using a cache beneath Link calls.  """
+
+    def setUp(self):
+        self._original_request_func = habu._request_func
+
+    def tearDown(self):
+        habu._request_func = self._original_request_func
+        habu.set_cache(None)
+
+    def test_invalid_cache(self):
+        """ Assert raised error when setting something other than a cache. """
+        with self.assertRaises(TypeError):
+            habu.set_cache({})
+
+    def test_link_call_uses_cache(self):
+        """ Assert repeated Link calls only perform one request. """
+        request_func = RecordingRequestFunc({
+            "_links": {
+                "self": {"href": "/"},
+                "curies": [{"name": "doc", "href": "/docs/{rel}", "templated": True}],
+            }
+        })
+        habu.set_request_func(request_func)
+        habu.set_cache(cache.MemoryCache())
+
+        link = habu.Link()
+        link.href = "/"
+        first = link()
+        second = link()
+
+        self.assertEqual(len(request_func.calls), 1)
+        self.assertEqual(sorted(first.links._curies), sorted(second.links._curies))
+
+
+if __name__ == '__main__':
+    unittest.main()
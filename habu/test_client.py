@@ -0,0 +1,262 @@
+import asyncio
+import http.server
+import json
+import threading
+import time
+import unittest
+
+import habu
+from habu import client
+
+
+PEOPLE = {
+    "_links": {"self": {"href": "/people"}},
+    "_embedded": {
+        "people": [
+            {"_links": {"self": {"href": "/people/%i" % i}}, "name": "person %i" % i}
+            for i in range(500)
+        ]
+    },
+}
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """ A keep-alive stand-in HAL+JSON server. """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, document):
+        data = json.dumps(document).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/hal+json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        self.server.paths.append(self.path)
+        if self.path == "/missing":
+            self._send(404, {"message": "not found"})
+        elif self.path == "/bad-gateway":
+            self.server.bad_gateways += 1
+            data = b"<html><body>502 Bad Gateway</body></html>"
+            self.send_response(502)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif self.path.split("?")[0] == "/collection":
+            self._send(200, PEOPLE)
+        elif self.path == "/stale":
+            # Close the connection without telling the client, as servers
+            # dropping idle kept-alive connections do.
+            self._send(200, {"method": "GET"})
+            self.close_connection = True
+        else:
+            self._send(200, {
+                "_links": {"self": {"href": self.path}},
+                "method": "GET",
+            })
+
+    def do_POST(self):
+        self.server.connections.add(self.client_address)
+        self.server.posts += 1
+        length = int(self.headers.get("Content-Length", 0))
+        document = json.loads(self.rfile.read(length))
+        self._send(201, {"method": "POST", "received": document})
+
+
+class MakeRequestFunc(unittest.TestCase):
+    """ Test suite for the client.make_request_func function.  """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.server.connections = set()
+        cls.server.posts = 0
+        cls.server.bad_gateways = 0
+        cls.server.paths = []
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = "http://127.0.0.1:%i" % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.connections.clear()
+        self.server.posts = 0
+        self.server.bad_gateways = 0
+        self.server.paths = []
+        self.request_func = client.make_request_func(self.base_url, maxsize=2)
+
+    def tearDown(self):
+        self.request_func.pools.close()
+
+    def test_get(self):
+        """ Assert a GET request returns a Response with the decoded document. """
+        response = self.request_func("/people")
+
+        self.assertIsInstance(response, habu.Response)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.body["_links"]["self"]["href"], "/people")
+        self.assertEqual(response.header("etag"), '"v1"')
+
+    def test_keep_alive(self):
+        """ Assert sequential requests reuse a single connection. """
+        for _ in range(5):
+            self.request_func("/people")
+
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_concurrent_requests_bounded(self):
+        """ Assert concurrent requests never open more than maxsize connections. """
+        threads = [
+            threading.Thread(target=self.request_func, args=("/people/%i" % i,))
+            for i in range(10)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertLessEqual(len(self.server.connections), 2)
+
+    def test_method_dispatch(self):
+        """ Assert the method and JSON body are sent. """
+        response = self.request_func("/people", method="post", json={"name": "Ada"})
+
+        self.assertEqual(response.status, 201)
+        self.assertEqual(response.body, {"method": "POST", "received": {"name": "Ada"}})
+
+    def test_stale_connection_retried_for_get(self):
+        """ Assert a GET on a connection closed by the server is sent again. """
+        self.request_func("/stale")
+        time.sleep(0.1)
+
+        self.assertEqual(self.request_func("/people/1").status, 200)
+
+    def test_stale_connection_not_retried_for_post(self):
+        """ Assert a POST on a connection closed by the server is not resent. """
+        self.request_func("/stale")
+        time.sleep(0.1)
+
+        with self.assertRaises(client._stale_connection_errors):
+            self.request_func("/people", method="POST", json={"name": "Ada"})
+        self.assertEqual(self.server.posts, 0)
+
+    def test_stream(self):
+        """ Assert a streamed body is returned as chunks of raw bytes. """
+        response = self.request_func("/collection", stream=True)
+        chunks = list(response.body)
+
+        self.assertIsInstance(response.body, client.ResponseStream)
+        self.assertEqual(json.loads(b"".join(chunks)), PEOPLE)
+
+        # The connection was released, and is reused.
+        self.request_func("/people/1")
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_stream_error_status(self):
+        """ Assert raised error for an error status while streaming. """
+        with self.assertRaises(client.HTTPError) as context:
+            self.request_func("/missing", stream=True)
+
+        self.assertEqual(context.exception.response.body, {"message": "not found"})
+
+    def test_error_status(self):
+        """ Assert raised error for an error status. """
+        with self.assertRaises(client.HTTPError) as context:
+            self.request_func("/missing")
+
+        self.assertEqual(context.exception.status, 404)
+        self.assertEqual(context.exception.response.body, {"message": "not found"})
+
+    def test_error_status_non_json_body(self):
+        """ Assert raised error for an error status with a body which is not JSON. """
+        with self.assertRaises(client.HTTPError) as context:
+            self.request_func("/bad-gateway")
+
+        self.assertEqual(context.exception.status, 502)
+        self.assertEqual(
+            context.exception.response.body, "<html><body>502 Bad Gateway</body></html>"
+        )
+
+    def test_error_status_non_json_body_retried(self):
+        """ Assert a Policy retries an error status with a body which is not JSON. """
+        request_func = habu.Policy(retries=2, backoff=0).wrap(self.request_func)
+
+        with self.assertRaises(client.HTTPError):
+            request_func("/bad-gateway")
+        self.assertEqual(self.server.bad_gateways, 3)
+
+    def test_relative_uri_without_base_url(self):
+        """ Assert raised error for a relative uri without a base_url. """
+        with self.assertRaises(ValueError):
+            client.make_request_func()("/people")
+
+    def test_link_call(self):
+        """ Assert Link calls work through the built-in request function. """
+        original = habu._request_func
+        habu.set_request_func(self.request_func)
+        try:
+            link = habu.Link()
+            link.href = "/people"
+            resource = link()
+        finally:
+            habu._request_func = original
+
+        self.assertEqual(resource.method, "GET")
+        self.assertEqual(resource.links.self.href, "/people")
+
+    def test_link_stream(self):
+        """ Assert Link.stream parses the body streamed by the built-in client. """
+        session = habu.Session(self.request_func)
+        link = habu.Link()
+        link.href = "/collection"
+        link._session = session
+
+        names = [person.name for person in link.stream("people")]
+        self.assertEqual(names, ["person %i" % i for i in range(500)])
+
+    def test_paginate_page_size(self):
+        """ Assert page_size expands the template of the first Link. """
+        session = habu.Session(self.request_func)
+        link = habu.Link()
+        link.href = "/collection{?page_size}"
+        link.templated = True
+        link._session = session
+
+        people = list(habu.paginate(link, rel="people", page_size=5))
+
+        self.assertEqual(len(people), 500)
+        self.assertEqual(self.server.paths, ["/collection?page_size=5"])
+
+    def test_paginate_page_size_not_templated(self):
+        """ Assert raised error for page_size with a Link not declaring it. """
+        session = habu.Session(self.request_func)
+        link = habu.Link()
+        link.href = "/collection"
+        link._session = session
+
+        with self.assertRaises(ValueError):
+            next(habu.paginate(link, rel="people", page_size=5))
+
+        link.href = "/collection{?page}"
+        link.templated = True
+        with self.assertRaises(ValueError):
+            next(habu.paginate(link, rel="people", page_size=5))
+        with self.assertRaises(ValueError):
+            asyncio.run(habu.apaginate(link, rel="people", page_size=5).__anext__())
+        self.assertEqual(self.server.paths, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import json
+import unittest
+
+import habu
+from habu import decoding
+
+
+class Decode(unittest.TestCase):
+    """ Test suite for the decoding.decode function.  """
+
+    def test_raw_bodies(self):
+        """ Assert bytes, bytearray, memoryview and str bodies are decoded. """
+        raw = '{"name": "Zoë"}'
+        for data in [raw, raw.encode("utf-8"), bytearray(raw.encode("utf-8")),
+                     memoryview(raw.encode("utf-8"))]:
+            self.assertEqual(decoding.decode(data), {"name": "Zoë"})
+
+    def test_decoded_document(self):
+        """ Assert an already decoded document is returned as-is. """
+        document = {"name": "Curtis"}
+
+        self.assertIs(decoding.decode(document), document)
+
+
+class SetJsonDecoder(unittest.TestCase):
+    """ Test suite for habu.set_json_decoder and decoding Link responses.  """
+
+    def setUp(self):
+        self._original_request_func = habu._request_func
+        self._original_decoder = decoding.decoder
+
+    def tearDown(self):
+        habu._request_func = self._original_request_func
+        decoding.decoder = self._original_decoder
+
+    def test_invalid_decoder(self):
+        """ Assert raised error for a non-callable decoder. """
+        with self.assertRaises(TypeError):
+            habu.set_json_decoder("json")
+
+    def test_default_decoder(self):
+        """ Assert None restores the default decoder. """
+        habu.set_json_decoder(json.loads)
+        habu.set_json_decoder(None)
+
+        self.assertEqual(decoding.decoder, decoding.default_decoder())
+
+    def test_link_call_decodes_bytes(self):
+        """ Assert a request function may return raw bytes or a raw Response. """
+        calls = []
+
+        def decoder(data):
+            calls.append(data)
+            return json.loads(data)
+
+        habu.set_json_decoder(decoder)
+        for body in [b'{"name": "Ada"}', habu.Response(b'{"name": "Ada"}')]:
+            habu.set_request_func(lambda uri, *args, **kwargs: body)
+            link = habu.Link()
+            link.href = "/people/2"
+
+            self.assertEqual(link().name, "Ada")
+        self.assertEqual(len(calls), 2)
+
+
+DOCUMENT = {
+    "_links": {
+        "curies": [{"name": "doc", "href": "/docs/{rel}", "templated": True}],
+        "self": {"href": "/people"},
+        "doc:search": {"href": "/people{?q}", "templated": True},
+    },
+    "_embedded": {
+        "people": [
+            {
+                "_links": {"self": {"href": "/people/1"}},
+                "_embedded": {"pets": [{"name": "Rex", "tags": [{"a": 1}]}]},
+                "name": "Curtis",
+                "address": {"city": "Springfield", "geo": {"lat": 1.5}},
+            },
+            {"name": "Ada", "langs": ["en", {"code": "fr"}]},
+        ]
+    },
+    "total": 2,
+    "meta": {"nested": {"deeper": [1, 2, {"x": None}]}},
+}
+
+
+def as_comparable(resource):
+    """ Return a plain structure describing a Resource tree, for comparisons. """
+    return {
+        "state": resource._state,
+        "state_types": sorted(
+            (key, value.__class__.__name__) for key, value in resource._state.items()
+        ),
+        "links": dict(
+            (name, (link.href, link._rel, link.templated, link.name,
+                    link._documentation and link._documentation.href))
+            for name, link in resource.links._links.items()
+        ),
+        "curies": sorted(resource.links._curies),
+        "embedded": dict(
+            (name, [as_comparable(r) for r in items])
+            for name, items in resource.embedded._resources.items()
+        ),
+    }
+
+
+class HalHook(unittest.TestCase):
+    """ Test suite for habu.hal_hook and habu.loads.  """
+
+    def test_identical_to_resource(self):
+        """ Assert the hooked Resource matches Resource(json.loads(...)). """
+        raw = json.dumps(DOCUMENT)
+
+        expected = habu.Resource(json.loads(raw), lazy=False)
+        hooked = json.loads(raw, object_pairs_hook=habu.hal_hook)
+
+        self.assertIsInstance(hooked, habu.Resource)
+        self.assertEqual(as_comparable(hooked), as_comparable(expected))
+        self.assertIsInstance(hooked.meta.nested, habu.DictionaryWrapper)
+        self.assertIsInstance(hooked.embedded.people[1], habu.Resource)
+
+    def test_loads_without_links(self):
+        """ Assert loads returns a Resource for a document without links. """
+        resource = habu.loads(b'{"name": "Curtis", "pet": {"name": "Rex"}}')
+
+        self.assertIsInstance(resource, habu.Resource)
+        self.assertEqual(resource.pet.name, "Rex")
+
+    def test_loads_non_object(self):
+        """ Assert raised error for a document which is not an object. """
+        with self.assertRaises(TypeError):
+            habu.loads("[1, 2]")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,999 @@
+import asyncio
+import concurrent.futures
+import copy
+import gc
+import pickle
+import unittest
+import warnings
+import weakref
+
+import habu
+from habu import cache
+
+
+ROUTES = {
+    "/": {
+        "_links": {
+            "people": {"href": "/people"},
+            "person": {"href": "/people/{id}", "templated": True},
+        }
+    },
+    "/people": {
+        "_links": {"self": {"href": "/people"}},
+        "_embedded": {
+            "people": [
+                {"_links": {"self": {"href": "/people/1"}}, "name": "Curtis"},
+                {"_links": {"self": {"href": "/people/2"}}, "name": "Ada"},
+            ]
+        },
+        "total": 2,
+    },
+    "/people/1": {"_links": {"self": {"href": "/people/1"}}, "name": "Curtis"},
+    "/people/2": {"_links": {"self": {"href": "/people/2"}}, "name": "Ada"},
+}
+
+
+def fake_request_func(uri, *args, **kwargs):
+    """ Serve a response from the in-memory routes. """
+    return ROUTES[uri]
+
+
+async def fake_async_request_func(uri, *args, **kwargs):
+    """ Serve a response from the in-memory routes, yielding to the loop. """
+    await asyncio.sleep(0)
+    return ROUTES[uri]
+
+
+class HabuTestCase(unittest.TestCase):
+    """ Base test case restoring the module-level configuration of habu. """
+
+    def setUp(self):
+        self._original_request_func = habu._request_func
+        self._original_async_request_func = habu._async_request_func
+
+    def tearDown(self):
+        habu._request_func = self._original_request_func
+        habu._async_request_func = self._original_async_request_func
+        habu.use_entry_cache(None)
+        habu.use_lazy_resources(False)
+        habu.use_strict_parsing(True)
+        habu.set_policy(None)
+        habu._rel_policies.clear()
+        habu.use_identity_map(None)
+        habu.use_missing_embedded_fallback(True)
+
+
+class AsyncRequests(HabuTestCase):
+    """ Test suite for awaitable Link calls and habu.aenter.  """
+
+    def setUp(self):
+        super(AsyncRequests, self).setUp()
+        habu.set_request_func(fake_request_func)
+        habu.set_async_request_func(fake_async_request_func)
+
+    def test_set_async_request_func_not_callable(self):
+        """ Assert raised error when setting a non-callable request function. """
+        with self.assertRaises(TypeError):
+            habu.set_async_request_func("not callable")
+
+    def test_acall_without_request_func(self):
+        """ Assert raised error when awaiting a Link with no request function. """
+        habu._async_request_func = None
+        link = habu.Link()
+        link.href = "/people"
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(link.acall())
+
+    def test_aenter_matches_enter(self):
+        """ Assert aenter returns the same links as the sync enter. """
+        sync_links = habu.enter("/")
+        async_links = asyncio.run(habu.aenter("/"))
+
+        self.assertEqual(
+            sorted(async_links._links.keys()),
+            sorted(sync_links._links.keys())
+        )
+
+    def test_acall_templated(self):
+        """ Assert an awaited templated Link expands its URI and returns a Resource. """
+        async def traverse():
+            api = await habu.aenter("/")
+            return await api.person.acall(id=2)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            person = asyncio.run(traverse())
+
+        self.assertIsInstance(person, habu.Resource)
+        self.assertEqual(person.name, "Ada")
+
+    def test_concurrent_acall(self):
+        """ Assert many Links may be awaited concurrently on one event loop. """
+        async def traverse():
+            api = await habu.aenter("/")
+            people = await api.people.acall()
+            return await asyncio.gather(
+                *[p.links.self.acall() for p in people.embedded.people]
+            )
+
+        people = asyncio.run(traverse())
+
+        self.assertEqual([p.name for p in people], ["Curtis", "Ada"])
+
+
+class FollowAll(HabuTestCase):
+    """ Test suite for habu.follow_all and habu.afollow_all.  """
+
+    def setUp(self):
+        super(FollowAll, self).setUp()
+        habu.set_request_func(fake_request_func)
+        habu.set_async_request_func(fake_async_request_func)
+        self.people = habu.enter("/").people()
+
+    def test_preserves_order(self):
+        """ Assert the followed Resources are returned in input order. """
+        results = habu.follow_all(self.people.embedded.people, "self", max_workers=2)
+
+        self.assertEqual([r.name for r in results], ["Curtis", "Ada"])
+
+    def test_per_item_errors(self):
+        """ Assert a failing item is reported without aborting the batch. """
+        broken = habu.Resource({"_links": {"self": {"href": "/missing"}}})
+        resources = [self.people.embedded.people[0], broken]
+
+        results = habu.follow_all(resources, "self")
+
+        self.assertEqual(results[0].name, "Curtis")
+        self.assertIsInstance(results[1], KeyError)
+
+    def test_invalid_max_workers(self):
+        """ Assert raised error for a non-positive max_workers. """
+        with self.assertRaises(ValueError):
+            habu.follow_all([], "self", max_workers=0)
+
+    def test_resource_container(self):
+        """ Assert ResourceContainer.follow_all follows an embedded type. """
+        results = self.people.embedded.follow_all("people", "self")
+
+        self.assertEqual([r.name for r in results], ["Curtis", "Ada"])
+
+    def test_afollow_all(self):
+        """ Assert afollow_all awaits every Link and reports errors in place. """
+        broken = habu.Resource({"_links": {}})
+        resources = list(self.people.embedded.people) + [broken]
+
+        results = asyncio.run(habu.afollow_all(resources, "self", max_concurrency=1))
+
+        self.assertEqual([r.name for r in results[:2]], ["Curtis", "Ada"])
+        self.assertIsInstance(results[2], AttributeError)
+
+
+class EntryCache(HabuTestCase):
+    """ Test suite for memoizing habu.enter.  """
+
+    def setUp(self):
+        super(EntryCache, self).setUp()
+        self.calls = []
+
+        def request_func(uri, *args, **kwargs):
+            self.calls.append(uri)
+            return fake_request_func(uri, *args, **kwargs)
+        habu.set_request_func(request_func)
+
+    def test_disabled_by_default(self):
+        """ Assert enter performs a request every call unless enabled. """
+        habu.enter("/")
+        habu.enter("/")
+
+        self.assertEqual(self.calls, ["/", "/"])
+
+    def test_memoized(self):
+        """ Assert enter returns the same LinkContainer without a request. """
+        habu.use_entry_cache(ttl=60)
+
+        first = habu.enter("/")
+        second = habu.enter("/")
+
+        self.assertIs(first, second)
+        self.assertEqual(self.calls, ["/"])
+
+    def test_expired(self):
+        """ Assert an expired entry point is requested again. """
+        habu.use_entry_cache(ttl=0)
+
+        habu.enter("/")
+        habu.enter("/")
+
+        self.assertEqual(self.calls, ["/", "/"])
+
+    def test_invalidate(self):
+        """ Assert invalidate forces the next enter to perform a request. """
+        habu.use_entry_cache(ttl=60)
+
+        first = habu.enter("/")
+        habu.invalidate("/")
+        second = habu.enter("/")
+
+        self.assertIsNot(first, second)
+        self.assertEqual(self.calls, ["/", "/"])
+
+    def test_invalid_ttl(self):
+        """ Assert raised error for a negative ttl. """
+        with self.assertRaises(ValueError):
+            habu.use_entry_cache(ttl=-1)
+
+    def test_disable_keeps_response_cache(self):
+        """ Assert disabling only empties the entry cache. """
+        response_cache = cache.MemoryCache()
+        habu.set_cache(response_cache)
+        self.addCleanup(habu.set_cache, None)
+        habu.use_entry_cache(ttl=60)
+
+        first = habu.enter("/")
+        habu.use_entry_cache(None)
+        self.assertEqual(len(response_cache), 1)
+
+        second = habu.enter("/")
+        self.assertIsNot(first, second)
+        self.assertEqual(self.calls, ["/"])
+
+
+class LazyResources(HabuTestCase):
+    """ Test suite for lazily unserialized Resources.  """
+
+    def test_state_is_eager(self):
+        """ Assert the state is available while links are still deferred. """
+        resource = habu.Resource(ROUTES["/people"], lazy=True)
+
+        self.assertEqual(resource.total, 2)
+        self.assertIsNotNone(resource.links._pending)
+        self.assertEqual(resource.embedded._resources, {})
+
+    def test_links_on_access(self):
+        """ Assert deferred links are unserialized when first accessed. """
+        resource = habu.Resource(ROUTES["/people"], lazy=True)
+
+        self.assertEqual(resource.links.self.href, "/people")
+        self.assertIsNone(resource.links._pending)
+
+    def test_embedded_on_access(self):
+        """ Assert embedded resources are unserialized per type on access. """
+        resource = habu.Resource(ROUTES["/people"], lazy=True)
+
+        self.assertTrue(resource.embedded.contains("people"))
+        self.assertEqual(resource.embedded.resource_names(), ["people"])
+
+        people = resource.embedded.people
+        self.assertEqual([p.name for p in people], ["Curtis", "Ada"])
+        self.assertIs(resource.embedded.people, people)
+        self.assertTrue(people[0]._lazy)
+
+    def test_unrelated_resources_do_not_contend(self):
+        """ Assert materializing one Resource never waits on another one. """
+        busy = habu.Resource(ROUTES["/people"], lazy=True)
+        other = habu.Resource(ROUTES["/people"], lazy=True)
+
+        with busy.links._lock, busy.embedded._lock:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+                future = pool.submit(lambda: (other.links.self, other.embedded.people))
+                (self_link, people) = future.result(timeout=5)
+
+        self.assertEqual(self_link.href, "/people")
+        self.assertEqual(len(people), 2)
+
+    def test_global_setting(self):
+        """ Assert use_lazy_resources changes the default for new Resources. """
+        habu.use_lazy_resources()
+        self.assertTrue(habu.Resource({})._lazy)
+
+        habu.use_lazy_resources(False)
+        self.assertFalse(habu.Resource({})._lazy)
+
+        with self.assertRaises(TypeError):
+            habu.use_lazy_resources("yes")
+
+
+class LinkAttributes(unittest.TestCase):
+    """ Test suite for the slotted habu.Link and habu.CURIE classes.  """
+
+    def test_no_instance_dict(self):
+        """ Assert Links and CURIEs do not carry a per-instance __dict__. """
+        self.assertFalse(hasattr(habu.Link(), "__dict__"))
+        self.assertFalse(hasattr(habu.CURIE(), "__dict__"))
+
+    def test_unserialize_warns_on_invalid_attribute(self):
+        """ Assert unknown attributes warn and are not set. """
+        link = habu.Link()
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            link.unserialize({"href": "/people", "bogus": 1})
+
+        self.assertEqual(link.href, "/people")
+        self.assertEqual(len(caught), 1)
+        self.assertFalse(hasattr(link, "bogus"))
+
+    def test_curie_resolve(self):
+        """ Assert a CURIE resolves a documentation Link for a Link. """
+        curie = habu.CURIE()
+        curie.unserialize({"name": "doc", "href": "/docs/{rel}", "templated": True})
+        link = habu.Link()
+        link._rel = "people"
+
+        documentation = curie.resolve(link)
+
+        self.assertEqual(documentation.href, "/docs/people")
+        self.assertEqual(documentation.name, "doc:people")
+        self.assertFalse(documentation.templated)
+
+
+class LazyDictionaryWrapper(unittest.TestCase):
+    """ Test suite for the habu.LazyDictionaryWrapper class.  """
+
+    def test_wraps_on_access(self):
+        """ Assert nested dicts are stored raw and wrapped once when accessed. """
+        nested = {"amount": 5, "currency": {"code": "USD"}}
+        wrapper = habu.LazyDictionaryWrapper({"price": nested})
+
+        self.assertIs(dict.__getitem__(wrapper, "price"), nested)
+
+        price = wrapper.price
+        self.assertIsInstance(price, habu.DictionaryWrapper)
+        self.assertEqual(price.currency.code, "USD")
+        self.assertIs(wrapper.price, price)
+
+    def test_lists(self):
+        """ Assert dicts inside lists are wrapped when the list is accessed. """
+        wrapper = habu.LazyDictionaryWrapper({"tags": [{"name": "a"}, "b"]})
+
+        self.assertEqual(wrapper.tags[0].name, "a")
+        self.assertEqual(wrapper.tags[1], "b")
+
+    def test_lists_wrapped_once(self):
+        """ Assert repeated reads of a list return the same, modifiable list. """
+        resource = habu.Resource({"items": [{"name": "a"}]}, lazy=True)
+        items = resource.items
+        alias = resource.items
+
+        self.assertIs(alias, items)
+        self.assertIs(resource.items[0], items[0])
+
+        items.append("b")
+        self.assertEqual(resource.items, [{"name": "a"}, "b"])
+
+        copy = pickle.loads(pickle.dumps(resource))
+        self.assertIsInstance(copy.items[0], habu.DictionaryWrapper)
+
+    def test_does_not_modify_source(self):
+        """ Assert modifying the wrapper leaves the source dicts untouched. """
+        source = {"price": {"amount": 5}}
+        wrapper = habu.LazyDictionaryWrapper(source)
+
+        wrapper.price.amount = 10
+        wrapper["extra"] = True
+
+        self.assertEqual(source, {"price": {"amount": 5}})
+
+    def test_lazy_resource_state(self):
+        """ Assert a lazy Resource keeps dot-access to its nested state. """
+        resource = habu.Resource({"price": {"amount": 5}}, lazy=True)
+        resource.update({"price": {"amount": 7}})
+
+        self.assertIsInstance(resource._state, habu.LazyDictionaryWrapper)
+        self.assertEqual(resource.price.amount, 7)
+
+        resource.update({"price": {"amount": 9}}, partial=False)
+        self.assertEqual(resource.price.amount, 9)
+
+
+PAGES = {
+    "/items?page=1": {
+        "_links": {"next": {"href": "/items?page=2"}},
+        "_embedded": {"items": [{"n": 1}, {"n": 2}]},
+    },
+    "/items?page=2": {
+        "_links": {"next": {"href": "/items?page=3"}},
+        "_embedded": {"items": [{"n": 3}]},
+    },
+    "/items?page=3": {
+        "_links": {},
+        "_embedded": {"items": [{"n": 4}]},
+    },
+}
+
+
+class Paginate(HabuTestCase):
+    """ Test suite for habu.paginate and habu.apaginate.  """
+
+    def setUp(self):
+        super(Paginate, self).setUp()
+        self.calls = []
+
+        def request_func(uri, *args, **kwargs):
+            self.calls.append((uri, kwargs))
+            if uri.startswith("/items?page_size") or uri == "/items":
+                return PAGES["/items?page=1"]
+            return PAGES[uri]
+
+        async def async_request_func(uri, *args, **kwargs):
+            return request_func(uri, *args, **kwargs)
+
+        habu.set_request_func(request_func)
+        habu.set_async_request_func(async_request_func)
+
+        self.link = habu.Link()
+        self.link.href = "/items{?page_size}"
+        self.link.templated = True
+
+    def test_all_pages(self):
+        """ Assert the items of every page are yielded in order. """
+        for prefetch in (True, False):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                items = list(habu.paginate(self.link, prefetch=prefetch))
+            self.assertEqual([i.n for i in items], [1, 2, 3, 4])
+
+    def test_page_size_and_max_pages(self):
+        """ Assert page_size reaches the first call and max_pages stops early. """
+        items = list(habu.paginate(self.link, page_size=2, max_pages=2))
+
+        self.assertEqual([i.n for i in items], [1, 2, 3])
+        self.assertEqual(
+            [uri for (uri, _) in self.calls],
+            ["/items?page_size=2", "/items?page=2"]
+        )
+
+    def test_from_resource(self):
+        """ Assert pagination may start from an already retrieved Resource. """
+        page = habu.Resource(PAGES["/items?page=2"])
+
+        items = list(habu.paginate(page))
+
+        self.assertEqual([i.n for i in items], [3, 4])
+
+    def test_invalid_start(self):
+        """ Assert raised error when starting from something else. """
+        with self.assertRaises(TypeError):
+            list(habu.paginate("/items"))
+
+    def test_apaginate(self):
+        """ Assert apaginate yields the items of every page. """
+        async def collect():
+            return [i.n async for i in habu.apaginate(self.link)]
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            self.assertEqual(asyncio.run(collect()), [1, 2, 3, 4])
+
+
+class TrustedParsing(HabuTestCase):
+    """ Test suite for parsing Resources with strict=False.  """
+
+    DOCUMENT = {
+        "_links": {
+            "curies": [{"name": "doc", "href": "/docs"}],
+            "self": {"href": "/people/1", "bogus": True},
+            "doc:pets": {"href": "/people/1/pets"},
+        },
+        "_embedded": {"pets": [{"_links": {"up": {"bogus": 1}}, "name": "Rex"}]},
+        "name": "Curtis",
+    }
+
+    def test_strict_warns(self):
+        """ Assert strict parsing warns about the invalid document. """
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            habu.Resource(self.DOCUMENT, strict=True)
+
+        self.assertEqual(len(caught), 4)
+
+    def test_trusted_does_not_warn(self):
+        """ Assert trusted parsing yields the same data without warnings. """
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            resource = habu.Resource(self.DOCUMENT, strict=False)
+
+        self.assertEqual(caught, [])
+        self.assertEqual(resource.links.self.href, "/people/1")
+        self.assertEqual(resource.links.pets._documentation.href, "/docs")
+        self.assertEqual(resource.embedded.pets[0].name, "Rex")
+        self.assertFalse(resource.embedded.pets[0]._strict)
+
+    def test_global_setting(self):
+        """ Assert use_strict_parsing changes the default for new Resources. """
+        habu.use_strict_parsing(False)
+        self.assertFalse(habu.Resource({})._strict)
+        self.assertFalse(habu.LinkContainer()._strict)
+        self.assertFalse(habu.ResourceContainer()._strict)
+
+        with self.assertRaises(TypeError):
+            habu.use_strict_parsing(0)
+
+
+class Policies(HabuTestCase):
+    """ Test suite for request policies configured with habu.set_policy.  """
+
+    def setUp(self):
+        super(Policies, self).setUp()
+        self.failures = {"/people": 1}
+
+        def flaky(uri, *args, **kwargs):
+            if self.failures.get(uri):
+                self.failures[uri] -= 1
+                raise ConnectionError("reset")
+            return ROUTES[uri]
+
+        habu.set_request_func(flaky)
+
+    def test_set_policy_type(self):
+        """ Assert raised error when setting something other than a Policy. """
+        with self.assertRaises(TypeError):
+            habu.set_policy("policy")
+
+    def test_global_policy_retries(self):
+        """ Assert a Link call is retried under the global policy. """
+        habu.set_policy(habu.Policy(retries=1, backoff=0))
+        people = habu.enter("/").people()
+        self.assertEqual(people.total, 2)
+
+    def test_rel_policy(self):
+        """ Assert a policy set for a rel only applies to Links with that rel. """
+        habu.set_policy(habu.Policy(retries=1, backoff=0), rel="person")
+        api = habu.enter("/")
+        with self.assertRaises(ConnectionError):
+            api.people()
+
+        habu.set_policy(habu.Policy(retries=1, backoff=0), rel="people")
+        self.failures["/people"] = 1
+        self.assertEqual(api.people().total, 2)
+
+
+class IndexedLinks(HabuTestCase):
+    """ Test suite for the indexes of habu.LinkContainer.  """
+
+    DOCUMENT = {
+        "_links": {
+            "curies": [{"name": "ex", "href": "/docs/{rel}", "templated": True}],
+            "item": [
+                {"href": "/items/1", "name": "first", "profile": "/profiles/item"},
+                {"href": "/items/2", "name": "second"},
+                {"href": "/items/3", "profile": "/profiles/item"},
+            ],
+            "ex:pets": [
+                {"href": "/pets/1", "name": "rex"},
+                {"href": "/pets/2", "name": "tom"},
+            ],
+            "self": {"href": "/"},
+        }
+    }
+
+    def setUp(self):
+        super(IndexedLinks, self).setUp()
+        self.links = habu.Resource(self.DOCUMENT).links
+
+    def test_lists_keep_every_link(self):
+        """ Assert every Link of a list relation is kept in order. """
+        self.assertEqual(
+            [l.href for l in self.links.get_all("item")],
+            ["/items/1", "/items/2", "/items/3"]
+        )
+        self.assertEqual(self.links.item.href, "/items/1")
+        self.assertEqual(self.links.get_all("missing"), [])
+
+    def test_curie_qualified_rel(self):
+        """ Assert a CURIE-prefixed relation is found with or without prefix. """
+        self.assertEqual(
+            [l.href for l in self.links.get_all("ex:pets")], ["/pets/1", "/pets/2"]
+        )
+        self.assertEqual(self.links.get_all("pets"), self.links.get_all("ex:pets"))
+        self.assertIn("ex:pets", self.links)
+        self.assertNotIn("ex:item", self.links)
+
+    def test_by_name(self):
+        """ Assert Links are found by name, optionally within a relation. """
+        self.assertEqual(self.links.by_name("second").href, "/items/2")
+        self.assertEqual(self.links.by_name("tom", rel="ex:pets").href, "/pets/2")
+        self.assertIsNone(self.links.by_name("tom", rel="item"))
+
+    def test_by_profile(self):
+        """ Assert Links are found by profile. """
+        self.assertEqual(
+            [l.href for l in self.links.by_profile("/profiles/item")],
+            ["/items/1", "/items/3"]
+        )
+
+    def test_documentation_resolved_lazily(self):
+        """ Assert CURIE documentation is generated on access and cached. """
+        pet = self.links.by_name("rex")
+        self.assertIsNone(pet._resolved)
+        self.assertEqual(pet._documentation.href, "/docs/pets")
+        self.assertIs(pet._documentation, pet._documentation)
+        self.assertIsNone(self.links.self._documentation)
+
+
+class CurieRegistry(HabuTestCase):
+    """ Test suite for sharing CURIEs with habu.CurieRegistry.  """
+
+    DOCUMENT = {
+        "_links": {
+            "curies": [{"name": "ex", "href": "/docs/{rel}", "templated": True}],
+            "ex:pets": {"href": "/pets"},
+        }
+    }
+
+    def setUp(self):
+        super(CurieRegistry, self).setUp()
+        self.registry = habu.CurieRegistry()
+        habu.set_curie_registry(self.registry)
+
+    def tearDown(self):
+        super(CurieRegistry, self).tearDown()
+        habu.set_curie_registry(None)
+
+    def test_set_curie_registry_type(self):
+        """ Assert raised error when setting something other than a registry. """
+        with self.assertRaises(TypeError):
+            habu.set_curie_registry({})
+
+    def test_curies_shared(self):
+        """ Assert identical CURIEs and documentation Links are shared. """
+        first = habu.Resource(self.DOCUMENT).links
+        second = habu.Resource(self.DOCUMENT).links
+
+        self.assertIs(first._curies["ex"], second._curies["ex"])
+        self.assertIs(first.pets._documentation, second.pets._documentation)
+        self.assertEqual(first.pets._documentation.href, "/docs/pets")
+        self.assertEqual(len(self.registry), 1)
+
+    def test_different_href_not_shared(self):
+        """ Assert CURIEs with the same name but another href are not shared. """
+        other = {
+            "_links": {
+                "curies": [{"name": "ex", "href": "/other/{rel}", "templated": True}],
+                "ex:pets": {"href": "/pets"},
+            }
+        }
+        first = habu.Resource(self.DOCUMENT).links
+        second = habu.Resource(other).links
+
+        self.assertIsNot(first._curies["ex"], second._curies["ex"])
+        self.assertEqual(second.pets._documentation.href, "/other/pets")
+
+    def test_documentation_bound_to_session(self):
+        """ Assert documentation Links are not shared between Sessions. """
+        first = habu.Session(fake_request_func, curie_registry=self.registry)
+        second = habu.Session(fake_request_func, curie_registry=self.registry)
+
+        first_docs = first.resource(self.DOCUMENT).links.pets._documentation
+        second_docs = second.resource(self.DOCUMENT).links.pets._documentation
+
+        self.assertIs(first_docs._session, first)
+        self.assertIs(second_docs._session, second)
+        self.assertIs(first.resource(self.DOCUMENT).links.pets._documentation, first_docs)
+
+    def test_sessions_not_kept_alive(self):
+        """ Assert the registry holds no reference to a Session. """
+        session = habu.Session(fake_request_func, curie_registry=self.registry)
+        session.resource(self.DOCUMENT).links.pets._documentation
+        session_ref = weakref.ref(session)
+
+        del session
+        gc.collect()
+        self.assertIsNone(session_ref())
+
+    def test_strictness_not_shared(self):
+        """ Assert a trusted CURIE is never shared with strict parsing. """
+        document = {
+            "_links": {
+                "curies": [{"name": "ex", "href": "/docs", "templated": True}],
+                "ex:pets": {"href": "/pets"},
+            }
+        }
+        trusted = habu.Resource(document, strict=False).links
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            strict = habu.Resource(document, strict=True).links
+
+        self.assertEqual(len(caught), 1)
+        self.assertIsNot(trusted._curies["ex"], strict._curies["ex"])
+        self.assertIsNot(trusted.pets._documentation, strict.pets._documentation)
+
+    def test_disabled_by_default(self):
+        """ Assert no registry is used unless one is set. """
+        habu.set_curie_registry(None)
+        self.assertIsNone(habu.LinkContainer()._registry)
+        self.assertIsNone(habu.Session(fake_request_func).curie_registry)
+
+    def test_without_registry(self):
+        """ Assert every resource has its own CURIEs without a registry. """
+        habu.set_curie_registry(None)
+        first = habu.Resource(self.DOCUMENT).links
+        second = habu.Resource(self.DOCUMENT).links
+
+        self.assertIsNot(first._curies["ex"], second._curies["ex"])
+        self.assertEqual(first.pets._documentation.href, "/docs/pets")
+
+
+CUSTOMER = {"_links": {"self": {"href": "/customers/1"}}, "name": "Ada"}
+ORDERS = {
+    "_links": {"self": {"href": "/orders"}},
+    "_embedded": {
+        "orders": [
+            {
+                "_links": {"self": {"href": "/orders/%i" % i}},
+                "_embedded": {"customer": [CUSTOMER]},
+            }
+            for i in range(3)
+        ]
+    },
+}
+
+
+class IdentityMaps(HabuTestCase):
+    """ Test suite for sharing embedded resources with habu.IdentityMap.  """
+
+    def customers(self, resource):
+        return [order.embedded.customer[0] for order in resource.embedded.orders]
+
+    def test_use_identity_map_scope(self):
+        """ Assert raised error for an unknown identity map scope. """
+        with self.assertRaises(ValueError):
+            habu.use_identity_map("forever")
+
+    def test_disabled_by_default(self):
+        """ Assert embedded copies are distinct Resources by default. """
+        customers = self.customers(habu.Resource(ORDERS))
+        self.assertIsNot(customers[0], customers[1])
+
+    def test_response_scope(self):
+        """ Assert embedded copies share one Resource within a response. """
+        habu.use_identity_map()
+        for lazy in (False, True):
+            first = self.customers(habu.Resource(ORDERS, lazy=lazy))
+            second = self.customers(habu.Resource(ORDERS, lazy=lazy))
+
+            self.assertEqual(len(set(map(id, first))), 1)
+            self.assertEqual(first[0].name, "Ada")
+            self.assertIsNot(first[0], second[0])
+
+    def test_shared_map_satisfies_link_call(self):
+        """ Assert a Link call to an href in a shared module-level map
+        returns the mapped Resource without a request.
+        """
+        requests = []
+
+        def request(uri, *args, **kwargs):
+            requests.append(uri)
+            return ORDERS
+
+        habu.set_request_func(request)
+        identity_map = habu.IdentityMap()
+        habu.use_identity_map(identity_map)
+
+        orders = habu.Resource(ORDERS)
+        customer = self.customers(orders)[0]
+        self.assertIs(customer.links.self(), customer)
+        self.assertIs(orders.links.self(), orders)
+        self.assertEqual(requests, [])
+
+        habu.invalidate("/orders")
+        self.assertNotIn("/orders", identity_map)
+        orders.links.self()
+        self.assertEqual(requests, ["/orders"])
+
+    def test_session_map(self):
+        """ Assert a Session's map is used by its Links only. """
+        requests = []
+
+        def request(uri, *args, **kwargs):
+            requests.append(uri)
+            return ORDERS
+
+        habu.set_request_func(request)
+        identity_map = habu.IdentityMap()
+        session = habu.Session(request, identity_map=identity_map)
+
+        orders = session.resource(ORDERS)
+        customers = self.customers(orders)
+        self.assertEqual(len(set(map(id, customers))), 1)
+        self.assertIs(customers[0].links.self(), customers[0])
+        self.assertEqual(requests, [])
+        self.assertIn("/orders", identity_map)
+
+        session.invalidate("/orders")
+        self.assertNotIn("/orders", identity_map)
+
+        # Resources outside the Session neither use nor fill its map.
+        plain = habu.Resource(ORDERS)
+        self.assertIsNot(plain.links.self(), orders)
+        self.assertEqual(requests, ["/orders"])
+        self.assertNotIn("/orders", identity_map)
+
+
+class MissingEmbeddedFallback(HabuTestCase):
+    """ Test suite for habu.use_missing_embedded_fallback.  """
+
+    def test_enabled_by_default(self):
+        """ Assert a missing type of embedded resources is an empty list. """
+        self.assertEqual(habu.Resource({}).embedded.missing, [])
+
+    def test_disabled(self):
+        """ Assert raised error for a missing type once disabled. """
+        habu.use_missing_embedded_fallback(False)
+        with self.assertRaises(AttributeError):
+            habu.Resource({}).embedded.missing
+
+    def test_not_bool(self):
+        """ Assert raised error when not given a bool. """
+        with self.assertRaises(TypeError):
+            habu.use_missing_embedded_fallback(0)
+
+
+class Sessions(HabuTestCase):
+    """ Test suite for independent configurations with habu.Session.  """
+
+    def session(self, tenant, **kwargs):
+        def request(uri, *args, **kwargs):
+            document = dict(ROUTES[uri])
+            document["tenant"] = tenant
+            return document
+        return habu.Session(request, **kwargs)
+
+    def test_links_use_their_session(self):
+        """ Assert Links follow using the Session they were parsed by. """
+        habu._request_func = None
+        first = self.session("first").enter("/")
+        second = self.session("second").enter("/")
+
+        self.assertEqual(first.people().tenant, "first")
+        people = second.people()
+        self.assertEqual(people.tenant, "second")
+        self.assertEqual(people.embedded.people[0].links.self().tenant, "second")
+        with self.assertRaises(RuntimeError):
+            habu.Resource(ROUTES["/people"]).links.self()
+
+    def test_sessions_in_threads(self):
+        """ Assert Sessions are independent when used concurrently. """
+        def traverse(tenant):
+            api = self.session(tenant).enter("/")
+            return [api.person(id=i % 2 + 1).tenant for i in range(50)]
+
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(traverse, ["a", "b", "c", "d"]))
+        self.assertEqual([set(r) for r in results], [{"a"}, {"b"}, {"c"}, {"d"}])
+
+    def test_session_options(self):
+        """ Assert Resources use the parsing options of their Session. """
+        session = self.session("a", lazy=True, embedded_fallback=False)
+        resource = session.resource(ROUTES["/people"])
+
+        self.assertTrue(resource._lazy)
+        self.assertIs(resource.links.self._session, session)
+        with self.assertRaises(AttributeError):
+            resource.embedded.missing
+
+    def test_session_entry_cache(self):
+        """ Assert a Session memoizes enter on its own, until invalidated. """
+        calls = []
+
+        def request(uri, *args, **kwargs):
+            calls.append(uri)
+            return ROUTES[uri]
+
+        session = habu.Session(request, entry_cache_ttl=60)
+        other = habu.Session(request)
+
+        self.assertIs(session.enter("/"), session.enter("/"))
+        self.assertIsNot(other.enter("/"), other.enter("/"))
+        self.assertEqual(len(calls), 3)
+
+        session.invalidate("/")
+        session.enter("/")
+        self.assertEqual(len(calls), 4)
+
+        session.use_entry_cache(None)
+        session.enter("/")
+        session.enter("/")
+        self.assertEqual(len(calls), 6)
+
+    def test_session_async(self):
+        """ Assert aenter and acall use the Session's async request function. """
+        async def request(uri, *args, **kwargs):
+            return ROUTES[uri]
+
+        habu._async_request_func = None
+        session = habu.Session(lambda uri: ROUTES[uri], async_request_func=request)
+
+        async def traverse():
+            api = await session.aenter("/")
+            return await api.people.acall()
+
+        self.assertEqual(asyncio.run(traverse()).total, 2)
+
+
+COLLECTION = {
+    "_links": {"self": {"href": "/pets"}},
+    "_embedded": {
+        "pets": [
+            {
+                "_links": {
+                    "self": {"href": "/pets/%i" % i},
+                    "curies": [{"name": "ex", "href": "/docs/{rel}", "templated": True}],
+                    "ex:owner": {"href": "/owners/1"},
+                },
+                "name": "pet %i" % i,
+                "tags": [{"name": "a"}],
+            }
+            for i in range(10)
+        ]
+    },
+    "total": 10,
+}
+
+
+class Pickling(HabuTestCase):
+    """ Test suite for pickling Resources and their parts.  """
+
+    def test_resource_round_trip(self):
+        """ Assert a Resource is equal after pickling, without its Session. """
+        session = habu.Session(fake_request_func)
+        resource = pickle.loads(pickle.dumps(session.resource(COLLECTION)))
+
+        pet = resource.embedded.pets[3]
+        self.assertEqual(pet.name, "pet 3")
+        self.assertIsInstance(pet.tags[0], habu.DictionaryWrapper)
+        self.assertEqual(pet.links.owner._documentation.href, "/docs/owner")
+        self.assertIsNone(pet.links.self._session)
+        self.assertIsNone(resource._session)
+
+    def test_lazy_resource_round_trip(self):
+        """ Assert a lazy Resource may be pickled before being materialized. """
+        resource = pickle.loads(pickle.dumps(habu.Resource(COLLECTION, lazy=True)))
+        self.assertEqual(resource.embedded.pets[9].links.self.href, "/pets/9")
+
+    def test_dictionary_wrapper_special_attributes(self):
+        """ Assert special attributes raise AttributeError, so copy works. """
+        wrapper = habu.DictionaryWrapper({"a": {"b": 1}})
+        with self.assertRaises(AttributeError):
+            wrapper.__setstate__
+        with self.assertRaises(KeyError):
+            wrapper.missing
+        self.assertEqual(copy.deepcopy(wrapper).a.b, 1)
+
+
+class ParseParallel(HabuTestCase):
+    """ Test suite for habu.parse_parallel.  """
+
+    def as_names(self, resource):
+        return [
+            (pet.name, pet.links.self.href, pet.links.owner._documentation.href)
+            for pet in resource.embedded.pets
+        ]
+
+    def test_serial_below_threshold(self):
+        """ Assert small documents are parsed without worker processes. """
+        resource = habu.parse_parallel(COLLECTION, workers=2, threshold=100)
+        self.assertEqual(resource.total, 10)
+        self.assertEqual(self.as_names(resource), self.as_names(habu.Resource(COLLECTION)))
+
+    def test_parallel_matches_serial(self):
+        """ Assert parallel parsing keeps every resource in order. """
+        with concurrent.futures.ProcessPoolExecutor(2) as executor:
+            resource = habu.parse_parallel(
+                COLLECTION, workers=2, threshold=0, executor=executor
+            )
+        self.assertEqual(resource.total, 10)
+        self.assertEqual(resource.links.self.href, "/pets")
+        self.assertEqual(self.as_names(resource), self.as_names(habu.Resource(COLLECTION)))
+
+    def test_raw_json(self):
+        """ Assert raw JSON is decoded before parsing. """
+        resource = habu.parse_parallel(b'{"total": 1, "_embedded": {"pets": []}}', workers=1)
+        self.assertEqual(resource.total, 1)
+        self.assertEqual(resource.embedded.pets, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
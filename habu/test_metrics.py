@@ -0,0 +1,123 @@
+import asyncio
+import unittest
+
+import habu
+from habu import metrics
+
+
+ROUTES = {
+    "/": {"_links": {"person": {"href": "/people/{id}", "templated": True}}},
+    "/people/1": {"_links": {"self": {"href": "/people/1"}}, "name": "Curtis"},
+}
+
+
+class Listeners(unittest.TestCase):
+    """ Test suite for attaching metrics listeners to Link traversals.  """
+
+    def setUp(self):
+        self._original_request_func = habu._request_func
+        self._original_async_request_func = habu._async_request_func
+        habu.set_request_func(lambda uri, *args, **kwargs: ROUTES[uri])
+
+        async def async_request_func(uri, *args, **kwargs):
+            return ROUTES[uri]
+        habu.set_async_request_func(async_request_func)
+
+        self.events = []
+        metrics.counters.clear()
+        habu.add_listener(self.events.append)
+
+    def tearDown(self):
+        if self.events.append in metrics._listeners:
+            habu.remove_listener(self.events.append)
+        habu._request_func = self._original_request_func
+        habu._async_request_func = self._original_async_request_func
+
+    def test_disabled_without_listeners(self):
+        """ Assert metrics are only enabled while a listener is attached. """
+        self.assertTrue(metrics.enabled)
+        habu.remove_listener(self.events.append)
+        self.assertFalse(metrics.enabled)
+
+        habu.enter("/")
+        self.assertEqual(self.events, [])
+
+    def test_invalid_listener(self):
+        """ Assert raised error for a non-callable listener. """
+        with self.assertRaises(TypeError):
+            habu.add_listener(None)
+
+    def test_traversal_events(self):
+        """ Assert every step of a traversal emits a timed Event. """
+        api = habu.enter("/")
+        api.person(id=1)
+
+        self.assertEqual(
+            [(e.name, e.rel, e.uri) for e in self.events],
+            [
+                ("request", None, "/"),
+                ("decode", None, "/"),
+                ("unserialize", None, "/"),
+                ("expand", "person", "/people/{id}"),
+                ("request", "person", "/people/1"),
+                ("decode", "person", "/people/1"),
+                ("unserialize", "person", "/people/1"),
+            ]
+        )
+        self.assertTrue(all(e.duration >= 0 for e in self.events))
+        self.assertEqual(metrics.counters["links"], 2)
+        self.assertEqual(metrics.counters["resources"], 1)
+
+    def test_async_traversal_events(self):
+        """ Assert awaited Link calls emit Events as well. """
+        async def traverse():
+            api = await habu.aenter("/")
+            await api.person.acall(1)
+
+        asyncio.run(traverse())
+
+        self.assertEqual(
+            [e.name for e in self.events if e.rel == "person"],
+            ["expand", "request", "decode", "unserialize"]
+        )
+
+
+class Aggregator(unittest.TestCase):
+    """ Test suite for the metrics.Aggregator listener.  """
+
+    def test_percentiles(self):
+        """ Assert percentiles are reported per rel and step. """
+        aggregator = metrics.Aggregator()
+        for i in range(1, 101):
+            aggregator(metrics.Event("request", "self", "/a", i / 1000.0))
+        aggregator(metrics.Event("request", None, "/", 0.5))
+
+        summary = aggregator.summary()
+
+        self.assertEqual(summary[("self", "request")]["count"], 100)
+        self.assertAlmostEqual(summary[("self", "request")]["p50"], 0.050)
+        self.assertAlmostEqual(summary[("self", "request")]["p95"], 0.095)
+        self.assertAlmostEqual(summary[("self", "request")]["p99"], 0.099)
+        self.assertIn(("/", "request"), summary)
+        self.assertIn("self", aggregator.report())
+
+
+class Percentile(unittest.TestCase):
+    """ Test suite for the metrics.percentile function.  """
+
+    def test_nearest_rank(self):
+        """ Assert the smallest value covering the fraction is returned. """
+        self.assertEqual(metrics.percentile([1, 2, 3, 4], 0.50), 2)
+        self.assertEqual(metrics.percentile([1, 2, 3, 4], 0.95), 4)
+        self.assertEqual(metrics.percentile([1, 2, 3, 4, 5], 0.50), 3)
+        self.assertEqual(metrics.percentile(list(range(1, 21)), 0.95), 19)
+        self.assertEqual(metrics.percentile(list(range(1, 101)), 0.07), 7)
+        self.assertEqual(metrics.percentile([1, 2, 3, 4], 0), 1)
+
+    def test_empty(self):
+        """ Assert zero is returned for no values. """
+        self.assertEqual(metrics.percentile([], 0.95), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
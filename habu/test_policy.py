@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from habu import client
+from habu import policy
+from habu.response import Response
+
+
+def failing(times, error=ConnectionError):
+    """ Return a request function failing `times` times before succeeding. """
+    calls = []
+
+    def request(uri, *args, **kwargs):
+        calls.append(uri)
+        if len(calls) <= times:
+            raise error("attempt %i" % len(calls))
+        return {"uri": uri}
+
+    return (request, calls)
+
+
+class Retries(unittest.TestCase):
+    """ Test suite for retrying requests with policy.Policy.  """
+
+    def test_retries_idempotent(self):
+        """ Assert failed GET requests are retried until they succeed. """
+        (request, calls) = failing(2)
+        p = policy.Policy(retries=2, backoff=0)
+        self.assertEqual(p.call(request, "/a", (), {}), {"uri": "/a"})
+        self.assertEqual(len(calls), 3)
+
+    def test_retries_exhausted(self):
+        """ Assert the last error is raised once retries are exhausted. """
+        (request, calls) = failing(5)
+        p = policy.Policy(retries=2, backoff=0)
+        with self.assertRaises(ConnectionError):
+            p.call(request, "/a", (), {})
+        self.assertEqual(len(calls), 3)
+
+    def test_no_retry_for_post(self):
+        """ Assert non-idempotent requests are never retried. """
+        (request, calls) = failing(1)
+        p = policy.Policy(retries=2, backoff=0)
+        with self.assertRaises(ConnectionError):
+            p.call(request, "/a", (), {"method": "POST"})
+        self.assertEqual(len(calls), 1)
+
+    def test_no_retry_for_other_errors(self):
+        """ Assert errors which are not transient are raised immediately. """
+        (request, calls) = failing(1, KeyError)
+        p = policy.Policy(retries=2, backoff=0)
+        with self.assertRaises(KeyError):
+            p.call(request, "/a", (), {})
+        self.assertEqual(len(calls), 1)
+
+    def test_is_retryable(self):
+        """ Assert which HTTP errors are considered transient. """
+        def error(status):
+            return client.HTTPError("/a", Response(status=status))
+
+        self.assertTrue(policy.is_retryable(error(503)))
+        self.assertTrue(policy.is_retryable(error(429)))
+        self.assertFalse(policy.is_retryable(error(404)))
+        self.assertTrue(policy.is_retryable(TimeoutError()))
+
+    def test_backoff_delay(self):
+        """ Assert the backoff delay doubles up to its maximum. """
+        p = policy.Policy(backoff=0.1, backoff_max=0.3, jitter=False)
+        self.assertEqual(
+            [p.backoff_delay(i) for i in range(3)], [0.1, 0.2, 0.3]
+        )
+
+
+class Deadlines(unittest.TestCase):
+    """ Test suite for the timeout of policy.Policy.  """
+
+    def test_deadline_exceeded(self):
+        """ Assert a slow request raises DeadlineExceeded. """
+        def slow(uri, *args, **kwargs):
+            time.sleep(0.5)
+            return {}
+
+        p = policy.Policy(timeout=0.05)
+        start = time.monotonic()
+        with self.assertRaises(policy.DeadlineExceeded):
+            p.call(slow, "/a", (), {})
+        self.assertLess(time.monotonic() - start, 0.4)
+
+    def test_async_deadline_exceeded(self):
+        """ Assert a slow awaited request raises DeadlineExceeded. """
+        async def slow(uri, *args, **kwargs):
+            await asyncio.sleep(0.5)
+            return {}
+
+        p = policy.Policy(timeout=0.05)
+        with self.assertRaises(policy.DeadlineExceeded):
+            asyncio.run(p.acall(slow, "/a", (), {}))
+
+    def test_async_retries(self):
+        """ Assert failed awaited requests are retried. """
+        calls = []
+
+        async def flaky(uri, *args, **kwargs):
+            calls.append(uri)
+            if len(calls) == 1:
+                raise ConnectionError()
+            return {"uri": uri}
+
+        p = policy.Policy(retries=1, backoff=0, timeout=1)
+        self.assertEqual(asyncio.run(p.acall(flaky, "/a", (), {})), {"uri": "/a"})
+        self.assertEqual(len(calls), 2)
+
+
+class Hedging(unittest.TestCase):
+    """ Test suite for hedged requests with policy.Policy.  """
+
+    def test_hedge_takes_fastest(self):
+        """ Assert a hedged request answers with the faster duplicate. """
+        lock = threading.Lock()
+        calls = []
+
+        def request(uri, *args, **kwargs):
+            with lock:
+                calls.append(uri)
+                first = len(calls) == 1
+            time.sleep(1 if first else 0.01)
+            return "slow" if first else "fast"
+
+        p = policy.Policy(hedge=True, hedge_delay=0.05)
+        self.assertEqual(p.call(request, "/a", (), {}), "fast")
+        self.assertEqual(len(calls), 2)
+
+    def test_hedge_delay_from_latencies(self):
+        """ Assert hedging waits for enough samples, then uses their p95. """
+        p = policy.Policy(hedge=True, min_samples=3)
+        self.assertIsNone(p.current_hedge_delay())
+        for latency in (0.1, 0.2, 0.3):
+            p.observe(latency)
+        self.assertEqual(p.current_hedge_delay(), 0.3)
+
+    def test_async_hedge_takes_fastest(self):
+        """ Assert an awaited hedged request answers with the faster duplicate. """
+        calls = []
+
+        async def request(uri, *args, **kwargs):
+            calls.append(uri)
+            first = len(calls) == 1
+            await asyncio.sleep(1 if first else 0.01)
+            return "slow" if first else "fast"
+
+        p = policy.Policy(hedge=True, hedge_delay=0.05)
+        self.assertEqual(asyncio.run(p.acall(request, "/a", (), {})), "fast")
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
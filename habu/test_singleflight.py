@@ -0,0 +1,186 @@
+import asyncio
+import threading
+import time
+import unittest
+
+import habu
+from habu import singleflight
+
+
+class SingleFlight(unittest.TestCase):
+    """ Test suite for the singleflight.SingleFlight class.  """
+
+    def test_threads_share_one_call(self):
+        """ Assert concurrent threads with the same key share one call. """
+        flight = singleflight.SingleFlight()
+        calls = []
+        results = []
+        started = threading.Event()
+
+        def slow():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return object()
+
+        def worker():
+            results.append(flight.do("key", slow))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        threads[0].start()
+        started.wait()
+        for t in threads[1:]:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(set(id(r) for r in results)), 1)
+        self.assertEqual(len(flight), 0)
+
+    def test_threads_share_exception(self):
+        """ Assert an exception is raised in every waiting thread. """
+        flight = singleflight.SingleFlight()
+        errors = []
+        started = threading.Event()
+
+        def failing():
+            started.set()
+            time.sleep(0.1)
+            raise KeyError("boom")
+
+        def worker():
+            try:
+                flight.do("key", failing)
+            except KeyError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        threads[0].start()
+        started.wait()
+        for t in threads[1:]:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(errors), 3)
+
+    def test_sequential_calls_repeat(self):
+        """ Assert calls which do not overlap are each performed. """
+        flight = singleflight.SingleFlight()
+        calls = []
+
+        flight.do("key", lambda: calls.append(1))
+        flight.do("key", lambda: calls.append(1))
+
+        self.assertEqual(len(calls), 2)
+
+    def test_coroutines_share_one_call(self):
+        """ Assert concurrent coroutines with the same key share one call. """
+        flight = singleflight.SingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return object()
+
+        async def main():
+            return await asyncio.gather(
+                *[flight.ado("key", slow) for _ in range(5)],
+                flight.ado("other", slow)
+            )
+
+        results = asyncio.run(main())
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(set(id(r) for r in results[:5])), 1)
+        self.assertIsNot(results[0], results[5])
+
+    def test_cancelled_leader(self):
+        """ Assert waiters take over the call when its leader is cancelled. """
+        flight = singleflight.SingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return object()
+
+        async def main():
+            leader = asyncio.ensure_future(flight.ado("key", slow))
+            await asyncio.sleep(0)
+            waiters = [asyncio.ensure_future(flight.ado("key", slow)) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            leader.cancel()
+
+            results = await asyncio.gather(*waiters)
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return results
+
+        results = asyncio.run(main())
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(set(id(r) for r in results)), 1)
+
+    def test_cancelled_waiter(self):
+        """ Assert a cancelled waiter leaves the call running for the others. """
+        flight = singleflight.SingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def main():
+            leader = asyncio.ensure_future(flight.ado("key", slow))
+            await asyncio.sleep(0)
+            waiter = asyncio.ensure_future(flight.ado("key", slow))
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            return await leader
+
+        self.assertEqual(asyncio.run(main()), "done")
+
+
+class UseSingleFlight(unittest.TestCase):
+    """ Test suite for collapsing Link calls with habu.use_single_flight.  """
+
+    def setUp(self):
+        self._original_request_func = habu._request_func
+        self.calls = []
+
+        def request_func(uri, *args, **kwargs):
+            self.calls.append((uri, kwargs))
+            time.sleep(0.05)
+            return {"uri": uri}
+        habu.set_request_func(request_func)
+        habu.use_single_flight()
+
+    def tearDown(self):
+        habu._request_func = self._original_request_func
+        habu.use_single_flight(False)
+
+    def test_link_calls_collapse(self):
+        """ Assert concurrent identical Link calls perform one request. """
+        results = habu.follow_all(
+            [habu.Resource({"_links": {"self": {"href": "/people"}}})] * 4, "self"
+        )
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+
+    def test_non_idempotent_calls_not_collapsed(self):
+        """ Assert POST Link calls are never collapsed. """
+        resources = [habu.Resource({"_links": {"self": {"href": "/people"}}})] * 3
+
+        habu.follow_all(resources, "self", method="POST")
+
+        self.assertEqual(len(self.calls), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
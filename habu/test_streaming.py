@@ -0,0 +1,121 @@
+import io
+import json
+import unittest
+
+import habu
+from habu import streaming
+
+
+DOCUMENT = {
+    "_links": {"self": {"href": "/people"}, "next": {"href": "/people?page=2"}},
+    "total": 123,
+    "_embedded": {
+        "pets": [{"name": "Rex", "note": "likes \"}\" and [brackets] \\ too"}],
+        "people": [
+            {"_links": {"self": {"href": "/people/1"}}, "name": "Curtis", "age": 22},
+            {"_links": {"self": {"href": "/people/2"}}, "name": "Zoë", "age": 31.5},
+        ],
+        "owner": {"name": "Ada"},
+    },
+    "empty": [],
+}
+
+
+class IterEmbeddedItems(unittest.TestCase):
+    """ Test suite for the streaming.iter_embedded_items function.  """
+
+    def setUp(self):
+        self.raw = json.dumps(DOCUMENT, ensure_ascii=False).encode("utf-8")
+
+    def test_bytes(self):
+        """ Assert every embedded item of a rel is yielded in order. """
+        items = list(streaming.iter_embedded_items(self.raw, "people"))
+
+        self.assertEqual(items, DOCUMENT["_embedded"]["people"])
+
+    def test_tiny_chunks(self):
+        """ Assert parsing is independent of where the chunks are split.
+
+        A chunk size of one byte also splits multi-byte UTF-8 characters and
+        string escapes across chunks.
+        """
+        for chunk_size in [1, 2, 3, 7]:
+            stream = io.BytesIO(self.raw)
+            items = list(streaming.iter_embedded_items(stream, "people", chunk_size))
+
+            self.assertEqual(items, DOCUMENT["_embedded"]["people"])
+
+    def test_iterable_of_chunks(self):
+        """ Assert an iterable of chunks is accepted. """
+        chunks = [self.raw[i:i + 5] for i in range(0, len(self.raw), 5)]
+
+        items = list(streaming.iter_embedded_items(iter(chunks), "pets"))
+
+        self.assertEqual(items, DOCUMENT["_embedded"]["pets"])
+
+    def test_single_object(self):
+        """ Assert an embedded rel containing a single object is yielded. """
+        items = list(streaming.iter_embedded_items(self.raw, "owner"))
+
+        self.assertEqual(items, [{"name": "Ada"}])
+
+    def test_missing_rel(self):
+        """ Assert nothing is yielded for a missing rel. """
+        self.assertEqual(list(streaming.iter_embedded_items(self.raw, "nope")), [])
+
+    def test_truncated_stream(self):
+        """ Assert raised error for a truncated document. """
+        with self.assertRaises(ValueError):
+            list(streaming.iter_embedded_items(self.raw[:-40], "people"))
+
+    def test_yields_before_end_of_stream(self):
+        """ Assert an item is yielded before the rest of the stream is read. """
+        reads = []
+
+        def chunks():
+            for i in range(0, len(self.raw), 16):
+                reads.append(i)
+                yield self.raw[i:i + 16]
+
+        items = streaming.iter_embedded_items(chunks(), "people")
+        next(items)
+
+        self.assertLess(reads[-1] + 16, len(self.raw))
+
+
+class IterEmbedded(unittest.TestCase):
+    """ Test suite for the habu.iter_embedded function.  """
+
+    def test_yields_resources(self):
+        """ Assert embedded items are yielded as Resources. """
+        raw = json.dumps(DOCUMENT).encode("utf-8")
+
+        people = list(habu.iter_embedded(io.BytesIO(raw), "people", chunk_size=10))
+
+        self.assertEqual([p.name for p in people], ["Curtis", "Zoë"])
+        self.assertEqual(people[0].links.self.href, "/people/1")
+
+
+class LinkStream(unittest.TestCase):
+    """ Test suite for the habu.Link.stream method.  """
+
+    def stream(self, body):
+        session = habu.Session(lambda uri, *args, **kwargs: body)
+        link = habu.Link()
+        link.href = "/people"
+        link._session = session
+        return link.stream("people")
+
+    def test_raw_body(self):
+        """ Assert a raw response body is parsed into Resources. """
+        people = list(self.stream(json.dumps(DOCUMENT).encode("utf-8")))
+        self.assertEqual([p.name for p in people], ["Curtis", "Zoë"])
+
+    def test_decoded_body(self):
+        """ Assert raised error when the request function decoded the body. """
+        with self.assertRaises(TypeError):
+            self.stream(habu.Response(DOCUMENT))
+
+
+if __name__ == '__main__':
+    unittest.main()
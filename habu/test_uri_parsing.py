@@ -1,4 +1,3 @@
-from unittest import mock
 import unittest
 import warnings
 
@@ -199,6 +198,23 @@ class ValueExtraction(unittest.TestCase):
         )
 
 
+    def test_multiple_placeholders(self):
+        """ Assert each placeholder consumes exactly one positional argument.
+
+        Equal argument values must not be consumed together, and arguments left
+        over after satisfying every placeholder are returned untouched.
+        """
+        template = "one,two"
+        args = ["same", "same", "extra"]
+        kwargs = {}
+
+        expected = (["same", "same"], ("extra",), {})
+        self.assertEqual(
+            uri_parsing.value_extraction(template, *args, **kwargs),
+            expected
+        )
+
+
 class KeyValueExtraction(unittest.TestCase):
     """ Test suite for the uri_parsing.value_extraction function.  """
 
@@ -263,126 +279,228 @@ class KeyValueExtraction(unittest.TestCase):
 class TestExpanders(unittest.TestCase):
     """ Test suite for all the uri_parsing expander functions.  """
 
-    @mock.patch("uri_parsing.value_extraction")
-    def test_string_expansion(self, mock_value_extraction):
-        template = "hello*"
-        args = ["one", "two", "three"]
-        kwargs = {}
-
-        mock_value_extraction.return_value = (args, [], kwargs)
-        expected = ",".join(args)
+    def test_string_expansion(self):
+        self.assertEqual(
+            uri_parsing.string_expansion("hello*", ["one", "two"], "three"),
+            ("one,two", ("three",), {})
+        )
 
+    def test_fragment_expansion(self):
         self.assertEqual(
-            uri_parsing.string_expansion(template, args, kwargs),
-            (expected, [], {})
+            uri_parsing.fragment_expansion("f", "top"),
+            ("#top", (), {})
         )
 
-    @mock.patch("uri_parsing.string_expansion")
-    def test_fragment_expansion(self, mock_string_expansion):
-        template = "hello*"
-        args = ["one", "two", "three"]
-        kwargs = {}
+    def test_dot_expansion(self):
+        self.assertEqual(
+            uri_parsing.dot_expansion("hello*", ["one", "two"]),
+            ("one.two", (), {})
+        )
 
-        mock_string_expansion.return_value = (args, [], kwargs)
-        expected = "#%s" % ",".join(args)
+    def test_path_expansion(self):
+        self.assertEqual(
+            uri_parsing.path_segment_expansion("hello*", ["one", "two"]),
+            ("/one,two", (), {})
+        )
 
+    def test_path_parameter_expansion(self):
         self.assertEqual(
-            uri_parsing.fragment_expansion(template, args, kwargs),
-            (expected, [], {})
+            uri_parsing.path_parameter_expansion("hello*,empty", ["one", "two"], ""),
+            (";hello=one,hello=two,empty", (), {})
         )
 
-    @mock.patch("uri_parsing.value_extraction")
-    def test_dot_expansion(self, mock_value_extraction):
-        template = "hello*"
-        args = ["one", "two", "three"]
-        kwargs = {}
+    def test_form_style_expansion(self):
+        self.assertEqual(
+            uri_parsing.form_style_expansion("hello*,page", ["one", "two"], page=2),
+            ("?hello=one&hello=two&page=2", (), {})
+        )
 
-        mock_value_extraction.return_value = (args, [], kwargs)
-        expected = ".".join(args)
+    def test_form_style_continuation_expansion(self):
+        self.assertEqual(
+            uri_parsing.form_style_continuation_expansion("hello", "one", extra=1),
+            ("&hello=one", (), {"extra": 1})
+        )
 
+    def test_undefined_variable(self):
+        """ Assert an undefined variable is left out, with a warning. """
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            self.assertEqual(uri_parsing.expand_placeholder("?q"), ("", (), {}))
+        self.assertEqual(len(caught), 1)
+
+    def test_agrees_with_parse_uri(self):
+        """ Assert every expander expands exactly like parse_uri. """
+        cases = [
+            ("f", ("top",), {}),
+            ("a*,b", (["x", "y"],), {"b": "z"}),
+            ("q:2", ("long",), {}),
+            ("q", (), {}),
+        ]
+        for (operator, expander) in list(uri_parsing.prefix_types.items()) + [
+            ("", uri_parsing.default_prefix_expander)
+        ]:
+            for (template, args, kwargs) in cases:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    expected = uri_parsing.parse_uri(
+                        "{%s%s}" % (operator, template), *args, **dict(kwargs)
+                    )
+                    self.assertEqual(expander(template, *args, **dict(kwargs)), expected)
+                    self.assertEqual(
+                        uri_parsing.expand_placeholder(operator + template, *args, **dict(kwargs)),
+                        expected
+                    )
+
+
+class CompiledTemplateTests(unittest.TestCase):
+    """ Test suite for the uri_parsing.CompiledTemplate class.  """
+
+    def test_parses_expressions_once(self):
+        """ Assert the operator, variables and modifiers are parsed up front. """
+        template = uri_parsing.CompiledTemplate("/people/{id}{?fields*,q:3}")
+
+        self.assertEqual(len(template.expressions), 2)
+        self.assertEqual(template.expressions[0].operator, "")
+        self.assertEqual(template.expressions[0].varspecs, [("id", False, None)])
+        self.assertEqual(template.expressions[1].operator, "?")
         self.assertEqual(
-            uri_parsing.dot_expansion(template, args, kwargs),
-            (expected, [], {})
+            template.expressions[1].varspecs,
+            [("fields", True, None), ("q", False, 3)]
         )
 
+    def test_malformed_placeholder(self):
+        """ Assert a malformed placeholder raises when compiled. """
+        with self.assertRaises(ValueError):
+            uri_parsing.CompiledTemplate("/people{/id:5*}")
 
-    @mock.patch("uri_parsing.value_extraction")
-    def test_path_expansion(self, mock_value_extraction):
-        template = "hello*"
-        args = ["one", "two", "three"]
-        kwargs = {}
+    def test_expand(self):
+        """ Assert expected results for expanding each operator. """
+        test_cases = [
+            {"href": "/people/{id}", "kwargs": {"id": 7}, "expect": "/people/7"},
+            {"href": "/people{/id}", "kwargs": {"id": "a"}, "expect": "/people/a"},
+            {"href": "/p{?q,n}", "kwargs": {"q": "x", "n": 2}, "expect": "/p?q=x&n=2"},
+            {"href": "/p?a=1{&q}", "kwargs": {"q": "x"}, "expect": "/p?a=1&q=x"},
+            {"href": "/p{;x,y}", "kwargs": {"x": "1", "y": ""}, "expect": "/p;x=1,y"},
+            {"href": "/p{#f}", "kwargs": {"f": "top"}, "expect": "/p#top"},
+            {"href": "/p{?list*}", "kwargs": {"list": ["a", "b"]}, "expect": "/p?list=a&list=b"},
+            {"href": "/p/{name:3}", "kwargs": {"name": "abcdef"}, "expect": "/p/abc"},
+        ]
 
-        mock_value_extraction.return_value = (args, [], kwargs)
-        expected = "/%s" % ",".join(args)
+        for case in test_cases:
+            template = uri_parsing.CompiledTemplate(case["href"])
+            self.assertEqual(
+                template.expand(**case["kwargs"]),
+                (case["expect"], (), {})
+            )
+
+    def test_segments(self):
+        """ Assert the href is tokenized into literal and expression segments. """
+        template = uri_parsing.CompiledTemplate("/a{b}/c{?d}")
 
         self.assertEqual(
-            uri_parsing.path_segment_expansion(template, args, kwargs),
-            (expected, [], {})
+            [(literal, e and e.placeholder) for (literal, e) in template.segments],
+            [("/a", "b"), ("/c", "?d"), ("", None)]
         )
 
+    def test_expand_many_placeholders(self):
+        """ Assert a long template expands every placeholder in order. """
+        href = "".join("/{v%i}" % i for i in range(200))
+        args = ["x%i" % i for i in range(200)]
+        template = uri_parsing.CompiledTemplate(href)
 
-    @mock.patch("uri_parsing.key_value_extraction")
-    def test_path_expansion(self, mock_key_value_extraction):
-        template = "hello*"
-        args = ["one", "two", "three"]
-        kwargs = {}
-        k_v_pairs = ["hello=one", "hello=two", "hello=three"]
-
+        expected = "".join("/%s" % a for a in args)
+        self.assertEqual(template.expand(*args), (expected, (), {}))
 
-        mock_key_value_extraction.return_value = (
-            k_v_pairs,
-            [],
-            kwargs
-        )
-        expected = ";%s" % ",".join(k_v_pairs)
+    def test_expand_positional_and_leftovers(self):
+        """ Assert positional args are consumed in order and extras returned. """
+        template = uri_parsing.CompiledTemplate("/{a}/{b}")
 
         self.assertEqual(
-            uri_parsing.path_parameter_expansion(template, args, kwargs),
-            (expected, [], {})
+            template.expand("x", "x", "extra", verbose=True),
+            ("/x/x", ("extra",), {"verbose": True})
         )
 
+    def test_expand_missing_variable(self):
+        """ Assert an undefined variable is omitted with a warning. """
+        template = uri_parsing.CompiledTemplate("/people/{id}{?fields}")
 
-    @mock.patch("uri_parsing.key_value_extraction")
-    def test_form_style_expansion(self, mock_key_value_extraction):
-        template = "hello*"
-        args = ["one", "two", "three"]
-        kwargs = {}
-        k_v_pairs = ["hello=one", "hello=two", "hello=three"]
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            self.assertEqual(template.expand(id=1), ("/people/1", (), {}))
+        self.assertEqual(len(caught), 1)
 
 
-        mock_key_value_extraction.return_value = (
-            k_v_pairs,
-            [],
-            kwargs
-        )
-        expected = "?%s" % "&".join(k_v_pairs)
+class CompileTemplate(unittest.TestCase):
+    """ Test suite for the uri_parsing.compile_template cache.  """
 
-        self.assertEqual(
-            uri_parsing.form_style_expansion(template, args, kwargs),
-            (expected, [], {})
-        )
+    def setUp(self):
+        self.original_size = uri_parsing.template_cache_size
+        uri_parsing.clear_template_cache()
 
+    def tearDown(self):
+        uri_parsing.set_template_cache_size(self.original_size)
+        uri_parsing.clear_template_cache()
 
-    @mock.patch("uri_parsing.key_value_extraction")
-    def test_form_style_continuation_expansion(self, mock_key_value_extraction):
-        template = "hello*"
-        args = ["one", "two", "three"]
-        kwargs = {}
-        k_v_pairs = ["hello=one", "hello=two", "hello=three"]
+    def test_cache_hit(self):
+        """ Assert the same href returns the same CompiledTemplate instance. """
+        first = uri_parsing.compile_template("/people/{id}")
+        second = uri_parsing.compile_template("/people/{id}")
+
+        self.assertIs(first, second)
 
+    def test_cache_eviction(self):
+        """ Assert the least recently used template is evicted when full. """
+        uri_parsing.set_template_cache_size(2)
 
-        mock_key_value_extraction.return_value = (
-            k_v_pairs,
-            [],
-            kwargs
+        first = uri_parsing.compile_template("/a/{id}")
+        uri_parsing.compile_template("/b/{id}")
+        uri_parsing.compile_template("/a/{id}")
+        uri_parsing.compile_template("/c/{id}")
+
+        self.assertIs(uri_parsing.compile_template("/a/{id}"), first)
+        self.assertNotIn("/b/{id}", uri_parsing._template_cache)
+
+    def test_parse_uri_uses_cache(self):
+        """ Assert parse_uri compiles through the template cache. """
+        uri_parsing.parse_uri("/people/{id}", 5)
+
+        self.assertIn("/people/{id}", uri_parsing._template_cache)
+
+
+class ExpandBatch(unittest.TestCase):
+    """ Test suite for the uri_parsing.expand_batch function.  """
+
+    def test_rows(self):
+        """ Assert a uri is yielded for every row, without modifying rows. """
+        rows = [{"id": 1, "fields": "name"}, {"id": 2, "fields": "age"}]
+
+        self.assertEqual(
+            list(uri_parsing.expand_batch("/people/{id}{?fields}", rows)),
+            ["/people/1?fields=name", "/people/2?fields=age"]
         )
-        expected = "&%s" % "&".join(k_v_pairs)
+        self.assertEqual(rows[0], {"id": 1, "fields": "name"})
+
+    def test_columns(self):
+        """ Assert a dict of equal-length sequences is expanded column-wise. """
+        columns = {"id": [1, 2, 3], "fields": ("a", "b", "c")}
 
         self.assertEqual(
-            uri_parsing.form_style_continuation_expansion(template, args, kwargs),
-            (expected, [], {})
+            list(uri_parsing.expand_batch("/people/{id}{?fields}", columns)),
+            ["/people/1?fields=a", "/people/2?fields=b", "/people/3?fields=c"]
         )
 
+    def test_columns_unequal_length(self):
+        """ Assert raised error for columns of different lengths. """
+        columns = {"id": [1, 2, 3], "fields": ["a"]}
+
+        with self.assertRaises(ValueError):
+            list(uri_parsing.expand_batch("/people/{id}{?fields}", columns))
+
+    def test_non_dict_row(self):
+        """ Assert raised error for a row which is not a dict. """
+        with self.assertRaises(TypeError):
+            list(uri_parsing.expand_batch("/people/{id}", [(1,)]))
+
 
 if __name__ == '__main__':
     with warnings.catch_warnings():
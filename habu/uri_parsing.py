@@ -1,4 +1,6 @@
+import collections
 import re
+import threading
 import warnings
 
 
@@ -40,164 +42,168 @@ def text_limit(limit, value):
     return value
 
 
-def value_extraction(template, *args, **kwargs):
+def parse_varspec(varspec):
+    """ Parse a single template variable into a (name, explode, limit) tuple.
+
+    The `limit` element is `None` unless the variable used a `:<int>` prefix
+    modifier.
+    """
+    if not varspec:
+        raise ValueError("provided empty template placeholder")
+
+    has_explode = varspec[-1] == "*"
+    has_limiter = ":" in varspec
+
+    if has_explode and has_limiter:
+        raise ValueError("malformed uri placeholder '%s'" % varspec)
+
+    if has_explode:
+        return (varspec[:-1], True, None)
+
+    if has_limiter:
+        parts = varspec.split(":")
+        return (parts[0], False, int(parts[1]))
+
+    return (varspec, False, None)
+
+
+def collect_values(varspecs, args, index, kwargs, named=False, if_empty="=", missing=None):
+    """ Collect the string values for a list of parsed template variables.
+
+    Positional arguments are consumed starting at `index`, falling back to a
+    keyword argument matching the variable name. Consumed keyword arguments
+    are popped from `kwargs`. When `named` is `True`, each value is rendered
+    as "name=value", or as the name followed by `if_empty` for empty values.
+    Names of variables which could not be satisfied are appended to `missing`.
+
+    Returns a tuple of the collected values and the next unconsumed index.
+    """
     values = []
+    for (name, explode, limit) in varspecs:
+        if index < len(args) and args[index] is not None:
+            value = args[index]
+            index += 1
+        elif kwargs.get(name) is not None:
+            value = kwargs.pop(name)
+        else:
+            if missing is not None:
+                missing.append(name)
+            continue
+
+        if limit is not None:
+            items = [text_limit(limit, value)]
+        else:
+            items = unpack(value, explode=explode)
+
+        if named:
+            for item in items:
+                item = str(item)
+                if item:
+                    values.append("%s=%s" % (name, item))
+                else:
+                    values.append(name + if_empty)
+        else:
+            values += [str(item) for item in items]
+
+    return (values, index)
+
 
+def value_extraction(template, *args, **kwargs):
     if not template:
         raise ValueError("provided empty template placeholder")
 
     placeholders = template.split(",")
 
     if not args and not kwargs:
-        if placeholders:
-            raise ValueError("missing uri placeholder data for placeholders: '%s'" % placeholders)
-        return ([], args, kwargs)
-
-
-    remaining_placeholders = placeholders
-    for index, placeholder in enumerate(placeholders):
-        original = placeholder
-        has_explode = placeholder[-1] == "*"
-        has_limiter = ":" in placeholder
-
-        if has_explode and has_limiter:
-            raise ValueError("malformed uri placeholder '%s'" % placeholder)
-
-        if has_explode:
-            placeholder = placeholder[:-1]
-
-        if has_limiter:
-            parts = placeholder.split(":")
-            placeholder = parts[0]
-            amount = int(parts[1])
-            if args and args[0] is not None:
-                values.append(text_limit(amount, args[0]))
-                args = tuple(a for a in args if a != args[0])
-                del remaining_placeholders[index]
-            elif placeholder in kwargs.keys() and kwargs[placeholder] is not None:
-                values.append(text_limit(amount, kwargs[placeholder]))
-                kwargs.pop(placeholder, None)
-                del remaining_placeholders[index]
-            continue
+        raise ValueError("missing uri placeholder data for placeholders: '%s'" % placeholders)
 
-        if args and args[0] is not None:
-            values += unpack(args[0], explode=has_explode)
-            args = tuple(a for a in args if a != args[0])
-            del remaining_placeholders[index]
-        elif placeholder in kwargs.keys() and kwargs[placeholder] is not None:
-            values += unpack(kwargs[placeholder], explode=has_explode)
-            kwargs.pop(placeholder, None)
-            del remaining_placeholders[index]
-        continue
-
-    if placeholders:
+    varspecs = [parse_varspec(placeholder) for placeholder in placeholders]
+
+    remaining_placeholders = []
+    (values, index) = collect_values(
+        varspecs, args, 0, kwargs, missing=remaining_placeholders
+    )
+
+    if remaining_placeholders:
         warnings.warn(
-            "uri placeholders '%s' remaining after parsing uri" % placeholders
+            "uri placeholders '%s' remaining after parsing uri" % remaining_placeholders
         )
-    return (values, args, kwargs)
+    return (values, args[index:], kwargs)
 
 
 def key_value_extraction(template, *args, **kwargs):
-    values = []
-
     if not template:
         raise ValueError("provided empty template placeholder")
 
-
     if not args and not kwargs:
-        if template:
-            raise ValueError("missing uri placeholder data for placeholders: '%s'" % template)
-        return ([], args, kwargs)
-
+        raise ValueError("missing uri placeholder data for placeholders: '%s'" % template)
 
+    varspecs = [parse_varspec(placeholder) for placeholder in template.split(",")]
 
-    placeholders = template.split(",")
-
-    remaining_placeholders = placeholders
-    for placeholder in placeholders:
-        original = placeholder
-        has_explode = placeholder[-1] == "*"
-        has_limiter = ":" in placeholder
-
-        if has_explode and has_limiter:
-            raise ValueError("malformed uri placeholder '%s'" % placeholder)
-
-        if has_explode:
-            placeholder = placeholder[:-1]
-
-        if has_limiter:
-            parts = placeholder.split(":")
-            placeholder = parts[0]
-            amount = int(parts[1])
-            if args and args[0] is not None:
-                values.append("%s=%s" % (placeholder, text_limit(amount, args[0])))
-                args = tuple(a for a in args if a != args[0])
-                remaining_placeholders.remove(original)
-            elif placeholder in kwargs.keys() and kwargs[placeholder] is not None:
-                values.append("%s=%s" % (placeholder, text_limit(amount, kwargs[placeholder])))
-                kwargs.pop(placeholder, None)
-                remaining_placeholders.remove(original)
-            continue
-
-        if args and args[0] is not None:
-            for item in unpack(args[0], explode=has_explode):
-                values.append("%s=%s" % (placeholder, item))
-            args = tuple(a for a in args if a != args[0])
-            remaining_placeholders.remove(original)
-        elif placeholder in kwargs.keys() and kwargs[placeholder] is not None:
-            for item in unpack(kwargs[placeholder], explode=has_explode):
-                values.append("%s=%s" % (placeholder, item))
-            kwargs.pop(placeholder, None)
-            remaining_placeholders.remove(original)
-        continue
+    remaining_placeholders = []
+    (values, index) = collect_values(
+        varspecs, args, 0, kwargs, named=True, missing=remaining_placeholders
+    )
 
     if remaining_placeholders:
         warnings.warn(
             "uri placeholders '%s' remaining after parsing uri" % remaining_placeholders
         )
-    return (values, args, kwargs)
+    return (values, args[index:], kwargs)
+
+
+def _expand_operator(operator, template, args, kwargs):
+    """ Internal function expanding a template's variables with an operator.
+
+    Expanders are thin wrappers over `Expression`, so they always agree with
+    `parse_uri`. Returns the expanded string and any unused args/kwargs.
+    """
+    missing = []
+    (value, index) = Expression(operator + template).expand(args, 0, kwargs, missing)
+    if missing:
+        warnings.warn("uri placeholders '%s' remaining after parsing uri" % missing)
+    return (value, args[index:], kwargs)
 
 
 def string_expansion(template, *args, **kwargs):
-    (values, args, kwargs) = value_extraction(template, *args, **kwargs)
-    return (",".join(values), args, kwargs)
+    return _expand_operator("", template, args, kwargs)
 
 
 def fragment_expansion(template, *args, **kwargs):
-    (value, args, kwargs) = string_expansion(template, *args, **kwargs)
-    return ("#%s" % ",".join(value), args, kwargs)
+    return _expand_operator("#", template, args, kwargs)
 
 
 def dot_expansion(template, *args, **kwargs):
-    (values, args, kwargs) = value_extraction(template, *args, **kwargs)
-    return (".".join(values), args, kwargs)
+    return _expand_operator(".", template, args, kwargs)
 
 
 def path_segment_expansion(template, *args, **kwargs):
-    (values, args, kwargs) = value_extraction(template, *args, **kwargs)
-    return ("/%s" % ",".join(values), args, kwargs)
+    return _expand_operator("/", template, args, kwargs)
 
 
 def path_parameter_expansion(template, *args, **kwargs):
-    (values, args, kwargs) = key_value_extraction(template, *args, **kwargs)
-    for index, value in enumerate(values):
-        parts = value.split("=")
-        if not len(parts[1]):
-            values[index] = parts[0]
-
-    return (";%s" % ",".join(values), args, kwargs)
+    return _expand_operator(";", template, args, kwargs)
 
 
 def form_style_expansion(template, *args, **kwargs):
-    (values, args, kwargs) = key_value_extraction(template, *args, **kwargs)
-    return ("?%s" % "&".join(values), args, kwargs)
+    return _expand_operator("?", template, args, kwargs)
 
 
 def form_style_continuation_expansion(template, *args, **kwargs):
-    (values, args, kwargs) = key_value_extraction(template, *args, **kwargs)
-    return ("&%s" % "&".join(values), args, kwargs)
-
-
+    return _expand_operator("&", template, args, kwargs)
+
+
+# Maps an operator to its (prefix, separator, named, if-empty) expansion style.
+operator_styles = {
+    "": ("", ",", False, ""),
+    "+": ("", ",", False, ""),
+    "#": ("#", ",", False, ""),
+    ".": ("", ".", False, ""),
+    "/": ("/", ",", False, ""),
+    ";": (";", ",", True, ""),
+    "?": ("?", "&", True, "="),
+    "&": ("&", "&", True, "="),
+}
 
 
 default_prefix_expander = string_expansion
@@ -212,32 +218,246 @@ prefix_types = {
 }
 
 def expand_placeholder(placeholder, *args, **kwargs):
-    expander = default_prefix_expander
-    if placeholder[0] in prefix_types:
-        expander = prefix_types[placeholder[0]]
-        placeholder = placeholder[1:]
+    return _expand_operator("", placeholder, args, kwargs)
+
+
+placeholder_regex = re.compile(r'{([^}]+)}') # example match: /foo{bar}
 
-    return expander(placeholder, *args, **kwargs)
+
+class Expression(object):
+    """ A single `{...}` expression of a URI template, parsed ahead of time.
+
+    * `placeholder` - The raw text between the braces.
+
+    * `operator` - The operator character, or an empty string if none.
+
+    * `varspecs` - A list of (name, explode, limit) tuples. See `parse_varspec`.
+    """
+
+    def __init__(self, placeholder):
+        """ Parse the operator, variable list and modifiers of a placeholder. """
+        if not placeholder:
+            raise ValueError("provided empty template placeholder")
+
+        self.placeholder = placeholder
+        self.operator = ""
+
+        template = placeholder
+        if placeholder[0] in operator_styles:
+            self.operator = placeholder[0]
+            template = placeholder[1:]
+
+        self.varspecs = [parse_varspec(v) for v in template.split(",")]
+        (self.prefix, self.separator, self.named, self.if_empty) = \
+            operator_styles[self.operator]
+
+    def expand(self, args, index, kwargs, missing):
+        """ Expand the expression using the provided args and kwargs.
+
+        Positional arguments are consumed starting at `index`, followed by
+        keyword arguments matching the variable name. Names of variables which
+        could not be satisfied are appended to the `missing` list.
+
+        Returns a tuple of the expanded string and the next unconsumed index.
+        """
+        (values, index) = collect_values(
+            self.varspecs, args, index, kwargs,
+            named=self.named, if_empty=self.if_empty, missing=missing
+        )
+
+        if not values:
+            return ("", index)
+        return (self.prefix + self.separator.join(values), index)
+
+
+class CompiledTemplate(object):
+    """ A URI template which is parsed once and can be expanded many times.
+
+    Parsing a href extracts every `{...}` expression along with its operator,
+    variables and modifiers. Expanding the template afterwards only has to
+    substitute values. Use `compile_template` to get a cached instance.
+    """
+
+    def __init__(self, href):
+        """ Tokenize the href into literal text and parsed expressions. """
+        self.href = href
+        self.expressions = []
+        self.segments = []
+
+        position = 0
+        for match in placeholder_regex.finditer(href):
+            expression = Expression(match.group(1))
+            self.expressions.append(expression)
+            self.segments.append((href[position:match.start()], expression))
+            position = match.end()
+        self.segments.append((href[position:], None))
+
+    @property
+    def variables(self):
+        """ A list of the variable names used by the template, in order. """
+        return [
+            name
+            for expression in self.expressions
+            for (name, explode, limit) in expression.varspecs
+        ]
+
+    def expand(self, *args, **kwargs):
+        """ Expand the template, returning the uri and any unused args/kwargs.
+
+        The uri is built in a single pass over the tokenized segments, so the
+        cost is linear in the length of the template and the values used.
+        """
+        (uri, index) = self._expand(args, kwargs)
+        return (uri, args[index:], kwargs)
+
+    def expand_many(self, rows):
+        """ Yield an expanded uri for every row of keyword arguments.
+
+        `rows` is either an iterable of dictionaries, or a dictionary of
+        equal-length sequences (such as NumPy arrays or pandas columns) which
+        are read column-wise without creating a dictionary per row. The rows
+        provided are never modified.
+        """
+        if isinstance(rows, dict):
+            view = _ColumnView(rows)
+            for row in range(len(view)):
+                view.row = row
+                yield self._expand((), view)[0]
+            return
+
+        for row in rows:
+            if not isinstance(row, dict):
+                raise TypeError("'%s' must be a dict" % row.__class__.__name__)
+            yield self._expand((), _RowView(row))[0]
+
+    def _expand(self, args, kwargs):
+        """ Internal method returning the uri and the next unconsumed index. """
+        parts = []
+        index = 0
+        missing = []
+        for (literal, expression) in self.segments:
+            parts.append(literal)
+            if expression is not None:
+                (replacement, index) = expression.expand(args, index, kwargs, missing)
+                parts.append(replacement)
+
+        if missing:
+            warnings.warn(
+                "uri placeholders '%s' remaining after parsing uri" % missing
+            )
+        return ("".join(parts), index)
+
+    def __repr__(self):
+        """ Represent the current CompiledTemplate as a string. """
+        return "CompiledTemplate(%r)" % self.href
+
+
+class _RowView(object):
+    """ Read-only stand-in for kwargs, so expanding does not pop from a row. """
+
+    def __init__(self, row):
+        self._row = row
+
+    def get(self, name, default=None):
+        return self._row.get(name, default)
+
+    pop = get
+
+
+class _ColumnView(object):
+    """ Read-only stand-in for kwargs reading one row out of named columns. """
+
+    def __init__(self, columns):
+        self._columns = {}
+        self.row = 0
+
+        length = None
+        for name, column in columns.items():
+            # NumPy arrays and pandas Series convert to plain Python values.
+            if hasattr(column, "tolist"):
+                column = column.tolist()
+            if length is None:
+                length = len(column)
+            elif len(column) != length:
+                raise ValueError(
+                    "column '%s' has %i values, expected %i" % (
+                        name, len(column), length
+                    )
+                )
+            self._columns[name] = column
+        self._length = length or 0
+
+    def __len__(self):
+        return self._length
+
+    def get(self, name, default=None):
+        column = self._columns.get(name)
+        if column is None:
+            return default
+        return column[self.row]
+
+    pop = get
+
+
+template_cache_size = 512
+_template_cache = collections.OrderedDict()
+_template_cache_lock = threading.Lock()
+
+
+def compile_template(href):
+    """ Return a CompiledTemplate for the href, using a bounded LRU cache.
+
+    The least recently used templates are evicted once more than
+    `template_cache_size` distinct hrefs have been compiled.
+    """
+    with _template_cache_lock:
+        template = _template_cache.get(href)
+        if template is not None:
+            _template_cache.move_to_end(href)
+            return template
+
+    template = CompiledTemplate(href)
+
+    with _template_cache_lock:
+        _template_cache[href] = template
+        while len(_template_cache) > template_cache_size:
+            _template_cache.popitem(last=False)
+    return template
+
+
+def set_template_cache_size(size):
+    """ Set the maximum number of compiled templates to keep cached. """
+    if not isinstance(size, int):
+        raise TypeError("'%s' must be an integer" % size.__class__.__name__)
+    if size < 0:
+        raise ValueError("template cache size must not be negative")
+
+    global template_cache_size
+    with _template_cache_lock:
+        template_cache_size = size
+        while len(_template_cache) > template_cache_size:
+            _template_cache.popitem(last=False)
+
+
+def clear_template_cache():
+    """ Evict every compiled template from the cache. """
+    with _template_cache_lock:
+        _template_cache.clear()
 
 
 def parse_uri(href, *args, **kwargs):
     if "{" not in href or "}" not in href:
         warnings.warn(
-            "tempalted href value '%s' does not contain template placeholders"
+            "tempalted href value '%s' does not contain template placeholders" % href
         )
         return (href, args, kwargs)
 
-    placeholder_regex = re.compile(r'{([^}]+)}') # example match: /foo{bar}
-
-    # Process required positional arguments first
-    placeholders = placeholder_regex.findall(href)
-    for placeholder in placeholders:
-        (replacement, a, kw) = expand_placeholder(placeholder, *args, **kwargs)
-        args = a
-        kwargs= kw
-
-        href = href.replace("{%s}" % placeholder, replacement)
+    return compile_template(href).expand(*args, **kwargs)
 
-    return (href, args, kwargs)
 
+def expand_batch(href, rows):
+    """ Yield the expanded uri of a href for every row of keyword arguments.
 
+    See `CompiledTemplate.expand_many` for the accepted `rows` formats.
+    """
+    return compile_template(href).expand_many(rows)